@@ -1,16 +1,31 @@
+import argparse
 import json
 import os
+import sys
 import threading
+import time
 import tkinter as tk
 from tkinter import filedialog, ttk, messagebox
-import pygame.mixer
 from pynput.keyboard import Key, Listener
 
-# pygame 초기화 (소리 재생을 위해)
-pygame.mixer.init()
+# app/ 에서 실행해도 저장소 루트의 keyboard_sound 패키지를 찾을 수 있게 합니다
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from keyboard_sound.autotune import BlockTuner
+from keyboard_sound.engine import SoundEngine
+from keyboard_sound.formats import StreamFormat
+from keyboard_sound.keymap import KeyTable
+from keyboard_sound.mapping import entry_path, with_path
+from keyboard_sound.metrics import LatencyHistogram
+from keyboard_sound.output import add_output_arguments, output_from_args
+from keyboard_sound.procengine import ProcessEngine
+from keyboard_sound.sockinput import DEFAULT_SOCKET_PATH, SocketClient
+from keyboard_sound.trim import Trimmer
+
+PROGRESS_POLL_MS = 50  # 백그라운드 로딩 진행 상황을 확인하는 주기
+REFRESH_MS = 16        # 키 강조 갱신 주기 (약 60Hz)
 
 class KeyboardSoundGUI:
-    def __init__(self, root):
+    def __init__(self, root, listen=True, output=None, fmt=None, block=None, autotune=None, process=False, connect=None):
         self.root = root
         self.root.title("키보드 사운드 커스터마이저")
         self.root.geometry("1000x600")
@@ -19,22 +34,63 @@ class KeyboardSoundGUI:
         self.key_mapping_file = "keyboard_mapping_t.json"
         self.key_to_mp3 = self.load_key_mapping()
         
+        # 버튼 스타일은 한 번만 만들어 모든 키 버튼이 공유합니다
+        self.create_styles()
+        
         # 키보드 레이아웃 정의
         self.create_keyboard_layout()
         
         # 도구 프레임 생성
         self.create_tool_frame()
         
-        # 키보드 리스너 설정
-        self.listener = None
-        self.start_listener()
+        # 키 강조: 리스너 스레드는 원하는 상태와 dirty 표시만 남기고,
+        # 메인 루프가 REFRESH_MS 마다 최종 상태가 바뀐 버튼만 다시 그립니다
+        self._key_state = {}
+        self._dirty = set()
+        self._shown = {}
+        self.highlight_lag = None  # 벤치마크 모드에서 LatencyHistogram 으로 설정됩니다
+        self.refreshes = 0
+        self.restyles = 0
+        self.root.after(REFRESH_MS, self.refresh_highlights)
         
-        # 소리 캐시
-        self.sound_cache = {}
+        # connect 면 소리는 그 소켓의 엔진(keyboard-sound --listen-socket)이 냅니다. 여기서는 엔진을 만들지 않고
+        # (오디오 장치도, 사운드 디코딩도 없이) 키 이름 표로 키를 찾아 이름으로 보내며, 키 할당은 막습니다
+        self.client = SocketClient(connect) if connect else None
+        self._progress = (0, 0)
+        self._polling = False
+        if self.client is not None:
+            self.engine = None
+            self.keymap = KeyTable()
+            self.keymap.register(self.key_buttons)
+            self.keymap.register(self.client.index)
+            self.keymap.compile({})
+            self.key_index = self.keymap.index
+            for button in self.mapping_buttons:
+                button.state(['disabled'])
+            self.progress_label.config(text=f"엔진에 연결됨: {connect}")
+        else:
+            # CLI(main.py)와 같은 재생 엔진. 스트림을 먼저 열고 사운드는 백그라운드에서 적재합니다
+            # 샘플 앞 무음과 들리지 않는 꼬리는 적재할 때 잘라냅니다
+            # process 면 믹서와 출력 스트림을 별도 프로세스에서 돌려 Tk 메인 루프가 오디오 콜백을 늦추지 않게 합니다
+            engine_cls = ProcessEngine if process else SoundEngine
+            self.engine = engine_cls(fmt, block=block, mapping_file=self.key_mapping_file, autotune=autotune,
+                                      trim=Trimmer())
+            # 매핑되지 않은 키도 강조할 수 있도록 모든 버튼 이름을 디스패치 테이블에 등록합니다
+            self.engine.register_keys(self.key_buttons)
+            self.keymap = self.engine.keymap
+            self.key_index = self.engine.key_index
+            if listen:
+                self.engine.start(output=output)
+            self.reload_sounds()
         
         # 현재 눌린 키를 추적
         self.pressed_keys = set()
         
+        # 키보드 리스너 설정
+        self.listener = None
+        if listen:
+            self.start_listener()
+        
         # 종료 시 리소스 정리
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
     
@@ -68,10 +124,13 @@ class KeyboardSoundGUI:
         self.tool_frame.pack(side=tk.TOP, fill=tk.X)
         
         # 저장 버튼
-        ttk.Button(self.tool_frame, text="매핑 저장", command=self.save_key_mapping).pack(side=tk.LEFT, padx=5)
+        save_button = ttk.Button(self.tool_frame, text="매핑 저장", command=self.save_key_mapping)
+        save_button.pack(side=tk.LEFT, padx=5)
         
         # 새 매핑 로드 버튼
-        ttk.Button(self.tool_frame, text="매핑 로드", command=self.load_new_mapping).pack(side=tk.LEFT, padx=5)
+        load_button = ttk.Button(self.tool_frame, text="매핑 로드", command=self.load_new_mapping)
+        load_button.pack(side=tk.LEFT, padx=5)
+        self.mapping_buttons = (save_button, load_button)
         
         # 도움말 버튼
         ttk.Button(self.tool_frame, text="도움말", command=self.show_help).pack(side=tk.LEFT, padx=5)
@@ -83,6 +142,42 @@ class KeyboardSoundGUI:
         # 할당된 소리 표시
         self.sound_path_label = ttk.Label(self.tool_frame, text="할당된 소리: 없음")
         self.sound_path_label.pack(side=tk.LEFT, padx=5)
+        
+        # 사운드 로딩 진행 표시
+        self.progress_label = ttk.Label(self.tool_frame, text="")
+        self.progress_label.pack(side=tk.RIGHT, padx=5)
+        self.progress_bar = ttk.Progressbar(self.tool_frame, length=150, mode='determinate')
+        self.progress_bar.pack(side=tk.RIGHT, padx=5)
+    
+    def reload_sounds(self):
+        """현재 매핑을 엔진에 백그라운드로 적재합니다. 새로 보거나 바뀐 사운드만 디코딩됩니다."""
+        self.engine.load_async(self.key_to_mp3, progress=self.on_load_progress)
+        if not self._polling:
+            self._polling = True
+            self.root.after(PROGRESS_POLL_MS, self.poll_loading)
+    
+    def on_load_progress(self, done, total):
+        """로더 스레드에서 호출됩니다. 값만 기록하고 화면 갱신은 메인 루프에서 합니다."""
+        self._progress = (done, total)
+    
+    def poll_loading(self):
+        """로딩 진행 상황을 진행 막대에 반영합니다."""
+        done, total = self._progress
+        if self.engine.busy:
+            self.progress_bar['maximum'] = max(total, 1)
+            self.progress_bar['value'] = done
+            self.progress_label.config(text=f"사운드 로딩 {done}/{total}")
+            self.root.after(PROGRESS_POLL_MS, self.poll_loading)
+        else:
+            self._polling = False
+            self.progress_bar['value'] = self.progress_bar['maximum']
+            self.progress_label.config(text=f"사운드 {len(self.engine.key_to_slot)}개 키 준비됨")
+    
+    def create_styles(self):
+        """키 버튼 스타일을 정의합니다."""
+        style = ttk.Style(self.root)
+        style.configure("Key.TButton", padding=5, relief="raised")
+        style.configure("Pressed.Key.TButton", padding=5, relief="sunken", background="#aaccff")
     
     def create_keyboard_layout(self):
         """키보드 레이아웃을 생성합니다."""
@@ -134,12 +229,6 @@ class KeyboardSoundGUI:
     
     def create_key_button(self, parent, key_name, width_ratio):
         """키 버튼을 생성합니다."""
-        key_width = int(60 * width_ratio)
-        
-        # 버튼 스타일 설정
-        style = ttk.Style()
-        style.configure("Key.TButton", padding=5)
-        
         # 키 버튼 생성
         key_button = ttk.Button(
             parent, 
@@ -158,9 +247,14 @@ class KeyboardSoundGUI:
         self.selected_key_label.config(text=f"선택된 키: {key_name}")
         
         # 현재 할당된 소리 표시
-        sound_path = self.key_to_mp3.get(key_name, "할당되지 않음")
+        sound_path = entry_path(self.key_to_mp3.get(key_name, "할당되지 않음"))
         self.sound_path_label.config(text=f"할당된 소리: {os.path.basename(sound_path)}")
         
+        if self.engine is None:
+            # 소리는 연결한 엔진의 매핑으로 나므로 여기서 바꿔도 반영되지 않습니다
+            messagebox.showinfo("할당 불가", "--connect 모드에서는 연결한 엔진의 매핑 파일에서 소리를 할당하세요.")
+            return
+        
         # 새 소리 할당
         new_sound = filedialog.askopenfilename(
             title=f"{key_name} 키에 할당할 소리 선택",
@@ -168,16 +262,13 @@ class KeyboardSoundGUI:
         )
         
         if new_sound:
-            # 상대 경로로 저장
+            # 상대 경로로 저장 (게인/팬이 지정된 항목이면 그대로 유지)
             if os.path.isabs(new_sound):
-                rel_path = os.path.relpath(new_sound, os.getcwd())
-                self.key_to_mp3[key_name] = rel_path
-            else:
-                self.key_to_mp3[key_name] = new_sound
+                new_sound = os.path.relpath(new_sound, os.getcwd())
+            self.key_to_mp3[key_name] = with_path(self.key_to_mp3.get(key_name), new_sound)
             
-            # 캐시에서 제거하여 새 소리가 로드되도록
-            if key_name in self.sound_cache:
-                del self.sound_cache[key_name]
+            # 새 소리만 백그라운드에서 디코딩해 엔진에 반영합니다
+            self.reload_sounds()
             
             # 라벨 업데이트
             self.sound_path_label.config(text=f"할당된 소리: {os.path.basename(new_sound)}")
@@ -193,23 +284,26 @@ class KeyboardSoundGUI:
     def on_key_press(self, key):
         """키가 눌렸을 때의 이벤트 핸들러."""
         try:
-            # 키 이름 가져오기
-            if hasattr(key, 'char') and key.char is not None:
-                k = key.char
-            else:
-                k = str(key).replace('Key.', '')
+            # 컴파일된 디스패치 테이블에서 정수 키 번호를 찾습니다 (문자열 변환 없음)
+            kid = self.key_index(key)
+            if kid < 0:
+                return
             
             # 이미 눌려있는 키는 무시
-            if k in self.pressed_keys:
+            if kid in self.pressed_keys:
                 return
             
-            self.pressed_keys.add(k)
-            
-            # GUI 업데이트는 메인 스레드에서 처리
-            self.root.after(0, lambda: self.highlight_key(k, True))
+            self.pressed_keys.add(kid)
             
             # 소리 재생
-            self.play_sound(k)
+            if self.client is not None:
+                if self.client.press(self.keymap.names[kid], time.perf_counter_ns()):
+                    self.client.flush()
+            else:
+                self.engine.press(kid, time.perf_counter_ns())
+            
+            # GUI 업데이트는 메인 스레드의 갱신 루프에서 처리
+            self.set_key_state(self.keymap.names[kid], True)
                 
         except Exception as e:
             print(f"키 눌림 이벤트 처리 오류: {e}")
@@ -217,22 +311,100 @@ class KeyboardSoundGUI:
     def on_key_release(self, key):
         """키가 떼어졌을 때의 이벤트 핸들러."""
         try:
-            # 키 이름 가져오기
-            if hasattr(key, 'char') and key.char is not None:
-                k = key.char
-            else:
-                k = str(key).replace('Key.', '')
+            kid = self.key_index(key)
+            if kid < 0:
+                return
             
             # 누른 키 목록에서 제거
-            if k in self.pressed_keys:
-                self.pressed_keys.remove(k)
+            self.pressed_keys.discard(kid)
+            if self.client is not None:
+                if self.client.release(self.keymap.names[kid]):
+                    self.client.flush()
+            else:
+                self.engine.release(kid)
             
-            # GUI 업데이트는 메인 스레드에서 처리
-            self.root.after(0, lambda: self.highlight_key(k, False))
+            # GUI 업데이트는 메인 스레드의 갱신 루프에서 처리
+            self.set_key_state(self.keymap.names[kid], False)
                 
         except Exception as e:
             print(f"키 뗌 이벤트 처리 오류: {e}")
     
+    def set_key_state(self, key_name, is_pressed, t_ns=None):
+        """
+        키의 눌림 상태를 기록합니다. 어느 스레드에서나 호출할 수 있으며 Tk 는 건드리지 않습니다.
+        상태를 먼저 쓰고 dirty 에 넣으므로, 갱신 루프는 꺼낸 키의 최신 상태를 읽게 됩니다.
+        """
+        self._key_state[key_name] = (is_pressed, t_ns if t_ns is not None else time.perf_counter_ns())
+        self._dirty.add(key_name)
+    
+    def refresh_highlights(self):
+        """dirty 로 표시된 키들의 최종 상태만 화면에 반영합니다. 메인 루프에서 주기적으로 실행됩니다."""
+        now = time.perf_counter_ns()
+        dirty = self._dirty
+        while dirty:
+            try:
+                k = dirty.pop()
+            except KeyError:
+                break
+            is_pressed, t_ns = self._key_state[k]
+            if self.highlight_lag is not None:
+                self.highlight_lag.record(now - t_ns)
+            # 한 주기 안에 눌렀다 뗀 키처럼 화면 상태가 그대로인 경우는 다시 그리지 않습니다
+            if self._shown.get(k, False) != is_pressed:
+                self._shown[k] = is_pressed
+                self.highlight_key(k, is_pressed)
+                self.restyles += 1
+        self.refreshes += 1
+        self.root.after(REFRESH_MS, self.refresh_highlights)
+    
+    def run_highlight_benchmark(self, rate, duration, mode='coalesced'):
+        """
+        합성 키 이벤트를 초당 rate 개씩 duration 초 동안 넣고, 이벤트 시각부터 화면에 반영될 때까지의
+        지연을 출력한 뒤 창을 닫습니다. mode='per-event' 는 이전 방식(이벤트마다 root.after)과 비교용입니다.
+        """
+        self.highlight_lag = LatencyHistogram()
+        keys = list(self.key_buttons)
+        sent = [0]
+        
+        def apply_event(k, is_pressed, t_ns):
+            self.highlight_lag.record(time.perf_counter_ns() - t_ns)
+            self.highlight_key(k, is_pressed)
+            self.restyles += 1
+        
+        def produce():
+            start = time.perf_counter()
+            n = 0
+            while time.perf_counter() - start < duration:
+                due = int((time.perf_counter() - start) * rate)
+                while n < due:
+                    # 같은 키를 눌렀다 떼는 쌍으로 보내 키 반복이 섞인 빠른 타이핑을 흉내 냅니다
+                    k = keys[(n // 2) % len(keys)]
+                    is_pressed = n % 2 == 0
+                    t_ns = time.perf_counter_ns()
+                    if mode == 'per-event':
+                        self.root.after(0, apply_event, k, is_pressed, t_ns)
+                    else:
+                        self.set_key_state(k, is_pressed, t_ns)
+                    n += 1
+                time.sleep(0.001)
+            sent[0] = n
+        
+        def report():
+            if producer.is_alive():
+                self.root.after(100, report)
+                return
+            self.root.update()
+            lag = self.highlight_lag
+            print(f"highlight benchmark ({mode}): {sent[0]} events at {rate}/s for {duration}s, "
+                  f"{self.restyles} restyles, {self.refreshes} refreshes")
+            print(f"  lag p50 {lag.percentile(50) / 1e6:.2f} ms, p99 {lag.percentile(99) / 1e6:.2f} ms, "
+                  f"max {lag.max / 1e6:.2f} ms")
+            self.on_closing()
+        
+        producer = threading.Thread(target=produce, name="highlight-bench", daemon=True)
+        producer.start()
+        self.root.after(100, report)
+    
     def highlight_key(self, key_name, is_pressed):
         """키 버튼의 상태를 시각적으로 업데이트합니다."""
         if key_name in self.key_buttons:
@@ -246,26 +418,6 @@ class KeyboardSoundGUI:
                 button.state(['!pressed'])
                 button.configure(style="Key.TButton")
     
-    def play_sound(self, key_name):
-        """키에 맵핑된 소리를 재생합니다."""
-        if key_name in self.key_to_mp3:
-            sound_path = self.key_to_mp3[key_name]
-            
-            # 소리 캐싱
-            if key_name not in self.sound_cache:
-                try:
-                    sound = pygame.mixer.Sound(sound_path)
-                    self.sound_cache[key_name] = sound
-                except Exception as e:
-                    print(f"소리 로드 실패 ({key_name}): {e}")
-                    return
-            
-            # 소리 재생
-            try:
-                self.sound_cache[key_name].play()
-            except Exception as e:
-                print(f"소리 재생 실패 ({key_name}): {e}")
-    
     def load_new_mapping(self):
         """새 매핑 파일을 로드합니다."""
         file_path = filedialog.askopenfilename(
@@ -278,8 +430,8 @@ class KeyboardSoundGUI:
             self.key_to_mp3 = self.load_key_mapping()
             messagebox.showinfo("로드 완료", f"{file_path}에서 매핑이 로드되었습니다.")
             
-            # 소리 캐시 초기화
-            self.sound_cache.clear()
+            # 이미 적재된 사운드는 그대로 두고, 새 매핑에서 처음 보는 사운드만 디코딩합니다
+            self.reload_sounds()
     
     def show_help(self):
         """도움말을 표시합니다."""
@@ -299,16 +451,28 @@ class KeyboardSoundGUI:
         """애플리케이션 종료 시 정리 작업을 수행합니다."""
         if self.listener:
             self.listener.stop()
+        if self.client is not None:
+            self.client.close()
+        if self.engine is not None:
+            self.engine.close()
         self.root.destroy()
 
 if __name__ == "__main__":
-    # 스타일 설정
-    root = tk.Tk()
-    style = ttk.Style()
+    parser = argparse.ArgumentParser(description="키보드 사운드 커스터마이저")
+    parser.add_argument('--bench', type=int, metavar='RATE',
+                        help="키 강조 벤치마크: 초당 RATE 개의 합성 키 이벤트를 넣고 지연을 출력합니다")
+    parser.add_argument('--bench-duration', type=float, default=5.0)
+    parser.add_argument('--bench-mode', choices=('coalesced', 'per-event'), default='coalesced')
+    add_output_arguments(parser)
+    parser.add_argument('--connect', nargs='?', const=DEFAULT_SOCKET_PATH, metavar='PATH',
+                        help="소리는 이 소켓의 엔진(keyboard-sound --listen-socket)으로 내고 오디오 장치를 열지 않습니다")
+    args = parser.parse_args()
     
-    # 키 버튼 스타일 정의
-    style.configure("Key.TButton", padding=5, relief="raised")
-    style.configure("Pressed.Key.TButton", padding=5, relief="sunken", background="#aaccff")
-    
-    app = KeyboardSoundGUI(root)
+    root = tk.Tk()
+    app = KeyboardSoundGUI(root, listen=args.bench is None, output=output_from_args(args),
+                           fmt=StreamFormat(rate=args.rate), block=args.block,
+                           autotune=BlockTuner() if args.autotune else None, process=args.process,
+                           connect=args.connect)
+    if args.bench is not None:
+        app.run_highlight_benchmark(args.bench, args.bench_duration, args.bench_mode)
     root.mainloop() 
\ No newline at end of file
@@ -7,7 +7,7 @@ DATA_FILES = [
 ]
 OPTIONS = {
     'argv_emulation': True,
-    'packages': ['pygame', 'pynput', 'pydub'],
+    'packages': ['keyboard_sound', 'numpy', 'pyaudio', 'pynput', 'pydub'],
     'iconfile': 'app_icon.icns',  # 아이콘 파일이 있다면 지정
     'plist': {
         'CFBundleName': '키보드 사운드 커스터마이저',
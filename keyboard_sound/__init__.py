@@ -0,0 +1 @@
+"""키보드 사운드 엔진 패키지."""
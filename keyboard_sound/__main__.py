@@ -0,0 +1,3 @@
+from keyboard_sound.cli import main
+
+main()
@@ -0,0 +1,257 @@
+"""
+블록 크기 자동 조정.
+
+오디오 스레드는 콜백마다 믹싱 시간과 언더런 status 만 카운터에 더하고(record), 조정 스레드가
+일정 구간(window)마다 카운터를 읽어 데드라인 미스 비율을 계산합니다. 후보 블록 크기를 작은 것부터
+올라가며 미스 비율이 목표 이하인 가장 작은 크기에 정착하고, 그 값을 장치별로 파일에 저장해
+다음 실행은 저장된 크기에서 시작합니다. 정착한 뒤에도 미스가 늘면 한 단계 키웁니다.
+
+블록을 바꿀 때는 재생 중인 보이스가 끝나기를 (최대 quiet_timeout 초) 기다렸다가 스트림을 다시 엽니다.
+그동안 계속 타이핑 중이면 이번에는 바꾸지 않고 다음 점검에서 다시 기다립니다.
+
+시뮬레이션 (오디오 장치 없이 콜백당 부하와 부하 스파이크를 주입):
+    python -m keyboard_sound.autotune --overhead-us 900 --spike-us 3000 --spike-rate 0.002
+"""
+
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+
+from keyboard_sound.metrics import PA_OUTPUT_UNDERFLOW
+
+DEFAULT_CANDIDATES = (32, 64, 128, 256, 512)
+DEFAULT_TUNING_FILE = os.path.join("sounds", ".block_tuning.json")
+
+
+def load_tuning(path):
+    """저장된 {장치 키: 블록 크기}. 파일이 없거나 읽을 수 없으면 빈 딕셔너리."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_tuning(path, device_key, block):
+    tuning = load_tuning(path)
+    tuning[device_key] = block
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(tuning, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+class BlockTuner:
+    """
+    후보 블록 크기 중 데드라인 미스 비율이 target_miss 이하인 가장 작은 크기를 찾습니다.
+
+    콜백 하나는 언더런 status 가 오거나 믹싱 시간이 블록 주기의 cost_limit 배를 넘으면 미스입니다
+    (cost_limit 이 None 이면 status 만 봅니다).
+    한 후보는 window 초 분량의 오디오(콜백 수로 환산)를 보고 판정하되, 목표 비율을 가릴 수 있도록
+    최소 1 / target_miss 개의 콜백을 봅니다.
+    """
+
+    def __init__(self, candidates=DEFAULT_CANDIDATES, target_miss=0.001, window=2.0, cost_limit=0.8,
+                 warmup=8, tuning_file=DEFAULT_TUNING_FILE):
+        self.candidates = sorted(set(candidates))
+        self.target_miss = target_miss
+        self.window = window
+        self.cost_limit = cost_limit
+        self.warmup = warmup
+        self.tuning_file = tuning_file
+        self.device_key = None
+        self.rate = None
+        self.index = 0
+        self.settled = False
+        self.history = []
+        self._min_callbacks = 1.0 / target_miss if target_miss > 0 else 0
+
+        # 오디오 스레드만 씁니다
+        self.callbacks = 0
+        self.misses = 0
+        self._limit_ns = 0
+        # 조정 스레드만 씁니다 (카운터를 지우지 않고 시작 시점 값을 기억합니다)
+        self._start_callbacks = 0
+        self._start_misses = 0
+
+    @property
+    def block(self):
+        return self.candidates[self.index]
+
+    @property
+    def max_block(self):
+        return self.candidates[-1]
+
+    def begin(self, device_key, rate, block=None):
+        """장치 키에 저장된 크기(없으면 block, 그것도 없으면 가장 작은 후보)로 시작하고 그 크기를 반환합니다."""
+        self.device_key = device_key
+        self.rate = rate
+        saved = load_tuning(self.tuning_file).get(device_key) if self.tuning_file else None
+        start = saved or block or self.candidates[0]
+        self.index = min(range(len(self.candidates)), key=lambda i: abs(self.candidates[i] - start))
+        if saved:
+            logging.info(f"block autotune: {device_key} 에 저장된 {self.block} 프레임에서 시작합니다")
+        self._switched()
+        return self.block
+
+    def _switched(self):
+        if self.cost_limit is None:
+            self._limit_ns = 1 << 62
+        else:
+            self._limit_ns = int(self.block * 1e9 / self.rate * self.cost_limit)
+        self._start_callbacks = self.callbacks + self.warmup
+        self._start_misses = None
+
+    def record(self, cost_ns, status):
+        """오디오 콜백에서 호출합니다. 정수 비교와 덧셈만 합니다."""
+        self.callbacks += 1
+        if status & PA_OUTPUT_UNDERFLOW or cost_ns > self._limit_ns:
+            self.misses += 1
+
+    def poll(self):
+        """
+        조정 스레드에서 주기적으로 호출합니다. 현재 구간의 판정이 끝났고 블록 크기를 바꿔야 하면
+        새 크기를, 아니면 None 을 반환합니다. 크기를 바꾼 뒤에는 switched() 를 호출해야 합니다.
+        """
+        callbacks = self.callbacks
+        if callbacks < self._start_callbacks:
+            return None
+        if self._start_misses is None:
+            # 워밍업이 끝난 시점부터 셉니다
+            self._start_callbacks, self._start_misses = callbacks, self.misses
+            return None
+        counted = callbacks - self._start_callbacks
+        if counted < max(self.window * self.rate / self.block, self._min_callbacks):
+            return None
+        ratio = (self.misses - self._start_misses) / counted
+        self._start_callbacks, self._start_misses = callbacks, self.misses
+
+        if ratio <= self.target_miss:
+            if not self.settled:
+                self.history.append((self.block, ratio))
+                self.settled = True
+                logging.info(f"block autotune: {self.block} 프레임으로 정착 "
+                             f"({self.block * 1000.0 / self.rate:.2f} ms, miss {ratio:.4%})")
+                if self.tuning_file:
+                    save_tuning(self.tuning_file, self.device_key, self.block)
+            return None
+        self.history.append((self.block, ratio))
+        if self.index + 1 >= len(self.candidates):
+            if not self.settled:
+                self.settled = True
+                logging.warning(f"block autotune: 가장 큰 후보 {self.block} 프레임에서도 miss {ratio:.4%}")
+            return None
+        logging.info(f"block autotune: {self.block} 프레임 miss {ratio:.4%} > {self.target_miss:.4%}, "
+                     f"{self.candidates[self.index + 1]} 프레임으로 올립니다")
+        self.index += 1
+        self.settled = False
+        return self.block
+
+    def switched(self):
+        """새 블록 크기로 스트림을 다시 열었음을 알립니다."""
+        self._switched()
+
+    def summary(self):
+        steps = ", ".join(f"{b}:{r:.4%}" for b, r in self.history[-8:])
+        return f"block autotune: {self.block} frames ({'settled' if self.settled else 'tuning'}; {steps})"
+
+
+class TuningThread:
+    """BlockTuner 를 주기적으로 확인하고 필요하면 엔진의 블록 크기를 바꾸는 스레드."""
+
+    def __init__(self, engine, tuner, interval=0.1, quiet_timeout=1.0):
+        self.engine = engine
+        self.tuner = tuner
+        self.interval = interval
+        self.quiet_timeout = quiet_timeout
+        self.deferred = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        block = None
+        while not self._stop.wait(self.interval):
+            if block is None:
+                block = self.tuner.poll()
+                if block is None:
+                    continue
+            # 재생 중인 보이스가 끝날 때까지 기다렸다가 스트림을 다시 엽니다
+            waited = 0.0
+            while self.engine.mixer.active and waited < self.quiet_timeout:
+                if self._stop.wait(0.005):
+                    return
+                waited += 0.005
+            if self.engine.mixer.active:
+                # 타이핑 중에 스트림을 다시 열면 소리가 끊기므로 다음 점검에서 다시 기다립니다
+                self.deferred += 1
+                continue
+            self.engine.set_block(block)
+            self.tuner.switched()
+            block = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="block-autotune", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+def simulate(overhead_us=900.0, spike_us=3000.0, spike_rate=0.002, duration=60.0, key_rate=8.0,
+             candidates=DEFAULT_CANDIDATES, target_miss=0.001, window=1.0, speed=10.0, seed=0):
+    """
+    SimulatedOutput 으로 엔진을 돌리고 (tuner, output) 을 반환합니다.
+    오디오 시간 duration 초 동안 초당 key_rate 번 키를 누릅니다 (실제 시간의 speed 배로 진행됩니다).
+    """
+    from keyboard_sound.bench import synthetic_samples
+    from keyboard_sound.engine import SoundEngine
+    from keyboard_sound.output import SimulatedOutput
+
+    # 가상 장치가 실제 믹싱 시간까지 더해 언더런을 판정하므로 status 만 봅니다
+    tuner = BlockTuner(candidates, target_miss=target_miss, window=window, cost_limit=None, tuning_file=None)
+    engine = SoundEngine(block=candidates[0], autotune=tuner)
+    slots = engine.mixer.load_samples(synthetic_samples(8, length_ms=80, seed=seed))
+    engine.reloader = None
+    engine._key_to_slot = {f"k{i}": s for i, s in enumerate(slots)}
+    output = SimulatedOutput(overhead_us, spike_us, spike_rate, speed, seed)
+    engine.start(output=output)
+    pressed = 0
+    try:
+        while output.audio_time < duration:
+            if output.audio_time * key_rate > pressed:
+                engine.play(f"k{pressed % len(slots)}")
+                pressed += 1
+            time.sleep(0.002)
+    finally:
+        engine.close()
+    return tuner, output
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m keyboard_sound.autotune",
+                                     description="시뮬레이션 스트림으로 블록 크기 자동 조정 확인")
+    parser.add_argument('--overhead-us', type=float, default=900.0, help="콜백당 고정 부하 (us)")
+    parser.add_argument('--spike-us', type=float, default=3000.0, help="부하 스파이크 크기 (us)")
+    parser.add_argument('--spike-rate', type=float, default=0.002, help="콜백당 스파이크 확률")
+    parser.add_argument('--duration', type=float, default=60.0, help="시뮬레이션할 오디오 시간 (초)")
+    parser.add_argument('--target-miss', type=float, default=0.001)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    tuner, output = simulate(args.overhead_us, args.spike_us, args.spike_rate, args.duration,
+                             target_miss=args.target_miss, seed=args.seed)
+    print(f"simulated: {output.audio_time:.1f}s audio, {output.underruns} underruns")
+
+
+if __name__ == '__main__':
+    main()
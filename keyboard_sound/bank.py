@@ -0,0 +1,157 @@
+"""
+사운드 뱅크 파일 포맷.
+
+    [8바이트 매직][uint32 버전][uint32 인덱스 길이][JSON 인덱스][패딩][PCM 프레임...]
+
+PCM 영역은 뱅크의 스트림 포맷(샘플레이트/채널/샘플 포맷)으로 정규화되어 있고, 페이지 경계에
+정렬되어 있으며 0번 프레임은 무음입니다 (mixer.pack_samples 와 같은 배치).
+플레이어는 이 영역을 np.memmap 으로 열어 복사 없이 믹싱하므로, 여러 프로세스가 한 뱅크를 공유할 수 있습니다.
+
+사용법:
+    python -m keyboard_sound.bank build keyboard_mapping.json -o sounds/keyboard.bank
+    python -m keyboard_sound.bank build keyboard_mapping.json --rate 48000 --format float32
+    python -m keyboard_sound.bank build keyboard_mapping.json --trim   # 앞 무음과 꼬리를 잘라서 담기
+    python -m keyboard_sound.bank info sounds/keyboard.bank
+"""
+
+import argparse
+import json
+import logging
+import os
+import struct
+
+import numpy as np
+
+from keyboard_sound.cache import DEFAULT_CACHE_DIR, DecodeCache
+from keyboard_sound.formats import SAMPLE_FORMATS, StreamFormat
+from keyboard_sound.mapping import mapping_params, mapping_paths
+from keyboard_sound.mixer import pack_samples
+from keyboard_sound.trim import Trimmer
+
+MAGIC = b'KSBANK\x00\x00'
+VERSION = 2
+HEADER = struct.Struct('<8sII')
+ALIGN = 4096
+DEFAULT_BANK_FILE = os.path.join("sounds", "keyboard.bank")
+
+
+class SoundBank:
+    """메모리 매핑된 사운드 뱅크."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            magic, version, index_len = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f"사운드 뱅크 파일이 아닙니다: {path}")
+            if version != VERSION:
+                raise ValueError(f"지원하지 않는 사운드 뱅크 버전: {version}")
+            index = json.loads(f.read(index_len).decode('utf-8'))
+        self.format = StreamFormat(index['rate'], index['channels'], index['sample_format'])
+        self.rate = self.format.rate
+        self.channels = self.format.channels
+        self.sample_width = self.format.sample_width
+        self.keys = index['keys']
+        self.params = {k: tuple(p) for k, p in index.get('params', {}).items()}
+        self.paths = [s['path'] for s in index['samples']]
+        self.starts = np.array([s['start'] for s in index['samples']], dtype=np.int64)
+        self.lengths = np.array([s['length'] for s in index['samples']], dtype=np.int64)
+        self.peaks = np.array([s['peak'] for s in index['samples']], dtype=np.float32)
+        self.pcm = np.memmap(path, dtype=self.format.dtype.newbyteorder('<'), mode='r',
+                             offset=index['data_offset'],
+                             shape=(index['frames'], self.channels))
+
+    def sample(self, slot):
+        """슬롯의 PCM 을 뱅크 파일에 대한 뷰로 반환합니다 (복사 없음)."""
+        start = self.starts[slot]
+        return self.pcm[start:start + self.lengths[slot]]
+
+    def attach(self, mixer):
+        """믹서가 뱅크의 PCM 영역을 샘플 테이블로 직접 사용하도록 연결합니다."""
+        mixer.set_table(self.pcm, self.starts, self.lengths, self.peaks)
+
+
+def build_bank(mapping, out_path, fmt=None, cache_dir=DEFAULT_CACHE_DIR, trim=None):
+    """
+    {키: 사운드 파일 경로} 매핑으로 뱅크 파일을 만듭니다. 모든 샘플은 fmt 스트림 포맷으로 정규화됩니다.
+    같은 파일을 쓰는 키들은 하나의 샘플 슬롯을 공유하며, 키별 게인/팬은 인덱스에 그대로 기록됩니다.
+    trim(keyboard_sound.trim.Trimmer) 이 있으면 샘플의 앞 무음과 꼬리를 잘라서 담습니다.
+    """
+    fmt = fmt or StreamFormat()
+    params = mapping_params(mapping)
+    mapping = mapping_paths(mapping)
+    cache = DecodeCache(cache_dir, target=fmt, trim=trim)
+    decoded = cache.load(mapping.values())
+    paths = [p for p in dict.fromkeys(mapping.values()) if p in decoded]
+    slot_of = {p: i for i, p in enumerate(paths)}
+    samples = [decoded[p][0] for p in paths]
+    pcm, starts, lengths = pack_samples(samples, fmt.channels, fmt.dtype)
+
+    index = {
+        'rate': fmt.rate,
+        'channels': fmt.channels,
+        'sample_format': fmt.sample_format,
+        'frames': len(pcm),
+        'data_offset': 0,
+        'keys': {k: slot_of[p] for k, p in mapping.items() if p in slot_of},
+        'params': {k: list(p) for k, p in params.items()},
+        'samples': [
+            {'path': p, 'start': int(starts[i]), 'length': int(lengths[i]),
+             'peak': float(np.abs(samples[i].astype(np.float64)).max()) if len(samples[i]) else 0.0}
+            for i, p in enumerate(paths)
+        ],
+    }
+    # data_offset 자릿수가 인덱스 길이에 영향을 주므로 정렬된 오프셋을 충분히 크게 잡습니다
+    body = json.dumps(index, ensure_ascii=False).encode('utf-8')
+    data_offset = -(-(HEADER.size + len(body) + 32) // ALIGN) * ALIGN
+    index['data_offset'] = data_offset
+    body = json.dumps(index, ensure_ascii=False).encode('utf-8')
+
+    tmp = out_path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(body)))
+        f.write(body)
+        f.write(b'\x00' * (data_offset - f.tell()))
+        f.write(np.ascontiguousarray(pcm, dtype=fmt.dtype.newbyteorder('<')).tobytes())
+    os.replace(tmp, out_path)
+    logging.info(f"사운드 뱅크 생성: {out_path} ({len(paths)}개 샘플, {len(index['keys'])}개 키)")
+    if trim is not None:
+        logging.info(trim.summary())
+    return out_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m keyboard_sound.bank", description="사운드 뱅크 도구")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_build = sub.add_parser('build', help="매핑 JSON 으로 뱅크 파일을 만듭니다")
+    p_build.add_argument('mapping', help="키 매핑 JSON 파일 (예: keyboard_mapping.json)")
+    p_build.add_argument('-o', '--output', default=DEFAULT_BANK_FILE)
+    p_build.add_argument('--rate', type=int, default=44100)
+    p_build.add_argument('--channels', type=int, default=2)
+    p_build.add_argument('--format', choices=sorted(SAMPLE_FORMATS), default='int16')
+    p_build.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR)
+    p_build.add_argument('--trim', action='store_true', help="샘플 앞 무음과 들리지 않는 꼬리를 잘라서 담습니다")
+    p_build.add_argument('--onset-db', type=float, default=-30.0, help="가장 큰 구간 대비 onset 레벨 (dB)")
+    p_build.add_argument('--tail-db', type=float, default=-60.0, help="이 레벨(dBFS) 아래의 꼬리를 자릅니다")
+
+    p_info = sub.add_parser('info', help="뱅크 파일 정보를 출력합니다")
+    p_info.add_argument('bank')
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if args.command == 'build':
+        with open(args.mapping, 'r', encoding='utf-8') as f:
+            mapping = json.load(f)
+        trim = Trimmer(args.onset_db, args.tail_db) if args.trim else None
+        build_bank(mapping, args.output, StreamFormat(args.rate, args.channels, args.format), args.cache_dir, trim)
+    else:
+        bank = SoundBank(args.bank)
+        size = len(bank.pcm) * bank.channels * bank.sample_width
+        print(f"{bank.path}: {bank.rate} Hz, {bank.channels}ch, {bank.format.sample_format}, "
+              f"{len(bank.paths)}개 샘플, {len(bank.keys)}개 키, PCM {size / 1024:.1f} KiB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,315 @@
+"""
+믹서 벤치마크. 60 WPM 부터 보이스가 크게 겹치는 2000 WPM 까지의 합성 트레이스를
+오프라인으로 렌더링하고 콜백 시간 백분위수, 데드라인 초과 횟수, 초당 보이스 처리량을 출력합니다.
+오디오 장치가 없는 CI 에서도 실행됩니다.
+
+사용법:
+    python -m keyboard_sound.bench
+    python -m keyboard_sound.bench --bank sounds/keyboard.bank --json bench.json
+    python -m keyboard_sound.bench --handoff    # 락 vs 링 버퍼 트리거 전달 스트레스 테스트 + 콜백 시간 상한 판정
+    python -m keyboard_sound.bench --bus        # 정수 합산+잘라내기 vs float32 버스+리미터
+"""
+
+import argparse
+import json
+import threading
+import time
+
+import numpy as np
+
+from keyboard_sound.metrics import LatencyMonitor
+from keyboard_sound.mixer import BUSES, VoiceMixer
+from keyboard_sound.render import DEFAULT_BLOCK, load_sounds, render, synthetic_trace
+from keyboard_sound.ring import TriggerRing
+
+DEFAULT_WPMS = (60, 120, 300, 600, 1000, 2000)
+DEFAULT_BURST_RATES = (100, 1000, 5000, 20000)
+DEFAULT_QUEUED = (0, 1, 4, 8, 32, 128, 1024)
+DEFAULT_BUS_VOICES = (8, 32, 128)
+
+
+def synthetic_samples(count, rate=44100, channels=2, length_ms=250, seed=0):
+    """지수적으로 감쇠하는 노이즈 버스트(키 클릭 근사)를 count 개 만듭니다."""
+    rng = np.random.default_rng(seed)
+    frames = int(rate * length_ms / 1000)
+    env = np.exp(-np.arange(frames) / (frames / 6.0))
+    samples = []
+    for _ in range(count):
+        noise = rng.standard_normal((frames, channels)) * env[:, None]
+        samples.append((noise / np.abs(noise).max() * 12000).astype(np.int16))
+    return samples
+
+
+def synthetic_sounds(count=40, rate=44100, channels=2, max_voices=32, block=DEFAULT_BLOCK):
+    """합성 샘플로 믹서를 준비하고 (mixer, key_to_slot, rate) 를 반환합니다."""
+    mixer = VoiceMixer(channels, max_voices=max_voices, max_frames=block)
+    slots = mixer.load_samples(synthetic_samples(count, rate, channels))
+    return mixer, {f"k{i}": s for i, s in enumerate(slots)}, rate
+
+
+def run_benchmark(wpms=DEFAULT_WPMS, duration=10.0, block=DEFAULT_BLOCK, max_voices=32,
+                  bank=None, mapping=None, seed=0):
+    """WPM 별로 렌더링하고 결과 딕셔너리 목록을 반환합니다."""
+    results = []
+    for wpm in wpms:
+        if bank or mapping:
+            mixer, key_to_slot, rate = load_sounds(bank, mapping, max_voices, block)
+        else:
+            mixer, key_to_slot, rate = synthetic_sounds(max_voices=max_voices, block=block)
+        trace = synthetic_trace(sorted(key_to_slot), wpm, duration, seed)
+        stats = render(mixer, key_to_slot, trace, rate, block)
+        pct = stats.percentiles()
+        results.append({
+            'wpm': wpm,
+            'events': len(trace),
+            'callbacks': len(stats.callback_ns),
+            'mean_voices': float(stats.voices.mean()),
+            'max_voices': int(stats.voices.max()),
+            'p50_us': pct[50],
+            'p90_us': pct[90],
+            'p99_us': pct[99],
+            'p999_us': pct[99.9],
+            'max_us': float(stats.callback_ns.max()) / 1000.0,
+            'deadline_us': stats.deadline_ns / 1000.0,
+            'deadline_misses': stats.deadline_misses,
+            'voices_per_sec': stats.voices_per_second,
+            'stolen': mixer.stolen,
+        })
+    return results
+
+
+def run_handoff_stress(mode, burst_rate, duration=2.0, burst=32, block=DEFAULT_BLOCK, rate=44100):
+    """
+    실시간 간격으로 도는 소비자(오디오 콜백 흉내)와 burst 개씩 몰아서 트리거하는 생산자(리스너 흉내)를
+    동시에 돌리고 콜백 시간과, 누른 시각부터 그 보이스를 처음 내보내는 콜백 시작까지의 대기(wait)를 측정합니다.
+    mode 는 'lock' (예전 방식) 또는 'ring' 입니다.
+    """
+    mixer, key_to_slot, _ = synthetic_sounds(block=block)
+    slots = list(key_to_slot.values())
+    ring = TriggerRing(1024)
+    lock = threading.Lock()
+    period = block / rate
+    stop = threading.Event()
+    callback_ns = []
+    cpu_ns = []
+    latency = LatencyMonitor(capacity=4096)
+
+    def producer():
+        i = 0
+        gap = burst / burst_rate
+        while not stop.is_set():
+            for _ in range(burst):
+                slot = slots[i % len(slots)]
+                i += 1
+                if mode == 'lock':
+                    with lock:
+                        if mixer.trigger(slot) >= 0:
+                            latency.voice_started(time.perf_counter_ns())
+                else:
+                    ring.push(slot, time.perf_counter_ns())
+            time.sleep(gap)
+
+    def consumer():
+        next_t = time.perf_counter()
+        end = next_t + duration
+        while next_t < end:
+            c0 = time.thread_time_ns()
+            t0 = time.perf_counter_ns()
+            if mode == 'lock':
+                with lock:
+                    mixer.mix(block)
+                    t1 = time.perf_counter_ns()
+                    latency.callback(t0, t1, 0)
+            else:
+                mixer.trigger_pending(ring, latency.voice_started)
+                mixer.mix(block)
+                t1 = time.perf_counter_ns()
+                latency.callback(t0, t1, 0)
+            callback_ns.append(t1 - t0)
+            cpu_ns.append(time.thread_time_ns() - c0)
+            next_t += period
+            delay = next_t - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+    threads = [threading.Thread(target=producer, daemon=True), threading.Thread(target=consumer)]
+    for t in threads:
+        t.start()
+    threads[1].join()
+    stop.set()
+    threads[0].join()
+
+    ns = np.array(callback_ns, dtype=np.int64)
+    cpu = np.array(cpu_ns, dtype=np.int64)
+    return {
+        'mode': mode,
+        'burst_rate': burst_rate,
+        'callbacks': len(ns),
+        'p50_us': float(np.percentile(ns, 50)) / 1000.0,
+        'p99_us': float(np.percentile(ns, 99)) / 1000.0,
+        'max_us': float(ns.max()) / 1000.0,
+        'cpu_p99_us': float(np.percentile(cpu, 99)) / 1000.0,
+        'cpu_max_us': float(cpu.max()) / 1000.0,
+        'deadline_misses': int((ns > period * 1e9).sum()),
+        'wait_p99_us': latency.stages['ring'].percentile(99) / 1000.0,
+        'dropped': ring.dropped,
+    }
+
+
+def run_callback_scaling(queued=DEFAULT_QUEUED, block=DEFAULT_BLOCK, iterations=200, repeats=10, ring_capacity=1024):
+    """
+    생산자 스레드 없이, 블록마다 링에 queued 개가 쌓여 있을 때 링 모드 콜백(trigger_pending + mix)의 시간을 잽니다.
+    풀은 처음부터 가득 차 있어 모든 트리거가 보이스를 뺏습니다. max_voices 개를 넘게 쌓이면 앞쪽은 합쳐지므로
+    콜백 시간이 그 뒤로 늘지 않아야 합니다. 회차마다 모든 queued 를 번갈아 재고, timeit 처럼 백분위수는
+    회차 중 가장 작은 값을 씁니다 (다른 프로세스가 끼어든 회차를 걸러 냅니다).
+    """
+    setups = []
+    for n in queued:
+        mixer, key_to_slot, _ = synthetic_sounds(block=block)
+        slots = list(key_to_slot.values())
+        for i in range(mixer.max_voices):
+            mixer.trigger(slots[i % len(slots)])
+        ring = TriggerRing(ring_capacity)
+        for i in range(ring.capacity):
+            ring.push(slots[i % len(slots)], 0)
+        ring.tail = ring.head
+        setups.append((n, mixer, ring, np.empty((repeats, iterations), dtype=np.int64)))
+    for rep in range(repeats):
+        for n, mixer, ring, ns in setups:
+            for i in range(iterations):
+                # 링 내용은 한 번 채운 것을 재사용하고 head 만 옮깁니다. 블록마다 push 를 수천 번 돌리면
+                # 그 루프가 캐시를 밀어내는 비용까지 콜백 시간에 섞이기 때문입니다
+                ring.head = ring.tail + min(n, ring.capacity)
+                t0 = time.perf_counter_ns()
+                mixer.trigger_pending(ring)
+                mixer.mix(block)
+                ns[rep, i] = time.perf_counter_ns() - t0
+    return [{
+        'queued': n,
+        'max_voices': mixer.max_voices,
+        'p50_us': float(np.percentile(ns, 50, axis=1).min()) / 1000.0,
+        'p99_us': float(np.percentile(ns, 99, axis=1).min()) / 1000.0,
+        'max_us': float(ns.max()) / 1000.0,
+    } for n, mixer, _, ns in setups]
+
+
+def callback_bounded(results, tolerance=1.25):
+    """
+    콜백 시간이 쌓인 이벤트 수에 따라 더 늘지 않는지 판정합니다: max_voices 개 이상 쌓인 경우들의 p99 가
+    처음으로 max_voices 개 이상 쌓인 경우의 p99 의 tolerance 배(스케줄링 잡음 여유)를 넘지 않으면 True.
+    """
+    saturated = [r for r in results if r['queued'] >= r['max_voices']]
+    if len(saturated) < 2:
+        return True
+    return all(r['p99_us'] <= saturated[0]['p99_us'] * tolerance for r in saturated[1:])
+
+
+def run_bus_benchmark(voices=DEFAULT_BUS_VOICES, block=DEFAULT_BLOCK, iterations=2000, channels=2, seed=0):
+    """
+    동시 보이스 수별로 정수 버스(int32 합산 후 잘라내기)와 float32 버스(마스터 게인 + 소프트 니 리미터 +
+    출력 변환 한 번)의 콜백당 믹싱 시간을 잽니다. 보이스는 측정하는 동안 끝나지 않을 만큼 긴 샘플을 재생합니다.
+    """
+    rng = np.random.default_rng(seed)
+    frames = block * (iterations + 2)
+    samples = [(rng.standard_normal((frames, channels)) * 8000).astype(np.int16) for _ in range(8)]
+    results = []
+    for n in voices:
+        for bus in BUSES:
+            mixer = VoiceMixer(channels, max_voices=n, max_frames=block, bus=bus)
+            slots = mixer.load_samples(samples)
+            for i in range(n):
+                mixer.trigger(slots[i % len(slots)], gain=0.5)
+            mixer.mix(block)
+            ns = np.empty(iterations, dtype=np.int64)
+            for i in range(iterations):
+                t0 = time.perf_counter_ns()
+                mixer.mix(block)
+                ns[i] = time.perf_counter_ns() - t0
+            results.append({
+                'bus': bus,
+                'voices': n,
+                'active': mixer.active,
+                'mean_us': float(ns.mean()) / 1000.0,
+                'p50_us': float(np.percentile(ns, 50)) / 1000.0,
+                'p99_us': float(np.percentile(ns, 99)) / 1000.0,
+                'max_us': float(ns.max()) / 1000.0,
+            })
+    return results
+
+
+def print_bus(results):
+    """버스 벤치마크 결과를 표로 출력합니다."""
+    print(f"{'bus':>8} {'voices':>7} {'mean_us':>8} {'p50us':>8} {'p99us':>8} {'maxus':>8}")
+    for r in results:
+        print(f"{r['bus']:>8} {r['voices']:>7} {r['mean_us']:>8.1f} {r['p50_us']:>8.1f} "
+              f"{r['p99_us']:>8.1f} {r['max_us']:>8.1f}")
+
+
+def print_handoff(results, scaling=None):
+    """스트레스 테스트 결과와 (있으면) 쌓인 이벤트 수별 콜백 시간, 상한 판정을 출력합니다."""
+    print(f"{'mode':>5} {'events/s':>9} {'p50us':>8} {'p99us':>8} {'maxus':>8} {'cpu99us':>8} {'cpumaxus':>9} "
+          f"{'miss':>6} {'wait99us':>9} {'dropped':>8}")
+    for r in results:
+        print(f"{r['mode']:>5} {r['burst_rate']:>9} {r['p50_us']:>8.1f} {r['p99_us']:>8.1f} {r['max_us']:>8.1f} "
+              f"{r['cpu_p99_us']:>8.1f} {r['cpu_max_us']:>9.1f} {r['deadline_misses']:>6} "
+              f"{r['wait_p99_us']:>9.1f} {r['dropped']:>8}")
+    print("p50/p99/max/miss = callback wall time, cpu99/cpumax = callback thread CPU time, "
+          "wait99 = press -> start of the callback that first plays the voice")
+    print("ring callbacks start the voices themselves; in lock mode that work runs on the producer thread")
+    if scaling:
+        print()
+        print(f"{'queued':>7} {'p50us':>8} {'p99us':>8} {'maxus':>8}")
+        for r in scaling:
+            print(f"{r['queued']:>7} {r['p50_us']:>8.1f} {r['p99_us']:>8.1f} {r['max_us']:>8.1f}")
+        verdict = "PASS" if callback_bounded(scaling) else "FAIL"
+        print(f"ring callback p99 flat beyond {scaling[0]['max_voices']} queued events (max_voices): {verdict}")
+
+
+def print_results(results):
+    """결과를 표로 출력합니다."""
+    print(f"{'WPM':>6} {'voices':>11} {'p50us':>8} {'p90us':>8} {'p99us':>8} {'p99.9us':>8} "
+          f"{'maxus':>8} {'miss':>6} {'voices/s':>12} {'stolen':>7}")
+    for r in results:
+        print(f"{r['wpm']:>6} {r['mean_voices']:>5.1f}/{r['max_voices']:<5} {r['p50_us']:>8.1f} "
+              f"{r['p90_us']:>8.1f} {r['p99_us']:>8.1f} {r['p999_us']:>8.1f} {r['max_us']:>8.1f} "
+              f"{r['deadline_misses']:>6} {r['voices_per_sec']:>12.0f} {r['stolen']:>7}")
+    if results:
+        print(f"deadline = {results[0]['deadline_us']:.0f}us per callback")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m keyboard_sound.bench", description="믹서 벤치마크")
+    parser.add_argument('--wpm', type=float, nargs='+', default=list(DEFAULT_WPMS))
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--block', type=int, default=DEFAULT_BLOCK)
+    parser.add_argument('--max-voices', type=int, default=32)
+    parser.add_argument('--bank', help="합성 샘플 대신 사용할 사운드 뱅크")
+    parser.add_argument('--mapping', help="합성 샘플 대신 사용할 키 매핑 JSON")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help="결과를 JSON 파일로도 저장")
+    parser.add_argument('--handoff', action='store_true', help="락 vs 링 버퍼 트리거 전달 스트레스 테스트")
+    parser.add_argument('--burst-rate', type=int, nargs='+', default=list(DEFAULT_BURST_RATES))
+    parser.add_argument('--bus', action='store_true', help="정수 버스 vs float32 버스 믹싱 비용 비교")
+    parser.add_argument('--voices', type=int, nargs='+', default=list(DEFAULT_BUS_VOICES))
+    args = parser.parse_args(argv)
+
+    if args.bus:
+        results = run_bus_benchmark(args.voices, args.block)
+        print_bus(results)
+    elif args.handoff:
+        stress = [run_handoff_stress(mode, r, min(args.duration, 2.0), block=args.block)
+                  for r in args.burst_rate for mode in ('lock', 'ring')]
+        scaling = run_callback_scaling(block=args.block)
+        print_handoff(stress, scaling)
+        results = {'stress': stress, 'scaling': scaling, 'bounded': callback_bounded(scaling)}
+    else:
+        results = run_benchmark(args.wpm, args.duration, args.block, args.max_voices,
+                                args.bank, args.mapping, args.seed)
+        print_results(results)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+import hashlib
+import json
+import logging
+import os
+
+import numpy as np
+
+from keyboard_sound.formats import StreamFormat, normalize, pcm_from_bytes
+
+DEFAULT_CACHE_DIR = os.path.join("sounds", ".pcm_cache")
+INDEX_FILE = "index.json"
+
+
+def format_tag(target):
+    """목표 StreamFormat 을 캐시 파일 이름에 쓸 문자열로 바꿉니다."""
+    if target is None:
+        return "native_int16"
+    return target.tag
+
+
+def file_digest(path):
+    """파일 내용의 SHA-1 해시를 계산합니다."""
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def decode_file(path, target=None):
+    """
+    pydub(ffmpeg)으로 파일 하나를 원래 포맷 그대로 디코딩한 뒤 target 스트림 포맷으로 정규화해
+    (frames, channels) 배열과 샘플레이트를 반환합니다. target 이 없으면 원래 샘플레이트/채널의 int16 입니다.
+    프로세스 풀에서 실행될 수 있도록 최상위 함수로 둡니다.
+    """
+    from pydub import AudioSegment
+
+    seg = AudioSegment.from_file(path)
+    pcm = pcm_from_bytes(seg.raw_data, seg.sample_width, seg.channels)
+    fmt = target or StreamFormat(seg.frame_rate, seg.channels, 'int16')
+    return normalize(pcm, seg.frame_rate, fmt), fmt.rate
+
+
+class DecodeCache:
+    """
+    디코딩된 PCM을 디스크에 보관하는 캐시.
+    내용 해시와 목표 포맷으로 .npy 파일 이름을 정하고, 원본의 mtime/크기가 그대로면
+    해시 계산도 건너뜁니다. trim(keyboard_sound.trim.Trimmer) 이 있으면 load() 결과의 앞뒤를 잘라서
+    반환합니다 (캐시에는 잘라내기 전 PCM 을 저장하므로 설정을 바꿔도 다시 디코딩하지 않습니다).
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, target=None, trim=None):
+        self.cache_dir = cache_dir
+        self.target = target
+        self.trim = trim
+        self.tag = format_tag(target)
+        self.index_path = os.path.join(cache_dir, INDEX_FILE)
+        self.index = self._read_index()
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+
+    def _read_index(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            return {'sources': index.get('sources', {}), 'entries': index.get('entries', {})}
+        except (OSError, ValueError):
+            return {'sources': {}, 'entries': {}}
+
+    def _write_index(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp = self.index_path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.index, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, self.index_path)
+
+    def _digest(self, path):
+        """mtime과 크기가 바뀌지 않았다면 기록된 해시를, 아니면 새로 계산한 해시를 반환합니다."""
+        st = os.stat(path)
+        key = os.path.abspath(path)
+        src = self.index['sources'].get(key)
+        if src and src['mtime_ns'] == st.st_mtime_ns and src['size'] == st.st_size:
+            return src['sha1']
+        digest = file_digest(path)
+        self.index['sources'][key] = {'mtime_ns': st.st_mtime_ns, 'size': st.st_size, 'sha1': digest}
+        self._dirty = True
+        return digest
+
+    def _entry_name(self, digest):
+        return f"{digest}-{self.tag}.npy"
+
+    def _lookup(self, digest):
+        name = self._entry_name(digest)
+        entry = self.index['entries'].get(name)
+        if entry is None:
+            return None
+        try:
+            return np.load(os.path.join(self.cache_dir, name)), entry['rate']
+        except (OSError, ValueError):
+            return None
+
+    def _store(self, digest, pcm, rate):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        name = self._entry_name(digest)
+        tmp = os.path.join(self.cache_dir, name + '.tmp')
+        with open(tmp, 'wb') as f:
+            np.save(f, pcm)
+        os.replace(tmp, os.path.join(self.cache_dir, name))
+        self.index['entries'][name] = {'rate': rate}
+        self._dirty = True
+
+    def load(self, paths, workers=None, executor='process', progress=None):
+        """
+        경로 목록을 디코딩해 {경로: (pcm, rate)} 딕셔너리를 반환합니다.
+        같은 파일은 한 번만 디코딩하며, 캐시 미스는 풀에서 병렬로 디코딩합니다.
+        디코딩에 실패한 경로는 결과에서 빠집니다.
+        progress 가 있으면 경로 하나가 처리될 때마다 (처리한 수, 전체 수) 로 호출합니다.
+        """
+        paths = list(dict.fromkeys(paths))
+        total = len(paths)
+        done = 0
+        result = {}
+        missing = {}
+        for path in paths:
+            try:
+                digest = self._digest(path)
+            except OSError as e:
+                logging.error(f"Failed to read sound file {path}: {e}")
+                digest = None
+            cached = self._lookup(digest) if digest is not None else None
+            if cached is not None:
+                self.hits += 1
+                result[path] = cached
+            elif digest is not None:
+                missing.setdefault(digest, []).append(path)
+                continue
+            done += 1
+            if progress is not None:
+                progress(done, total)
+
+        if missing:
+            # 캐시가 모두 맞으면 풀(과 multiprocessing)을 불러오지 않습니다
+            import concurrent.futures
+
+            self.misses += len(missing)
+            pool_cls = (concurrent.futures.ProcessPoolExecutor if executor == 'process'
+                        else concurrent.futures.ThreadPoolExecutor)
+            with pool_cls(max_workers=workers) as pool:
+                futures = {pool.submit(decode_file, group[0], self.target): digest
+                           for digest, group in missing.items()}
+                for fut in concurrent.futures.as_completed(futures):
+                    digest = futures[fut]
+                    done += len(missing[digest])
+                    try:
+                        pcm, rate = fut.result()
+                    except Exception as e:
+                        logging.error(f"Failed to decode {missing[digest][0]}: {e}")
+                    else:
+                        self._store(digest, pcm, rate)
+                        for path in missing[digest]:
+                            result[path] = (pcm, rate)
+                    if progress is not None:
+                        progress(done, total)
+
+        if self._dirty:
+            self._write_index()
+            self._dirty = False
+        if self.trim is not None:
+            self._trim(result)
+        return result
+
+    def _trim(self, result):
+        """같은 내용을 공유하는 경로들은 한 번만 잘라냅니다."""
+        trimmed = {}
+        for path, (pcm, rate) in result.items():
+            first = trimmed.get(id(pcm))
+            if first is None:
+                trimmed[id(pcm)] = first = (path, self.trim(pcm, rate, path))
+            else:
+                self.trim.results[path] = self.trim.results[first[0]]
+            result[path] = (first[1], rate)
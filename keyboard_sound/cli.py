@@ -0,0 +1,346 @@
+"""
+키보드 사운드 실행 진입점.
+
+모듈을 import 해도 아무 일도 일어나지 않고, run() 을 호출해야 로깅 설정, 사운드 적재, 스트림 열기,
+키보드 리스너 시작이 차례로 실행됩니다. numpy/pyaudio/pynput 처럼 무거운 모듈은 run() 안에서 필요할 때
+import 하며, pydub(ffmpeg) 은 디코드 캐시에 없는 파일을 디코딩할 때만 불립니다.
+시작 단계(import, 사운드 적재, 스트림 열기, 리스너 준비)별 소요 시간은 로그로 남깁니다.
+
+사용법:
+    keyboard-sound [--output null] [--rate 48000] [--block 128] ...   # pip install . 후
+    python -m keyboard_sound ...
+    python main.py ...
+    keyboard-sound --listen-socket      # 다른 프론트엔드의 키 이벤트도 소켓으로 받습니다
+    keyboard-sound --connect            # 엔진 없이 키 입력만 실행 중인 엔진으로 보냅니다
+"""
+
+import argparse
+import json
+import logging
+import os
+import time
+
+from keyboard_sound.eventlog import (KIND_PRESS, KIND_RELEASE, LOG_FORMAT, BinaryEventLog, event_logger,
+                                     setup_logging)
+from keyboard_sound.metrics import StartupTimer
+from keyboard_sound.output import add_output_arguments, output_from_args
+
+# 믹서 설정: 최대 동시 발음 수와 보이스 스틸링 정책 ('oldest' 또는 'quietest')
+MAX_VOICES = 32
+STEAL_POLICY = 'oldest'
+TRIGGER_RING_SIZE = 1024  # 콜백 사이에 쌓일 수 있는 최대 트리거 수 (2의 거듭제곱)
+
+# 출력 스트림 포맷: 매핑의 모든 샘플은 로드할 때 한 번 이 포맷(샘플레이트, 채널, 'int16'/'int32'/'float32')으로
+# 변환되므로, 48kHz/44.1kHz 나 모노/스테레오가 섞인 팩도 올바른 피치와 채널로 재생됩니다
+OUTPUT_RATE = 44100
+OUTPUT_CHANNELS = 2
+OUTPUT_SAMPLE_FORMAT = 'int16'
+BLOCK_SIZE = 64  # 콜백당 프레임 수 (작을수록 지연이 짧습니다)
+# 출력 백엔드, 샘플레이트, 블록 크기, 장치는 명령줄에서 바꿀 수 있습니다. 예:
+#   keyboard-sound --output blocking --device "USB" --rate 48000 --block 128
+#   keyboard-sound --output null                      # 오디오 장치 없이 실행
+#   keyboard-sound --output-file session.wav          # 들리는 소리를 파일로 기록
+#   keyboard-sound --autotune                         # 블록 크기 자동 조정
+#   keyboard-sound --process                          # 믹서와 출력 스트림을 별도 프로세스에서 실행
+
+# 별도 프로세스 엔진: 믹서와 출력 스트림을 자식 프로세스에서 돌려 리스너/로깅 스레드의 GIL 경합과 GC 멈춤이
+# 오디오 콜백을 늦추지 않게 합니다. 키 입력은 공유 메모리 링으로, 샘플은 공유 메모리로 넘깁니다
+# (python -m keyboard_sound.procengine 으로 단일 프로세스와 콜백 지터 비교)
+ENGINE_PROCESS = False
+
+# 블록 크기 자동 조정: 후보를 작은 것부터 올라가며 데드라인 미스(언더런 또는 콜백 시간이 블록 주기의
+# 80% 초과) 비율이 목표 이하인 가장 작은 크기에 정착하고, 장치별로 sounds/.block_tuning.json 에 저장합니다
+AUTOTUNE_BLOCK = False
+BLOCK_CANDIDATES = (32, 64, 128, 256, 512)
+DEADLINE_MISS_TARGET = 0.001
+
+# 믹싱 버스: 'float32' 는 float 로 합산해 마스터 게인과 소프트 니 리미터를 거친 뒤 한 번만 출력 포맷으로
+# 바꿉니다 ('int' 는 정수 합산 후 잘라내는 이전 방식). 키별 게인/팬은 매핑 JSON 에서
+# "space": {"path": "sounds/space.mp3", "gain": 0.8, "pan": -0.3} 처럼 지정합니다
+MIX_BUS = 'float32'
+MASTER_GAIN = 1.0
+LIMITER_THRESHOLD = 0.8  # 이 레벨부터 부드럽게 눌러 1.0 을 넘지 않게 합니다 (None 이면 잘라내기)
+
+# 입력 정책: 키를 누르고 있을 때 OS 오토 리피트가 보이스를 계속 쌓지 않도록 합니다
+REPEAT_POLICY = 'ignore'     # 'ignore' | 'sample' (매핑의 "<키>:repeat" 샘플 재생) | 'allow'
+MIN_RETRIGGER_MS = 0         # 같은 키 재트리거 최소 간격 (ms)
+KEY_RETRIGGER_MS = {}        # 키별 최소 간격, 예: {'space': 40}
+CHOKE_GROUPS = []            # 새 트리거가 같은 그룹의 이전 보이스를 끊습니다, 예: [['space'], ['enter', 'backspace']]
+MAX_TRIGGERS_PER_SECOND = None  # 전체 트리거 수 제한 (None 이면 제한 없음)
+
+# 소켓 입력: 엔진 하나가 Unix 도메인 소켓으로도 키 이벤트를 받아, GUI 나 트레이스 재생기 같은 다른 프론트엔드가
+# 같은 엔진과 오디오 장치를 쓸 수 있게 합니다 (--listen-socket, 클라이언트는 --connect). None 이면 받지 않습니다
+INPUT_SOCKET = None  # 예: "/tmp/keyboard-sound.sock"
+
+# 키 매핑 파일 (-t: 테스트용). 실행 중 이 파일이나 참조하는 사운드 파일이 바뀌면
+# 바뀐 항목만 백그라운드에서 다시 디코딩해 끊김 없이 교체합니다
+MAPPING_FILE = "keyboard_mapping_t.json"
+HOT_RELOAD_INTERVAL = 1.0  # 초, None 이면 감시하지 않습니다
+
+# 사운드 뱅크 파일이 있으면 메모리 매핑해서 사용하고, 없으면 매핑 JSON의 파일들을 디코딩합니다.
+# 뱅크 만들기: python -m keyboard_sound.bank build keyboard_mapping_t.json -o sounds/keyboard.bank
+SOUND_BANK = "sounds/keyboard.bank"
+
+# 레이어가 많거나 긴 샘플로 된 큰 팩은 메모리 예산(MB)을 정해 LRU 로 올려 둘 수 있습니다.
+# 최근 타이핑의 키 빈도/바이그램으로 다음 키를 미리 적재하며, 아직 올라오지 않은 키는
+# 그 입력만 소리 없이 넘어가고 백그라운드에서 적재됩니다. None 이면 전부 미리 적재합니다(핫 리로드 사용).
+SOUND_MEMORY_BUDGET_MB = None
+
+# 샘플 앞의 인코더 패딩/무음과 거의 들리지 않는 꼬리를 로드할 때 잘라냅니다. 앞을 자른 만큼 키 입력 -> 소리
+# 지연이 줄고, 꼬리를 자른 만큼 보이스가 일찍 끝나 믹싱 부담과 메모리가 줄어듭니다 (사운드 뱅크는 build --trim)
+TRIM_SAMPLES = True
+TRIM_ONSET_DB = -30.0   # 가장 큰 구간보다 이만큼 낮은 레벨을 처음 넘는 곳을 소리의 시작으로 봅니다
+TRIM_TAIL_DB = -60.0    # 이 레벨(dBFS) 아래로 떨어진 뒤의 꼬리를 자릅니다
+TRIM_FADE_MS = 5.0      # 자른 끝의 페이드 아웃 길이
+
+# 키 입력 -> 출력 지연 계측 (히스토그램 기록만 하므로 켜 두어도 부담이 적습니다)
+LATENCY_METRICS = True
+LATENCY_REPORT_INTERVAL = 60  # 초, None 이면 주기 보고를 하지 않습니다
+
+# 로깅 설정: 파일과 콘솔 모두에 로그를 남기되, 출력은 백그라운드 스레드에서 처리합니다
+LOG_FILE = "./logs/keyboard_events.log"
+LOG_LEVELS = {'press': logging.INFO, 'release': logging.INFO, 'queue': logging.INFO, 'unmapped': logging.INFO}
+LOG_MAX_PER_KEY_PER_SECOND = 10  # 키별 초당 최대 로그 수 (None 이면 제한 없음)
+LOG_SAMPLE_EVERY = 1             # 키별 N개 중 1개만 기록
+EVENT_LOG_FILE = None            # 예: "./logs/keyboard_events.kev" (render.py 로 재생 가능)
+
+
+def load_key_mapping(json_file=MAPPING_FILE):
+    """JSON 파일에서 키보드 매핑 데이터를 로드합니다."""
+    try:
+        if os.path.exists(json_file):
+            with open(json_file, 'r', encoding='utf-8') as f:
+                mapping = json.load(f)
+                logging.info(f"키 매핑 로드 성공: {len(mapping)}개 매핑")
+                return mapping
+        else:
+            logging.error(f"매핑 파일을 찾을 수 없음: {json_file}")
+            return {}
+    except Exception as e:
+        logging.error(f"키 매핑 로드 실패: {e}")
+        return {}
+
+
+def key_name(key):
+    """pynput 키 객체를 매핑 JSON에서 쓰는 이름으로 바꿉니다. 등록되지 않은 키의 로그에만 씁니다."""
+    try:
+        return key.char  # 알파벳, 숫자 등 일반 키
+    except AttributeError:
+        # 특수 키를 문자열로 변환 (Key.space -> 'space')
+        return str(key).replace('Key.', '')
+
+
+def build_parser():
+    from keyboard_sound.sockinput import DEFAULT_SOCKET_PATH
+
+    parser = argparse.ArgumentParser(prog="keyboard-sound", description="키보드 사운드")
+    add_output_arguments(parser, rate=OUTPUT_RATE, block=BLOCK_SIZE)
+    group = parser.add_argument_group("소켓 입력")
+    group.add_argument('--listen-socket', nargs='?', const=DEFAULT_SOCKET_PATH, default=INPUT_SOCKET, metavar='PATH',
+                       help=f"다른 프론트엔드의 키 이벤트도 이 소켓으로 받습니다 (기본 {DEFAULT_SOCKET_PATH})")
+    group.add_argument('--connect', nargs='?', const=DEFAULT_SOCKET_PATH, metavar='PATH',
+                       help="엔진을 띄우지 않고 키 입력을 실행 중인 엔진의 소켓으로 보냅니다")
+    return parser
+
+
+def create_engine(args, latency=None):
+    """설정에 따라 사운드 뱅크, 메모리 예산, 매핑 디코딩 중 하나로 사운드를 적재한 엔진을 만듭니다."""
+    from keyboard_sound.autotune import BlockTuner
+    from keyboard_sound.engine import SoundEngine
+    from keyboard_sound.formats import StreamFormat
+    from keyboard_sound.policy import InputPolicy
+    from keyboard_sound.procengine import ProcessEngine
+    from keyboard_sound.trim import Trimmer
+
+    fmt = StreamFormat(args.rate, OUTPUT_CHANNELS, OUTPUT_SAMPLE_FORMAT)
+    autotune = None
+    if AUTOTUNE_BLOCK or args.autotune:
+        autotune = BlockTuner(BLOCK_CANDIDATES, target_miss=DEADLINE_MISS_TARGET)
+    policy = InputPolicy(repeat=REPEAT_POLICY, min_interval_ms=MIN_RETRIGGER_MS, key_interval_ms=KEY_RETRIGGER_MS,
+                         choke_groups=CHOKE_GROUPS, max_rate=MAX_TRIGGERS_PER_SECOND)
+    trim = Trimmer(TRIM_ONSET_DB, TRIM_TAIL_DB, fade_ms=TRIM_FADE_MS) if TRIM_SAMPLES else None
+    block = args.block or (None if autotune is not None else BLOCK_SIZE)
+    engine_options = dict(max_voices=MAX_VOICES, block=block, steal_policy=STEAL_POLICY,
+                          ring_size=TRIGGER_RING_SIZE, latency=latency, policy=policy,
+                          bus=MIX_BUS, master_gain=MASTER_GAIN, limiter_threshold=LIMITER_THRESHOLD,
+                          autotune=autotune)
+    engine_cls = ProcessEngine if ENGINE_PROCESS or args.process else SoundEngine
+    if engine_cls is ProcessEngine and SOUND_MEMORY_BUDGET_MB and not os.path.exists(SOUND_BANK):
+        logging.warning("메모리 예산 모드는 별도 프로세스 엔진에서 지원하지 않아 단일 프로세스로 실행합니다")
+        engine_cls = SoundEngine
+
+    if os.path.exists(SOUND_BANK):
+        # 사운드 뱅크를 메모리 매핑해 복사 없이 믹싱합니다 (뱅크는 만들 때 정한 포맷으로 정규화되어 있습니다)
+        engine = engine_cls.from_bank(SOUND_BANK, **engine_options)
+        logging.info(f"Loaded sound bank {SOUND_BANK}: {len(engine.key_to_slot)} keys, {engine.format}")
+        if engine.format.rate != args.rate:
+            logging.warning(f"사운드 뱅크는 {engine.format.rate} Hz 로 만들어져 있어 --rate {args.rate} 를 무시합니다")
+        return engine, 'bank'
+    engine_options['trim'] = trim
+
+    key_to_mp3 = load_key_mapping()
+    if SOUND_MEMORY_BUDGET_MB:
+        engine = SoundEngine(fmt, **engine_options)
+        engine.use_budget(key_to_mp3, int(SOUND_MEMORY_BUDGET_MB * 1024 * 1024))
+        logging.info(f"Sound bank with {SOUND_MEMORY_BUDGET_MB} MB budget: {len(engine.key_to_slot)} keys")
+        return engine, 'budget'
+
+    # 디코딩 결과는 디스크 캐시에 저장되어 다음 실행부터는 디코딩을 건너뜁니다.
+    # 캐시 미스만 프로세스 풀에서 병렬로 디코딩합니다 (이 모듈은 import 할 때 아무것도 실행하지 않으므로
+    # spawn 방식 자식 프로세스가 이 모듈을 다시 import 해도 안전합니다)
+    engine = engine_cls(fmt, mapping_file=MAPPING_FILE, executor='process', **engine_options)
+    engine.load(key_to_mp3)
+    cache = engine.reloader.cache
+    logging.info(f"Preloaded audio for {len(engine.key_to_slot)}/{len(key_to_mp3)} keys "
+                 f"(decode cache: {cache.hits} hits, {cache.misses} misses)")
+    if trim is not None:
+        from keyboard_sound.mapping import mapping_paths
+
+        # 키별로 줄어든 지연과 메모리를 요약과 함께 한 덩어리로 남깁니다
+        logging.info('\n'.join([trim.summary()] + trim.table(mapping_paths(key_to_mp3))))
+    return engine, 'cache' if not cache.misses else 'decode'
+
+
+def run_client(args):
+    """키 입력을 --connect 로 지정한 엔진의 소켓으로 보냅니다. Esc 를 누르면 반환합니다."""
+    from pynput.keyboard import Key, Listener
+
+    from keyboard_sound.sockinput import SocketClient
+
+    logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)
+    client = SocketClient(args.connect)
+    logging.info(f"Connected to {args.connect}: {len(client.index)} keys")
+
+    def on_press(key):
+        # 대화형 입력은 모으지 않고 바로 보냅니다
+        if client.press(key_name(key), time.perf_counter_ns()):
+            client.flush()
+
+    def on_release(key):
+        if client.release(key_name(key)):
+            client.flush()
+        if key is Key.esc:
+            return False
+
+    try:
+        with Listener(on_press=on_press, on_release=on_release) as listener:
+            listener.join()
+    finally:
+        client.close()
+        logging.info(f"sent {client.sent} events in {client.packets} datagrams")
+
+
+def run(argv=None):
+    """키보드 사운드를 실행합니다. Esc 를 누르면 정리하고 반환합니다."""
+    startup = StartupTimer()
+    args = build_parser().parse_args(argv)
+    if args.connect:
+        return run_client(args)
+
+    setup_logging(LOG_FILE, levels=LOG_LEVELS, max_per_second=LOG_MAX_PER_KEY_PER_SECOND,
+                  sample_every=LOG_SAMPLE_EVERY)
+    press_log = event_logger('press')
+    release_log = event_logger('release')
+    queue_log = event_logger('queue')
+    unmapped_log = event_logger('unmapped')
+    event_log = BinaryEventLog(EVENT_LOG_FILE) if EVENT_LOG_FILE else None
+
+    # numpy 를 쓰는 엔진 모듈들 (pydub 은 캐시 미스 디코딩에서만, pyaudio 는 스트림을 열 때 import 됩니다)
+    import keyboard_sound.engine  # noqa: F401
+    from keyboard_sound.procengine import ProcessEngine
+    from keyboard_sound.metrics import LatencyMonitor, install_reporting
+    startup.mark('import')
+
+    latency = LatencyMonitor() if LATENCY_METRICS else None
+    engine, source = create_engine(args, latency)
+    startup.mark(f'load ({source})')
+    if latency is not None:
+        # 지연 계측: 종료 시, SIGUSR1 수신 시, LATENCY_REPORT_INTERVAL 초마다 요약을 로그로 남깁니다.
+        # 프로세스 엔진은 자식 프로세스에서 계측하므로 보고 직전에 통계를 받아 옵니다
+        refresh = engine.refresh_stats if isinstance(engine, ProcessEngine) else None
+        install_reporting(latency, interval=LATENCY_REPORT_INTERVAL, refresh=refresh)
+
+    engine.start(watch_interval=HOT_RELOAD_INTERVAL, output=output_from_args(args))
+    logging.info(f"Audio output: {engine.output.name}, {engine.format}, {engine.block} frames per block"
+                 f"{' (autotune)' if engine.autotune is not None else ''}"
+                 f"{' (engine process)' if isinstance(engine, ProcessEngine) else ''}")
+    socket_input = None
+    if args.listen_socket:
+        from keyboard_sound.sockinput import SocketInput
+
+        socket_input = SocketInput(engine, args.listen_socket)
+        socket_input.start()
+    startup.mark('stream')
+
+    from pynput.keyboard import Key, Listener
+
+    def on_press(key):
+        """
+        키가 눌렸을 때 호출되는 콜백 함수.
+        매핑된 키인 경우 해당 mp3 파일을 재생합니다.
+        """
+        try:
+            t_press = time.perf_counter_ns()
+            # 컴파일된 디스패치 테이블로 키 객체에서 바로 정수 키 번호를 찾습니다 (문자열 변환 없음)
+            kid = engine.key_index(key)
+
+            # 로깅보다 먼저 트리거를 넘겨 오디오 스레드가 바로 볼 수 있게 합니다
+            played = kid >= 0 and engine.press(kid, t_press)
+
+            k = engine.keymap.names[kid] if kid >= 0 else key_name(key)
+            if event_log is not None:
+                event_log.record(KIND_PRESS, k, t_press)
+            press_log.info("Key pressed: %s", k, extra={'key': k})
+
+            if played:
+                queue_log.info("Queueing preloaded audio for key: %s", k, extra={'key': k})
+            elif kid >= 0 and engine.keymap.slots[kid] >= 0:
+                queue_log.debug("Trigger suppressed by input policy for key: %s", k, extra={'key': k})
+            else:
+                unmapped_log.info("No audio mapping for key: %s", k, extra={'key': k})
+        except Exception:
+            # 콜백에서 예외가 나가면 pynput 리스너가 멈추므로 기록만 하고 다음 키를 계속 받습니다
+            logging.exception("키 입력 처리 실패: %r", key)
+
+    def on_release(key):
+        """
+        키가 릴리즈될 때 호출되는 콜백 함수.
+        Esc 키를 누르면 리스너를 종료합니다.
+        """
+        try:
+            kid = engine.key_index(key)
+            if kid >= 0:
+                engine.release(kid)
+            k = engine.keymap.names[kid] if kid >= 0 else key_name(key)
+            if event_log is not None:
+                event_log.record(KIND_RELEASE, k)
+            release_log.info("Key released: %s", k, extra={'key': k})
+        except Exception:
+            # on_press 와 같이 예외로 리스너가 멈추지 않게 하되, Esc 종료는 그대로 처리합니다
+            logging.exception("키 릴리즈 처리 실패: %r", key)
+        if key is Key.esc:
+            return False  # 리스너 종료
+
+    # 키보드 이벤트 리스너 시작
+    try:
+        with Listener(on_press=on_press, on_release=on_release) as listener:
+            listener.wait()
+            startup.mark('listener')
+            logging.info(startup.summary())
+            listener.join()
+    finally:
+        # 프로그램 종료 후 자원 정리
+        if socket_input is not None:
+            socket_input.stop()
+            logging.info(socket_input.summary())
+        engine.close()
+        if event_log is not None:
+            event_log.close()
+
+
+def main():
+    run()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,303 @@
+"""
+CLI(main.py)와 GUI(app/keyboard_gui.py)가 함께 쓰는 저지연 재생 엔진.
+
+VoiceMixer, 트리거 링, 출력 백엔드(keyboard_sound.output)를 하나로 묶습니다. 키 리스너는 play() 로 슬롯을
+링에 넣기만 하고, 디코딩과 샘플 테이블 교체는 호출한 스레드나 백그라운드 로더 스레드에서
+처리합니다. 재생 중에 적재한 샘플은 믹서가 블록 사이에서 교체하므로 스트림이 끊기지 않습니다.
+"""
+
+import logging
+import queue
+import threading
+import time
+
+from keyboard_sound.autotune import TuningThread
+from keyboard_sound.cache import DecodeCache
+from keyboard_sound.formats import StreamFormat
+from keyboard_sound.keymap import KeyTable
+from keyboard_sound.mapping import mapping_params, mapping_paths
+from keyboard_sound.mixer import VoiceMixer
+from keyboard_sound.output import PyAudioCallbackOutput
+from keyboard_sound.reload import HotReloader
+from keyboard_sound.ring import TriggerRing
+
+DEFAULT_BLOCK = 64
+
+class SoundEngine:
+    """매핑(또는 사운드 뱅크)의 샘플을 들고 키 입력을 받아 소리를 내는 엔진."""
+
+    def __init__(self, fmt=None, max_voices=32, block=None, steal_policy='oldest', ring_size=1024,
+                 mapping_file=None, cache=None, executor='thread', latency=None, policy=None, aliases=None,
+                 bus='float32', master_gain=1.0, limiter_threshold=0.8, autotune=None, trim=None, jitter=None):
+        self.format = fmt or StreamFormat()
+        if block is None:
+            # 자동 조정은 (저장된 크기가 없으면) 가장 작은 후보부터 올라갑니다
+            block = autotune.candidates[0] if autotune is not None else DEFAULT_BLOCK
+        self.block = block
+        # 자동 조정 중에 블록이 커져도 오디오 스레드에서 버퍼를 다시 할당하지 않도록 가장 큰 후보만큼 잡아 둡니다
+        self.autotune = autotune
+        max_frames = max(block, autotune.max_block) if autotune is not None else block
+        self.mixer_options = dict(max_voices=max_voices, steal_policy=steal_policy, bus=bus,
+                                  master_gain=master_gain, limiter_threshold=limiter_threshold)
+        self.mixer = self._create_mixer(max_frames)
+        self.ring = self._create_ring(ring_size)
+        self.latency = latency
+        # jitter(keyboard_sound.metrics.JitterMeter) 가 있으면 콜백 시작 간격의 흔들림을 기록합니다
+        self.jitter = jitter
+        self.policy = policy
+        # trim(keyboard_sound.trim.Trimmer) 이 있으면 디코딩한 샘플의 앞 무음과 들리지 않는 꼬리를 잘라 적재합니다
+        self.trim = trim
+        if cache is None and trim is not None:
+            cache = DecodeCache(target=self.format, trim=trim)
+        # 매핑 모드에서는 HotReloader 가 샘플 테이블과 key_to_slot 을 관리합니다
+        self.reloader = HotReloader(self.mixer, mapping_file, self.format, cache=cache, executor=executor)
+        self.lru_bank = None
+        self._key_to_slot = {}
+        self._key_params = {}
+        # key_to_slot 이 바뀌면 리스너 스레드가 다음 키 입력에서 다시 컴파일합니다
+        self.keymap = KeyTable(aliases)
+        self._compiled = None
+        # 리스너 스레드와 소켓 입력 스레드가 동시에 다시 컴파일하거나 이름을 등록하지 않게 합니다
+        self._keymap_lock = threading.Lock()
+        # 키 리스너와 소켓 입력(keyboard_sound.sockinput)처럼 입력 스레드가 여럿이어도 입력 정책과 링(단일 생산자)에
+        # 한 번에 한 스레드만 들어가게 합니다. 오디오 스레드는 이 락을 잡지 않습니다
+        self._input_lock = threading.Lock()
+
+        self.output = None
+        self._tuning = None
+        self._jobs = queue.SimpleQueue()
+        self._loader = None
+        # 제출 수는 제출한 스레드만, 완료 수는 로더 스레드만 올립니다
+        self._submitted = 0
+        self._finished = 0
+
+    def _create_mixer(self, max_frames):
+        return VoiceMixer(self.format.channels, max_frames=max_frames, sample_format=self.format.sample_format,
+                          **self.mixer_options)
+
+    def _create_ring(self, capacity):
+        return TriggerRing(capacity)
+
+    @classmethod
+    def from_bank(cls, path, **kwargs):
+        """사운드 뱅크 파일을 메모리 매핑해 복사 없이 믹싱하는 엔진을 만듭니다 (포맷은 뱅크를 따릅니다)."""
+        from keyboard_sound.bank import SoundBank
+
+        bank = SoundBank(path)
+        engine = cls(bank.format, **kwargs)
+        bank.attach(engine.mixer)
+        engine.reloader = None
+        engine._key_to_slot = dict(bank.keys)
+        engine._key_params = bank.params
+        return engine
+
+    def use_budget(self, mapping, budget_bytes, **kwargs):
+        """메모리 예산 안에서 LRU 로 샘플을 올려 두는 모드로 전환합니다 (keyboard_sound.lrubank)."""
+        from keyboard_sound.lrubank import BudgetedSoundBank
+
+        if self.trim is not None:
+            kwargs.setdefault('cache', DecodeCache(target=self.format, trim=self.trim))
+        # 같은 파일을 쓰는 키들은 한 슬롯을 공유합니다
+        self._key_params = mapping_params(mapping)
+        mapping = mapping_paths(mapping)
+        paths = list(dict.fromkeys(mapping.values()))
+        self.lru_bank = BudgetedSoundBank(self.mixer, {p: p for p in paths}, self.format, budget_bytes, **kwargs)
+        self.reloader = None
+        self._key_to_slot = {k: self.lru_bank.name_to_slot[p] for k, p in mapping.items()}
+        self.lru_bank.start()
+        self.lru_bank.warm()
+        return self.lru_bank
+
+    @property
+    def key_to_slot(self):
+        if self.reloader is not None:
+            return self.reloader.key_to_slot
+        return self._key_to_slot
+
+    @property
+    def key_params(self):
+        """게인/팬이 지정된 키들의 {키 이름: (gain, pan)}."""
+        if self.reloader is not None:
+            return self.reloader.key_params
+        return self._key_params
+
+    @property
+    def busy(self):
+        """백그라운드 로더에 처리 중이거나 대기 중인 작업이 있으면 True."""
+        return self._submitted != self._finished
+
+    def load(self, mapping, progress=None):
+        """
+        매핑의 사운드를 디코딩해 적재하고 key_to_slot 을 반환합니다. 스트림을 시작하기 전에는 한 번에
+        적재하고, 재생 중에는 처음 보거나 바뀐 파일만 디코딩해 블록 사이에서 교체합니다.
+        progress 는 DecodeCache.load 와 같이 (처리한 수, 전체 수) 로 호출됩니다.
+        """
+        if self.output is None and not self.reloader.key_to_slot:
+            return self.reloader.load(mapping, progress)
+        self.reloader.update(mapping, progress)
+        return self.reloader.key_to_slot
+
+    def load_async(self, mapping, progress=None, done=None):
+        """load() 를 백그라운드 로더 스레드에서 실행합니다. done 은 그 스레드에서 결과로 호출됩니다."""
+        self.submit(self.load, dict(mapping), progress=progress, done=done)
+
+    def submit(self, fn, *args, done=None, **kwargs):
+        """로더 스레드에 작업을 넣습니다. 작업은 넣은 순서대로 하나씩 실행됩니다."""
+        if self._loader is None:
+            self._loader = threading.Thread(target=self._run_jobs, name="sound-loader", daemon=True)
+            self._loader.start()
+        self._submitted += 1
+        self._jobs.put((fn, args, kwargs, done))
+
+    def _run_jobs(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            fn, args, kwargs, done = job
+            try:
+                result = fn(*args, **kwargs)
+                if done is not None:
+                    done(result)
+            except Exception as e:
+                logging.error(f"사운드 로드 작업 실패: {e}")
+            finally:
+                self._finished += 1
+
+    def register_keys(self, names):
+        """매핑에 없어도 key_index() 로 찾을 키 이름들을 등록합니다 (예: GUI 의 모든 키 버튼)."""
+        with self._keymap_lock:
+            self.keymap.register(names)
+            self._compiled = None
+
+    def _compile_keymap(self):
+        key_to_slot = self.key_to_slot
+        self.keymap.compile(key_to_slot, self.key_params)
+        self.mixer.set_key_gains(self.keymap.params)
+        if self.policy is not None:
+            self.policy.bind(self.keymap)
+        self._compiled = key_to_slot
+
+    def refresh_keymap(self):
+        """key_to_slot 이 바뀌었으면 디스패치 테이블을 다시 컴파일하고 KeyTable 을 반환합니다."""
+        if self.key_to_slot is not self._compiled:
+            with self._keymap_lock:
+                # 기다리는 동안 다른 입력 스레드가 이미 컴파일했을 수 있으므로 다시 확인합니다
+                if self.key_to_slot is not self._compiled:
+                    self._compile_keymap()
+        return self.keymap
+
+    def key_index(self, key):
+        """pynput 키 객체를 정수 키 번호로 바꿉니다. 등록되지 않은 키는 -1 입니다."""
+        return self.refresh_keymap().index(key)
+
+    def _trigger(self, slot, t_ns, group, kid):
+        self.ring.push(slot, t_ns, group, kid)
+        if self.lru_bank is not None:
+            self.lru_bank.on_key(slot)
+
+    def play(self, key, t_ns=None, group=0):
+        """키 이름에 매핑된 샘플을 정책을 거치지 않고 재생합니다. 매핑된 키면 True 를 반환합니다."""
+        slot = self.key_to_slot.get(key)
+        if slot is None:
+            return False
+        with self._input_lock:
+            self._trigger(slot, t_ns if t_ns is not None else time.perf_counter_ns(), group, self.keymap.id_of(key))
+        return True
+
+    def press(self, kid, t_ns=None):
+        """
+        키 번호 kid 의 누름을 입력 정책에 통과시킨 뒤 재생합니다. 트리거했으면 True 를 반환합니다.
+        리피트 샘플이 매핑되어 있지 않으면 원래 키의 샘플을 재생합니다.
+        """
+        keymap = self.keymap
+        slot = keymap.slots[kid]
+        if slot < 0:
+            return False
+        if t_ns is None:
+            t_ns = time.perf_counter_ns()
+        group = 0
+        policy = self.policy
+        with self._input_lock:
+            if policy is not None:
+                group = policy.press(kid, t_ns)
+                if group < 0:
+                    return False
+                if policy.repeating and keymap.repeat_slots[kid] >= 0:
+                    slot = keymap.repeat_slots[kid]
+                    policy.repeat_samples += 1
+            self._trigger(slot, t_ns, group, kid)
+        return True
+
+    def release(self, kid):
+        if self.policy is not None:
+            with self._input_lock:
+                self.policy.release(kid)
+
+    def render(self, frame_count, status=0, time_info=None):
+        """
+        출력 백엔드가 블록마다 호출합니다. 링에 쌓인 트리거를 보이스로 시작하고 frame_count 프레임을
+        믹싱한 배열을 반환합니다 (다음 호출까지만 유효합니다).
+        """
+        latency = self.latency
+        t_begin = time.perf_counter_ns()
+        if self.jitter is not None:
+            self.jitter.record(t_begin, frame_count)
+        self.mixer.trigger_pending(self.ring, latency.voice_started if latency is not None else None)
+        mixed_chunk = self.mixer.mix(frame_count)
+        if latency is not None or self.autotune is not None:
+            t_end = time.perf_counter_ns()
+            if latency is not None:
+                latency.callback(t_begin, t_end, status, time_info)
+            if self.autotune is not None:
+                self.autotune.record(t_end - t_begin, status)
+        return mixed_chunk
+
+    def start(self, watch_interval=None, output=None):
+        """
+        출력 백엔드(기본값은 PyAudio 콜백 스트림)를 열고 시작합니다.
+        watch_interval 초마다 매핑 파일 변경을 감시할 수 있습니다.
+        """
+        if output is None:
+            output = PyAudioCallbackOutput()
+        if self.autotune is not None:
+            self.block = self.autotune.begin(f"{output.device_key}:{self.format.tag}", self.format.rate, self.block)
+        output.open(self.format, self.block, self.render)
+        output.start()
+        self.output = output
+        if self.autotune is not None:
+            self._tuning = TuningThread(self, self.autotune)
+            self._tuning.start()
+        if watch_interval and self.reloader is not None and self.reloader.mapping_file:
+            self.reloader.interval = watch_interval
+            self.reloader.start()
+
+    def set_block(self, block):
+        """블록 크기를 바꿔 출력 스트림을 다시 엽니다."""
+        if block > self.mixer.max_frames:
+            raise ValueError(f"블록 크기 {block} 가 믹서 버퍼({self.mixer.max_frames} 프레임)보다 큽니다")
+        self.block = block
+        if self.output is not None:
+            self.output.restart(block)
+
+    def close(self):
+        """스트림과 백그라운드 스레드를 정리합니다."""
+        if self._tuning is not None:
+            self._tuning.stop()
+            self._tuning = None
+            logging.info(self.autotune.summary())
+        if self.output is not None:
+            self.output.close()
+            self.output = None
+        # 로더가 테이블 교체를 기다리는 중일 수 있으므로 리로더를 먼저 멈춥니다
+        if self.reloader is not None:
+            self.reloader.stop()
+        if self._loader is not None:
+            self._jobs.put(None)
+            self._loader.join()
+            self._loader = None
+        if self.lru_bank is not None:
+            self.lru_bank.stop()
+            logging.info(self.lru_bank.summary())
+        if self.policy is not None:
+            logging.info(f"{self.policy.summary()}, {self.mixer.choked} voices choked")
@@ -0,0 +1,211 @@
+"""
+키보드 리스너 스레드를 막지 않는 이벤트 로깅.
+
+- 모든 로그 레코드는 큐로 넘겨지고, 콘솔/파일 출력과 포맷팅은 백그라운드 스레드에서 처리됩니다.
+- 이벤트 종류(press, release, queue, unmapped)마다 로거와 레벨이 따로 있습니다.
+- 키별 메시지는 초당 개수 제한과 1/N 샘플링을 적용할 수 있습니다.
+- 로그 파일은 크기 기준으로 회전합니다.
+- 선택적으로 압축된 바이너리 이벤트 로그를 남기며, 이는 나중에 트레이스로 재생할 수 있습니다.
+"""
+
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import struct
+import threading
+import time
+
+EVENT_CLASSES = ('press', 'release', 'queue', 'unmapped')
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+EVENT_MAGIC = b'KSEV'
+EVENT_VERSION = 1
+EVENT_HEADER = struct.Struct('<4sI')
+EVENT_RECORD = struct.Struct('<qBB')  # perf_counter_ns, 종류, 키 길이 (+ UTF-8 키 바이트)
+KIND_PRESS = 0
+KIND_RELEASE = 1
+
+_listener = None
+
+
+def event_logger(event_class):
+    """이벤트 종류별 로거를 반환합니다."""
+    return logging.getLogger(f"keyboard_sound.events.{event_class}")
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    레코드를 포맷하지 않고 그대로 큐에 넣는 QueueHandler.
+    같은 프로세스 안의 큐에서는 피클링이 필요 없으므로 포맷팅 비용까지 백그라운드로 넘깁니다.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+class KeyRateLimitFilter(logging.Filter):
+    """
+    extra={'key': ...} 가 붙은 레코드를 키별로 제한합니다.
+    sample_every 개 중 하나만 통과시키고, 통과한 것도 키별로 초당 max_per_second 개까지만 허용합니다.
+    """
+
+    def __init__(self, max_per_second=None, sample_every=1):
+        super().__init__()
+        self.max_per_second = max_per_second
+        self.sample_every = max(1, sample_every)
+        self._seen = {}
+        self._window = {}
+        self.suppressed = 0
+
+    def filter(self, record):
+        key = getattr(record, 'key', None)
+        if key is None:
+            return True
+        key = (record.name, key)
+        n = self._seen.get(key, 0)
+        self._seen[key] = n + 1
+        if n % self.sample_every:
+            self.suppressed += 1
+            return False
+        if self.max_per_second:
+            second = int(record.created)
+            start, count = self._window.get(key, (second, 0))
+            if start != second:
+                start, count = second, 0
+            if count >= self.max_per_second:
+                self.suppressed += 1
+                return False
+            self._window[key] = (start, count + 1)
+        return True
+
+
+def setup_logging(log_file="./logs/keyboard_events.log", console=True, levels=None,
+                  max_per_second=None, sample_every=1, max_bytes=5 * 1024 * 1024, backup_count=3):
+    """
+    큐 기반 비동기 로깅을 설정합니다. 로그 디렉터리가 없으면 만듭니다.
+    levels 는 {이벤트 종류: 레벨} 딕셔너리이며, 키별 제한은 이벤트 로거들에 적용됩니다.
+    """
+    global _listener
+    handlers = []
+    formatter = logging.Formatter(LOG_FORMAT)
+    if console:
+        handlers.append(logging.StreamHandler())
+    if log_file:
+        os.makedirs(os.path.dirname(log_file) or '.', exist_ok=True)
+        handlers.append(logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8'))
+    for h in handlers:
+        h.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    for h in list(root.handlers):
+        root.removeHandler(h)
+    root.addHandler(_DeferredQueueHandler(log_queue))
+
+    if _listener is not None:
+        _listener.stop()
+    else:
+        atexit.register(shutdown_logging)
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+    limiter = KeyRateLimitFilter(max_per_second, sample_every)
+    levels = levels or {}
+    for event_class in EVENT_CLASSES:
+        logger = event_logger(event_class)
+        logger.setLevel(levels.get(event_class, logging.INFO))
+        logger.filters = [limiter]
+    return limiter
+
+
+def shutdown_logging():
+    """큐에 남은 레코드를 모두 내보내고 백그라운드 스레드를 종료합니다."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+class BinaryEventLog:
+    """
+    키 이벤트를 압축된 바이너리 레코드로 기록합니다.
+    record() 는 큐에 넣기만 하고, 파일 쓰기는 전용 스레드에서 모아서 처리합니다.
+    """
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.path = path
+        self._queue = queue.SimpleQueue()
+        self._file = open(path, 'wb')
+        self._file.write(EVENT_HEADER.pack(EVENT_MAGIC, EVENT_VERSION))
+        self._thread = threading.Thread(target=self._run, name="event-log", daemon=True)
+        self._thread.start()
+
+    def record(self, kind, key, t_ns=None):
+        if t_ns is None:
+            t_ns = time.perf_counter_ns()
+        self._queue.put((t_ns, kind, key))
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            batch = []
+            while item is not None:
+                t_ns, kind, key = item
+                # 255 바이트에서 자르되 멀티바이트 문자 중간에서 끊기지 않게 합니다
+                raw = key.encode('utf-8')[:255].decode('utf-8', 'ignore').encode('utf-8')
+                batch.append(EVENT_RECORD.pack(t_ns, kind, len(raw)))
+                batch.append(raw)
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            self._file.write(b''.join(batch))
+            self._file.flush()
+            if item is None:
+                return
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+        self._file.close()
+
+
+def read_events(path):
+    """바이너리 이벤트 로그를 [(t_ns, 종류, 키), ...] 로 읽습니다."""
+    events = []
+    with open(path, 'rb') as f:
+        data = f.read()
+    magic, version = EVENT_HEADER.unpack_from(data, 0)
+    if magic != EVENT_MAGIC or version != EVENT_VERSION:
+        raise ValueError(f"바이너리 이벤트 로그가 아닙니다: {path}")
+    pos = EVENT_HEADER.size
+    while pos + EVENT_RECORD.size <= len(data):
+        t_ns, kind, n = EVENT_RECORD.unpack_from(data, pos)
+        pos += EVENT_RECORD.size
+        # 이전 버전이 문자 중간에서 자른 키가 있어도 로그 전체를 읽을 수 있게 합니다
+        events.append((t_ns, kind, data[pos:pos + n].decode('utf-8', 'replace')))
+        pos += n
+    return events
+
+
+def events_to_trace(events):
+    """키 누름 이벤트를 첫 이벤트 기준 초 단위 트레이스 [(t, key), ...] 로 바꿉니다."""
+    presses = [(t, key) for t, kind, key in events if kind == KIND_PRESS]
+    if not presses:
+        return []
+    t0 = presses[0][0]
+    return [((t - t0) / 1e9, key) for t, key in presses]
+
+
+def is_event_log(path):
+    """파일이 바이너리 이벤트 로그인지 확인합니다."""
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(EVENT_MAGIC)) == EVENT_MAGIC
+    except OSError:
+        return False
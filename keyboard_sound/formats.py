@@ -0,0 +1,141 @@
+"""
+스트림 포맷 정의와 로드 시점 포맷 정규화.
+
+사운드 팩의 파일들은 샘플레이트, 채널 수, 비트 깊이가 제각각일 수 있습니다.
+모든 샘플은 로드할 때 한 번만 하나의 스트림 포맷으로 변환되며, 오디오 콜백은
+변환 작업 없이 정규화된 버퍼만 다룹니다. 변환은 모두 NumPy 벡터 연산입니다.
+"""
+
+import numpy as np
+
+SAMPLE_FORMATS = {
+    # 이름: (dtype, 바이트 수, 정수 전체 스케일)
+    'int16': (np.int16, 2, 1 << 15),
+    'int32': (np.int32, 4, 1 << 31),
+    'float32': (np.float32, 4, None),
+}
+
+
+class StreamFormat:
+    """출력 스트림(그리고 정규화된 샘플)의 샘플레이트, 채널 수, 샘플 포맷."""
+
+    def __init__(self, rate=44100, channels=2, sample_format='int16'):
+        if sample_format not in SAMPLE_FORMATS:
+            raise ValueError(f"지원하지 않는 샘플 포맷: {sample_format}")
+        self.rate = int(rate)
+        self.channels = int(channels)
+        self.sample_format = sample_format
+
+    @property
+    def dtype(self):
+        return np.dtype(SAMPLE_FORMATS[self.sample_format][0])
+
+    @property
+    def sample_width(self):
+        return SAMPLE_FORMATS[self.sample_format][1]
+
+    @property
+    def tag(self):
+        """캐시 파일 이름 등에 쓰는 짧은 문자열."""
+        return f"{self.rate}_{self.channels}_{self.sample_format}"
+
+    def __eq__(self, other):
+        return isinstance(other, StreamFormat) and self.tag == other.tag
+
+    def __hash__(self):
+        return hash(self.tag)
+
+    def __repr__(self):
+        return f"StreamFormat({self.rate}, {self.channels}, {self.sample_format!r})"
+
+
+def pcm_from_bytes(raw, sample_width, channels):
+    """인터리브된 정수 PCM 바이트(8/16/24/32비트)를 [-1, 1) 범위의 (frames, channels) float32 배열로 바꿉니다."""
+    if sample_width == 1:
+        x = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif sample_width == 2:
+        x = np.frombuffer(raw, dtype='<i2').astype(np.float32) / float(1 << 15)
+    elif sample_width == 3:
+        b = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3)
+        wide = np.zeros((len(b), 4), dtype=np.uint8)
+        wide[:, 1:] = b
+        # 상위 3바이트에 놓고 산술 시프트로 부호를 확장합니다
+        x = (wide.view('<i4').ravel() >> 8).astype(np.float32) / float(1 << 23)
+    elif sample_width == 4:
+        x = np.frombuffer(raw, dtype='<i4').astype(np.float64) / float(1 << 31)
+        x = x.astype(np.float32)
+    else:
+        raise ValueError(f"지원하지 않는 샘플 폭: {sample_width}")
+    return x.reshape(-1, channels)
+
+
+def to_float(pcm):
+    """정수/실수 PCM 배열을 [-1, 1) 범위의 float32 로 바꿉니다."""
+    if pcm.dtype == np.float32:
+        return pcm
+    if pcm.dtype == np.int16:
+        return pcm.astype(np.float32) / float(1 << 15)
+    if pcm.dtype == np.int32:
+        return (pcm.astype(np.float64) / float(1 << 31)).astype(np.float32)
+    return pcm.astype(np.float32)
+
+
+def from_float(x, sample_format):
+    """float PCM 을 목표 샘플 포맷으로 양자화합니다."""
+    dtype, _, scale = SAMPLE_FORMATS[sample_format]
+    if scale is None:
+        return np.clip(x, -1.0, 1.0).astype(dtype)
+    y = np.rint(np.asarray(x, dtype=np.float64) * scale)
+    return np.clip(y, -scale, scale - 1).astype(dtype)
+
+
+def remix_channels(x, channels):
+    """
+    채널 수를 바꿉니다. 늘릴 때는 원본 채널을 순환 복제하고,
+    줄일 때는 j 번 출력 채널에 i % channels == j 인 입력 채널들의 평균을 넣습니다.
+    """
+    src = x.shape[1]
+    if src == channels:
+        return x
+    matrix = np.zeros((src, channels), dtype=np.float32)
+    if channels > src:
+        for j in range(channels):
+            matrix[j % src, j] = 1.0
+    else:
+        for i in range(src):
+            matrix[i, i % channels] = 1.0
+        matrix /= matrix.sum(axis=0, keepdims=True)
+    return x @ matrix
+
+
+def resample(x, src_rate, dst_rate, zero_crossings=16, chunk=4096):
+    """
+    Hann 창을 씌운 sinc 보간으로 (frames, channels) float 배열의 샘플레이트를 바꿉니다.
+    다운샘플링 시에는 차단 주파수를 낮춰 에일리어싱을 막습니다. 출력 샘플을 chunk 개씩
+    (출력 샘플 x 탭) 행렬로 한 번에 계산합니다.
+    """
+    if src_rate == dst_rate or len(x) == 0:
+        return x
+    ratio = dst_rate / src_rate
+    n_out = int(round(len(x) * ratio))
+    cutoff = min(1.0, ratio)
+    half = int(np.ceil(zero_crossings / cutoff))
+    taps = np.arange(-half + 1, half + 1)
+    padded = np.concatenate([np.zeros((half, x.shape[1]), np.float32), x,
+                             np.zeros((half + 1, x.shape[1]), np.float32)])
+    out = np.empty((n_out, x.shape[1]), dtype=np.float32)
+    for start in range(0, n_out, chunk):
+        t = np.arange(start, min(start + chunk, n_out)) / ratio
+        base = np.floor(t).astype(np.int64)
+        dist = (t - base)[:, None] - taps[None, :]
+        h = cutoff * np.sinc(cutoff * dist) * (0.5 + 0.5 * np.cos(np.pi * dist / half))
+        frames = padded[base[:, None] + taps[None, :] + half]
+        out[start:start + len(t)] = np.einsum('nk,nkc->nc', h, frames)
+    return out
+
+
+def normalize(x, src_rate, fmt):
+    """float PCM 을 스트림 포맷(채널, 샘플레이트, 샘플 포맷)으로 변환합니다."""
+    x = remix_channels(to_float(x), fmt.channels)
+    x = resample(x, src_rate, fmt.rate)
+    return np.ascontiguousarray(from_float(x, fmt.sample_format))
@@ -0,0 +1,131 @@
+"""
+키 객체 -> 정수 키 번호 -> 샘플 슬롯 디스패치 테이블.
+
+매핑의 키 이름들을 로드할 때 한 번 컴파일해 두고, 키 이벤트마다 pynput 키 객체를
+문자열로 바꾸지 않고 바로 정수 키 번호로 찾습니다. 찾는 순서는 다음과 같습니다.
+
+    Key 열거형 멤버      -> 멤버 딕셔너리 (space, shift_r, f1 ...)
+    KeyCode.vk          -> 가상 키 코드 배열 ("vk:65" 처럼 레이아웃과 무관하게 지정한 키, 특수 키의 vk)
+    KeyCode.char        -> 문자 딕셔너리 (a, 1, / ...)
+
+키 번호는 이름마다 한 번 정해지면 바뀌지 않으므로, 매핑이 리로드되어도 눌림 상태 같은
+키 번호 기반 상태를 그대로 쓸 수 있습니다.
+"""
+
+VK_TABLE_SIZE = 1 << 16
+VK_PREFIX = 'vk:'
+REPEAT_SUFFIX = ':repeat'
+
+# 매핑에 없는 키는 이 순서로 대신할 이름을 찾습니다 (예: shift_r -> shift)
+DEFAULT_ALIASES = {
+    'shift_l': 'shift', 'shift_r': 'shift',
+    'ctrl_l': 'ctrl', 'ctrl_r': 'ctrl',
+    'alt_l': 'alt', 'alt_r': 'alt', 'alt_gr': 'alt_r',
+    'cmd_l': 'cmd', 'cmd_r': 'cmd',
+}
+
+
+def _key_enum():
+    try:
+        from pynput.keyboard import Key
+    except ImportError:
+        return None
+    return Key
+
+
+class KeyTable:
+    """컴파일된 키 디스패치 테이블."""
+
+    def __init__(self, aliases=None, key_enum=None):
+        self.aliases = DEFAULT_ALIASES if aliases is None else aliases
+        self._enum = key_enum if key_enum is not None else _key_enum()
+        self.names = []
+        self._id_of = {}
+        self.slots = []
+        self.repeat_slots = []
+        self.params = []
+        self._by_member = {}
+        self._by_vk = [-1] * VK_TABLE_SIZE
+        self._by_vk_large = {}
+        self._by_char = {}
+
+    def register(self, names):
+        """키 이름들에 키 번호를 부여합니다. 매핑에 없어도 등록된 키는 index() 로 찾을 수 있습니다."""
+        for name in names:
+            if name not in self._id_of and not name.endswith(REPEAT_SUFFIX):
+                self._id_of[name] = len(self.names)
+                self.names.append(name)
+
+    def id_of(self, name):
+        return self._id_of.get(name, -1)
+
+    def _resolve(self, name, key_to_slot):
+        """이름 자체, 없으면 별칭을 따라가며 슬롯이 있는 이름을 찾습니다."""
+        seen = 0
+        while name is not None and seen < 8:
+            if name in key_to_slot:
+                return name
+            name = self.aliases.get(name)
+            seen += 1
+        return None
+
+    def compile(self, key_to_slot, key_params=None):
+        """{키 이름: 슬롯} 과 {키 이름: (gain, pan)} 딕셔너리로 테이블을 다시 만듭니다."""
+        key_params = key_params or {}
+        self.register(key_to_slot)
+        self.register(self.aliases)
+        targets = [self._resolve(name, key_to_slot) for name in self.names]
+        slots = [key_to_slot[t] if t is not None else -1 for t in targets]
+        params = [key_params.get(t) for t in targets]
+        repeat_slots = [key_to_slot.get(name + REPEAT_SUFFIX, -1) for name in self.names]
+
+        by_member = {}
+        by_vk = [-1] * VK_TABLE_SIZE
+        by_vk_large = {}
+        by_char = {}
+
+        def bind_vk(vk, kid):
+            if vk < VK_TABLE_SIZE:
+                by_vk[vk] = kid
+            else:
+                by_vk_large[vk] = kid
+
+        members = {m.name: m for m in self._enum} if self._enum is not None else {}
+        for kid, name in enumerate(self.names):
+            if name.startswith(VK_PREFIX):
+                bind_vk(int(name[len(VK_PREFIX):], 0), kid)
+            elif name in members:
+                member = members[name]
+                by_member[member] = kid
+                vk = getattr(member.value, 'vk', None)
+                if vk is not None:
+                    bind_vk(vk, kid)
+            else:
+                by_char[name] = kid
+
+        # 리스너 스레드가 보는 속성은 완성된 객체로 한 번에 바꿉니다
+        self.slots, self.repeat_slots, self.params = slots, repeat_slots, params
+        self._by_member, self._by_vk, self._by_vk_large, self._by_char = by_member, by_vk, by_vk_large, by_char
+        return self
+
+    def index(self, key):
+        """
+        pynput 키 객체의 키 번호. 등록되지 않은 키는 -1. 문자열을 만들거나 예외를 일으키지 않습니다.
+        pynput 은 알 수 없는 키를 None 으로 넘기기도 하고, vk/char 가 없는 객체도 -1 입니다.
+        """
+        if key is None:
+            return -1
+        if key.__class__ is self._enum:
+            return self._by_member.get(key, -1)
+        vk = getattr(key, 'vk', None)
+        if vk is not None:
+            kid = self._by_vk[vk] if 0 <= vk < VK_TABLE_SIZE else self._by_vk_large.get(vk, -1)
+            if kid >= 0:
+                return kid
+        char = getattr(key, 'char', None)
+        if char is not None:
+            return self._by_char.get(char, -1)
+        return -1
+
+    def name(self, kid):
+        return self.names[kid]
@@ -0,0 +1,267 @@
+"""
+메모리 예산이 있는 LRU 사운드 뱅크.
+
+샘플은 예산 크기로 미리 할당한 PCM 아레나 하나에 올라가며, 믹서는 이 아레나를 샘플 테이블로
+그대로 사용합니다. 상주하지 않는 슬롯은 길이가 0 이라 트리거되지 않습니다(미스).
+적재, 축출, 예측은 모두 백그라운드 워커 스레드에서 처리하고, 키보드 리스너는 on_key() 로
+슬롯 번호를 큐에 넣기만 합니다.
+
+예측 프리페치는 최근 타이핑의 키별 빈도와 바이그램(직전 키 -> 다음 키) 통계로 다음에 눌릴
+가능성이 높은 키를 골라 미리 올려 둡니다.
+"""
+
+import logging
+import queue
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from keyboard_sound.cache import DecodeCache
+
+DECAY_EVERY = 2000  # 이만큼 관측할 때마다 통계를 절반으로 줄여 최근 타이핑에 맞춥니다
+
+
+class _Arena:
+    """PCM 아레나의 프레임 구간을 관리하는 first-fit 할당기. 0번 프레임은 무음으로 예약됩니다."""
+
+    def __init__(self, frames):
+        self.free = [(1, frames - 1)] if frames > 1 else []
+
+    def alloc(self, n):
+        for i, (start, length) in enumerate(self.free):
+            if length >= n:
+                if length == n:
+                    del self.free[i]
+                else:
+                    self.free[i] = (start + n, length - n)
+                return start
+        return None
+
+    def release(self, start, n):
+        self.free.append((start, n))
+        self.free.sort()
+        merged = []
+        for s, length in self.free:
+            if merged and merged[-1][0] + merged[-1][1] == s:
+                merged[-1] = (merged[-1][0], merged[-1][1] + length)
+            else:
+                merged.append((s, length))
+        self.free = merged
+
+
+class BudgetedSoundBank:
+    """메모리 예산 안에서 샘플을 LRU 로 관리하고 예측 프리페치하는 사운드 뱅크."""
+
+    def __init__(self, mixer, names_to_paths, fmt, budget_bytes, cache=None, prefetch=4,
+                 executor='thread', evict_timeout=0.2):
+        self.mixer = mixer
+        self.fmt = fmt
+        self.cache = cache or DecodeCache(target=fmt)
+        self.prefetch = prefetch
+        self.executor = executor
+        self.evict_timeout = evict_timeout
+
+        self.names = list(names_to_paths)
+        self.paths = [names_to_paths[n] for n in self.names]
+        self.name_to_slot = {n: i for i, n in enumerate(self.names)}
+
+        frame_bytes = fmt.channels * fmt.sample_width
+        self.capacity_frames = max(2, budget_bytes // frame_bytes)
+        self.arena = np.zeros((self.capacity_frames, fmt.channels), dtype=fmt.dtype)
+        self._alloc = _Arena(self.capacity_frames)
+        n = len(self.names)
+        self._starts = np.zeros(n, dtype=np.int64)
+        self._lengths = np.zeros(n, dtype=np.int64)
+        self._peaks = np.zeros(n, dtype=np.float32)
+        # 리스너 스레드가 상주 여부를 확인하는 배열 (워커만 씀)
+        self.resident = np.zeros(n, dtype=bool)
+        self._lru = OrderedDict()
+        self._prefetched = set()
+        self._failed = set()
+        # 축출했지만 아직 읽는 보이스가 있어 반납을 미룬 (슬롯, 시작, 길이, table_generation) 구간
+        self._draining = []
+
+        self._freq = {}
+        self._bigram = {}
+        self._observed = 0
+        self._prev = None
+
+        self.hits = 0
+        self.misses = 0
+        self.prefetch_loads = 0
+        self.prefetch_hits = 0
+        self.demand_loads = 0
+        self.evictions = 0
+
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        mixer.set_table(self.arena, self._starts.copy(), self._lengths.copy(), self._peaks.copy())
+
+    @property
+    def resident_bytes(self):
+        return int(self._lengths.sum()) * self.fmt.channels * self.fmt.sample_width
+
+    def on_key(self, slot):
+        """키 입력마다 리스너 스레드에서 호출합니다. 적중 여부를 세고 워커에 관측을 넘깁니다."""
+        if self.resident[slot]:
+            self.hits += 1
+        else:
+            self.misses += 1
+        self._queue.put(slot)
+
+    def warm(self, slots=None):
+        """예산이 허락하는 만큼 (기본: 매핑 순서대로) 미리 적재하도록 요청합니다."""
+        self._queue.put(('warm', list(range(len(self.names))) if slots is None else list(slots)))
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="sound-bank", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._queue.put(None)
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while True:
+            msg = self._queue.get()
+            if msg is None:
+                return
+            try:
+                if isinstance(msg, tuple):
+                    for slot in msg[1]:
+                        if not self._load(slot, evict=False):
+                            break
+                else:
+                    self._handle_key(msg)
+            except Exception as e:
+                logging.error(f"사운드 뱅크 작업 실패: {e}")
+
+    def _handle_key(self, slot):
+        self._observe(slot)
+        if slot in self._lru:
+            self._lru.move_to_end(slot)
+            if slot in self._prefetched:
+                self._prefetched.discard(slot)
+                self.prefetch_hits += 1
+        elif self._load(slot):
+            self.demand_loads += 1
+        # 예측된 키들끼리는 서로 축출하지 않도록 함께 보호합니다
+        predicted = self.predict(slot)
+        keep = set(predicted)
+        keep.add(slot)
+        for cand in predicted:
+            if cand not in self._lru and self._load(cand, keep=keep):
+                self._prefetched.add(cand)
+                self.prefetch_loads += 1
+
+    def _observe(self, slot):
+        self._freq[slot] = self._freq.get(slot, 0) + 1
+        if self._prev is not None:
+            row = self._bigram.setdefault(self._prev, {})
+            row[slot] = row.get(slot, 0) + 1
+        self._prev = slot
+        self._observed += 1
+        if self._observed % DECAY_EVERY == 0:
+            self._freq = {k: v // 2 for k, v in self._freq.items() if v > 1}
+            self._bigram = {p: {k: v // 2 for k, v in row.items() if v > 1} for p, row in self._bigram.items()}
+
+    def predict(self, slot):
+        """slot 다음에 눌릴 가능성이 높은 슬롯을 최대 prefetch 개 반환합니다 (바이그램 우선, 빈도 보충)."""
+        row = self._bigram.get(slot, {})
+        ranked = [k for k in sorted(row, key=row.get, reverse=True)[:self.prefetch] if row[k] > 1]
+        if len(ranked) < self.prefetch:
+            for cand in sorted(self._freq, key=self._freq.get, reverse=True):
+                if cand not in ranked and cand != slot:
+                    ranked.append(cand)
+                    if len(ranked) >= self.prefetch:
+                        break
+        return ranked
+
+    def _publish(self):
+        self.mixer.request_table(self.arena, self._starts.copy(), self._lengths.copy(), self._peaks.copy())
+
+    def _load(self, slot, evict=True, keep=()):
+        """슬롯을 디코딩해 아레나에 올립니다. 공간이 없으면 LRU 순으로 축출합니다."""
+        if slot in self._lru:
+            return True
+        if slot in self._failed:
+            return False
+        decoded = self.cache.load([self.paths[slot]], executor=self.executor)
+        if self.paths[slot] not in decoded:
+            self._failed.add(slot)
+            return False
+        pcm = decoded[self.paths[slot]][0]
+        n = len(pcm)
+        if n >= self.capacity_frames:
+            logging.warning(f"샘플이 메모리 예산보다 큽니다: {self.names[slot]}")
+            self._failed.add(slot)
+            return False
+        start = self._alloc.alloc(n)
+        while start is None:
+            if not self._reclaim() and (not evict or not self._evict_one(keep, slot)):
+                return False
+            start = self._alloc.alloc(n)
+        # 비어 있던 구간이라 이 영역을 읽는 보이스는 없습니다
+        self.arena[start:start + n] = pcm
+        self._starts[slot] = start
+        self._lengths[slot] = n
+        self._peaks[slot] = np.abs(pcm.astype(np.float64)).max() if n else 0.0
+        self._publish()
+        self.resident[slot] = True
+        self._lru[slot] = True
+        return True
+
+    def _evict_one(self, keep, loading):
+        """keep 에 없는 슬롯 중 가장 오래 쓰지 않은 것 하나를 내립니다."""
+        victim = next((s for s in self._lru if s not in keep and s != loading), None)
+        if victim is None:
+            return False
+        # 먼저 테이블에서 길이를 0 으로 만들어 새 보이스가 시작되지 못하게 한 뒤,
+        # 재생 중인 보이스가 끝나기를 기다렸다가 구간을 반납합니다
+        self.resident[victim] = False
+        generation = self.mixer.table_generation
+        start, n = int(self._starts[victim]), int(self._lengths[victim])
+        self._lengths[victim] = 0
+        self._publish()
+        deadline = time.monotonic() + self.evict_timeout
+        while self._in_use(victim, generation) and time.monotonic() < deadline:
+            time.sleep(0.002)
+        del self._lru[victim]
+        self._prefetched.discard(victim)
+        self.evictions += 1
+        if self._in_use(victim, generation):
+            # 아직 읽는 보이스가 있으면 구간을 덮어쓰지 않도록 반납을 _reclaim() 으로 미룹니다
+            self._draining.append((victim, start, n, generation))
+        else:
+            self._alloc.release(start, n)
+        return True
+
+    def _in_use(self, slot, generation):
+        """generation 이후의 테이블이 아직 적용되지 않았거나 slot 을 재생 중인 보이스가 있으면 True."""
+        mixer = self.mixer
+        return mixer.table_generation == generation or slot in mixer.voice_sample[:mixer.active]
+
+    def _reclaim(self):
+        """반납을 미룬 구간 중 이제 읽는 보이스가 없는 것을 반납합니다. 하나라도 반납했으면 True."""
+        draining = []
+        for entry in self._draining:
+            if self._in_use(entry[0], entry[3]):
+                draining.append(entry)
+            else:
+                self._alloc.release(entry[1], entry[2])
+        released = len(draining) < len(self._draining)
+        self._draining = draining
+        return released
+
+    def summary(self):
+        """적중률과 메모리 사용량 요약 문자열."""
+        total = self.hits + self.misses
+        rate = self.hits / total * 100 if total else 0.0
+        budget = self.capacity_frames * self.fmt.channels * self.fmt.sample_width
+        return (f"sound bank: hit rate {rate:.1f}% ({self.hits} hits, {self.misses} misses), "
+                f"prefetch {self.prefetch_hits}/{self.prefetch_loads} used, {self.demand_loads} demand loads, "
+                f"{self.evictions} evictions, {len(self._lru)}/{len(self.names)} resident, "
+                f"{self.resident_bytes / 1024:.0f}/{budget / 1024:.0f} KiB")
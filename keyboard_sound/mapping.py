@@ -0,0 +1,44 @@
+"""
+키 매핑 JSON 항목 해석.
+
+항목은 사운드 파일 경로 문자열이거나, 게인/팬을 함께 지정하는 객체입니다.
+
+    "a": "sounds/a.mp3",
+    "space": {"path": "sounds/space.mp3", "gain": 0.8, "pan": -0.3}
+
+gain 은 선형 배율(기본 1.0), pan 은 -1(왼쪽) ~ 1(오른쪽) 입니다(기본 0).
+"""
+
+
+def entry_path(entry):
+    """매핑 항목의 사운드 파일 경로."""
+    return entry['path'] if isinstance(entry, dict) else entry
+
+
+def entry_params(entry):
+    """매핑 항목의 (gain, pan). 지정하지 않았으면 None."""
+    if not isinstance(entry, dict) or ('gain' not in entry and 'pan' not in entry):
+        return None
+    return float(entry.get('gain', 1.0)), float(entry.get('pan', 0.0))
+
+
+def mapping_paths(mapping):
+    """{키: 항목} 을 {키: 경로} 로 바꿉니다."""
+    return {k: entry_path(v) for k, v in mapping.items()}
+
+
+def mapping_params(mapping):
+    """게인/팬이 지정된 키만 모은 {키: (gain, pan)}."""
+    params = {}
+    for k, v in mapping.items():
+        p = entry_params(v)
+        if p is not None:
+            params[k] = p
+    return params
+
+
+def with_path(entry, path):
+    """항목의 게인/팬은 유지하고 경로만 바꾼 새 항목."""
+    if isinstance(entry, dict):
+        return dict(entry, path=path)
+    return path
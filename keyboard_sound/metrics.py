@@ -0,0 +1,218 @@
+"""
+키 입력부터 소리 출력까지의 지연 계측.
+
+단계별로 HDR 방식(로그-선형 버킷) 히스토그램을 유지합니다. 기록은 정수 연산과
+리스트 증가 한 번뿐이라 실사용 중에도 켜 둘 수 있습니다.
+
+    ring     : on_press -> 그 트리거를 링에서 꺼내 보이스로 시작하는 콜백 시작
+    callback : 콜백 실행 시간
+    output   : 콜백 시점 -> 출력 버퍼가 DAC 에 도달하는 시점 (PortAudio time_info)
+    total    : on_press -> DAC 도달 추정 시점
+"""
+
+import atexit
+import logging
+import signal
+import threading
+import time
+
+# PortAudio 콜백 status 플래그
+PA_OUTPUT_UNDERFLOW = 0x4
+PA_OUTPUT_OVERFLOW = 0x8
+PA_PRIMING_OUTPUT = 0x10
+
+SUB_BITS = 4  # 2의 거듭제곱 구간마다 16개 버킷 (상대 오차 약 6%)
+SUB = 1 << SUB_BITS
+MAX_SHIFT = 40
+
+STAGES = ('ring', 'callback', 'output', 'total')
+
+
+class LatencyHistogram:
+    """나노초 값을 기록하는 로그-선형 버킷 히스토그램."""
+
+    def __init__(self):
+        self.counts = [0] * ((MAX_SHIFT + 2) << SUB_BITS)
+        self.total = 0
+        self.max = 0
+
+    def record(self, value):
+        if value < SUB:
+            idx = value if value > 0 else 0
+        else:
+            shift = value.bit_length() - SUB_BITS - 1
+            idx = ((shift + 1) << SUB_BITS) + (value >> shift) - SUB
+            if idx >= len(self.counts):
+                idx = len(self.counts) - 1
+        self.counts[idx] += 1
+        self.total += 1
+        if value > self.max:
+            self.max = value
+
+    @staticmethod
+    def bucket_value(idx):
+        """버킷이 나타내는 값 구간의 중앙값."""
+        if idx < SUB:
+            return idx
+        shift = (idx >> SUB_BITS) - 1
+        mant = (idx & (SUB - 1)) + SUB
+        return ((mant << shift) + ((mant + 1) << shift) - 1) // 2
+
+    def percentile(self, q):
+        """q 백분위수 (나노초). 기록이 없으면 0."""
+        if self.total == 0:
+            return 0
+        target = self.total * q / 100.0
+        seen = 0
+        for idx, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= target:
+                return min(self.bucket_value(idx), self.max)
+        return self.max
+
+    def reset(self):
+        self.counts = [0] * len(self.counts)
+        self.total = 0
+        self.max = 0
+
+
+class LatencyMonitor:
+    """
+    keypress -> 첫 샘플 출력 지연과 콜백 상태를 수집합니다.
+    voice_started() 와 callback() 은 같은 락 아래에서(또는 같은 스레드에서) 호출되어야 합니다.
+    """
+
+    def __init__(self, capacity=256):
+        self.stages = {name: LatencyHistogram() for name in STAGES}
+        self.underruns = 0
+        self.overflows = 0
+        self.callbacks = 0
+        # 아직 콜백으로 나가지 않은 보이스의 press 타임스탬프
+        self._pending_press = [0] * capacity
+        self._pending = 0
+        self.dropped = 0
+
+    def voice_started(self, t_press):
+        """보이스가 믹서에 들어갔음을 기록합니다. 지연은 다음 callback() 의 t_begin 에서 잽니다."""
+        i = self._pending
+        if i >= len(self._pending_press):
+            self.dropped += 1
+            return
+        self._pending_press[i] = t_press
+        self._pending = i + 1
+
+    def callback(self, t_begin, t_end, status, time_info=None):
+        """콜백 한 번의 시간, status 플래그, 그 블록에서 처음 나간 보이스들의 지연을 기록합니다."""
+        self.callbacks += 1
+        if status & PA_OUTPUT_UNDERFLOW:
+            self.underruns += 1
+        if status & PA_OUTPUT_OVERFLOW:
+            self.overflows += 1
+        self.stages['callback'].record(t_end - t_begin)
+
+        output_ns = 0
+        if time_info:
+            now = time_info.get('current_time', 0)
+            dac = time_info.get('output_buffer_dac_time', 0)
+            if now > 0 and dac > now:
+                output_ns = int((dac - now) * 1e9)
+                self.stages['output'].record(output_ns)
+
+        stages = self.stages
+        for i in range(self._pending):
+            wait = t_begin - self._pending_press[i]
+            stages['ring'].record(wait)
+            stages['total'].record(wait + output_ns)
+        self._pending = 0
+
+    def summary(self):
+        """단계별 p50/p99/max (밀리초) 와 언더런 횟수를 한 덩어리 문자열로 반환합니다."""
+        lines = [f"latency summary: {self.callbacks} callbacks, {self.underruns} underruns, "
+                 f"{self.overflows} overflows"]
+        for name in STAGES:
+            h = self.stages[name]
+            if h.total:
+                lines.append(f"  {name:<9} n={h.total:<7} p50={h.percentile(50) / 1e6:7.3f}ms "
+                             f"p99={h.percentile(99) / 1e6:7.3f}ms max={h.max / 1e6:7.3f}ms")
+        return '\n'.join(lines)
+
+
+class JitterMeter:
+    """
+    콜백 시작 간격이 블록 주기(frame_count / rate)에서 얼마나 벗어나는지 기록합니다.
+    late 는 주기의 절반 넘게 늦게 시작한 콜백 수입니다.
+    """
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.hist = LatencyHistogram()
+        self.late = 0
+        self._prev = None
+
+    def record(self, t_begin, frame_count):
+        prev = self._prev
+        self._prev = t_begin
+        if prev is None:
+            return
+        period = frame_count * 1000000000 // self.rate
+        dev = t_begin - prev - period
+        self.hist.record(dev if dev >= 0 else -dev)
+        if dev > period // 2:
+            self.late += 1
+
+    def summary(self):
+        """{'callbacks', 'p50_us', 'p99_us', 'max_us', 'late'} 딕셔너리."""
+        h = self.hist
+        return {
+            'callbacks': h.total,
+            'p50_us': h.percentile(50) / 1000.0,
+            'p99_us': h.percentile(99) / 1000.0,
+            'max_us': h.max / 1000.0,
+            'late': self.late,
+        }
+
+
+class StartupTimer:
+    """시작 단계별 소요 시간. mark() 는 직전 mark() (처음에는 생성 시점) 이후의 시간을 그 단계로 기록합니다."""
+
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self._last = self.t0
+        self.phases = []
+
+    def mark(self, name):
+        now = time.perf_counter()
+        self.phases.append((name, now - self._last))
+        self._last = now
+
+    @property
+    def total(self):
+        return self._last - self.t0
+
+    def summary(self):
+        phases = ", ".join(f"{name} {sec * 1000:.1f} ms" for name, sec in self.phases)
+        return f"startup: {phases}, ready in {self.total * 1000:.1f} ms"
+
+
+def install_reporting(monitor, interval=None, signum=getattr(signal, 'SIGUSR1', None), at_exit=True,
+                      refresh=None):
+    """
+    요약을 주기적으로(interval 초), 시그널을 받았을 때, 종료 시에 로그로 남기도록 설정합니다.
+    시그널 핸들러는 메인 스레드에서만 설치할 수 있습니다. refresh 가 있으면 요약 직전에 호출합니다
+    (예: 다른 프로세스에서 계측하는 ProcessEngine.refresh_stats).
+    """
+    def report(*_):
+        if refresh is not None:
+            refresh()
+        logging.info(monitor.summary())
+
+    if at_exit:
+        atexit.register(report)
+    if signum is not None and threading.current_thread() is threading.main_thread():
+        signal.signal(signum, report)
+    if interval:
+        def loop():
+            while True:
+                time.sleep(interval)
+                report()
+        threading.Thread(target=loop, name="latency-report", daemon=True).start()
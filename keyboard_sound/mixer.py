@@ -0,0 +1,426 @@
+import numpy as np
+
+# 정수 포맷의 보이스 게인은 Q15 고정소수점 정수로 저장합니다 (1.0 == 32768)
+GAIN_SHIFT = 15
+GAIN_ONE = 1 << GAIN_SHIFT
+
+STEAL_POLICIES = ('oldest', 'quietest')
+BUSES = ('int', 'float32')
+
+# 한 블록에 이만큼 이하로 쌓인 트리거는 벡터 배치의 고정 비용보다 싼 trigger() 반복으로 시작합니다
+SEQUENTIAL_TRIGGERS = 4
+
+# 샘플 포맷별 믹싱 경로: (샘플 dtype, 누산/게인 dtype, 게인 시프트, 클립 하한, 클립 상한)
+MIX_PATHS = {
+    'int16': (np.int16, np.int32, GAIN_SHIFT, -(1 << 15), (1 << 15) - 1),
+    'int32': (np.int32, np.int64, GAIN_SHIFT, -(1 << 31), (1 << 31) - 1),
+    'float32': (np.float32, np.float32, 0, -1.0, 1.0),
+}
+
+
+def channel_gains(channels, gain=1.0, pan=0.0):
+    """게인과 팬(-1 왼쪽 ~ 1 오른쪽)을 채널별 배율로 바꿉니다. 가운데에서 양쪽 모두 1 인 밸런스 방식이며 스테레오가 아니면 팬은 무시합니다."""
+    g = np.full(channels, gain, dtype=np.float32)
+    if channels == 2 and pan:
+        pan = min(1.0, max(-1.0, float(pan)))
+        g[0] *= 1.0 - max(pan, 0.0)
+        g[1] *= 1.0 + min(pan, 0.0)
+    return g
+
+
+def pack_samples(samples, channels, dtype=np.int16):
+    """
+    샘플 목록을 하나의 연속된 PCM 배열로 묶습니다.
+    0번 프레임은 항상 무음이며, 끝난 보이스는 이 프레임을 읽습니다.
+    반환값은 (pcm, 시작 프레임 배열, 길이 배열) 입니다.
+    """
+    total = 1 + sum(len(s) for s in samples)
+    pcm = np.zeros((total, channels), dtype=dtype)
+    starts = np.zeros(len(samples), dtype=np.int64)
+    lengths = np.zeros(len(samples), dtype=np.int64)
+    pos = 1
+    for i, s in enumerate(samples):
+        pcm[pos:pos + len(s)] = s
+        starts[i] = pos
+        lengths[i] = len(s)
+        pos += len(s)
+    return pcm, starts, lengths
+
+
+class VoiceMixer:
+    """
+    고정 용량 보이스 풀 기반 믹서.
+    보이스 상태는 미리 할당된 배열(샘플 번호, 시작 오프셋, 길이, 채널별 게인)에 저장되고,
+    믹싱은 재사용되는 스크래치 버퍼 위에서 NumPy 벡터 연산으로만 수행됩니다.
+    샘플과 출력은 모두 sample_format 하나로 통일되어 있어야 합니다.
+
+    bus='float32' 는 보이스를 [-1, 1) float32 로 합산하고 마스터 게인과 소프트 니 리미터를 거친 뒤
+    블록 끝에서 한 번만 출력 포맷으로 변환합니다. bus='int' 는 정수로 합산해 잘라내는 이전 경로입니다.
+    """
+
+    def __init__(self, channels, max_voices=32, max_frames=1024, steal_policy='oldest',
+                 sample_format='int16', bus='float32', master_gain=1.0, limiter_threshold=0.8):
+        if steal_policy not in STEAL_POLICIES:
+            raise ValueError(f"알 수 없는 보이스 스틸링 정책: {steal_policy}")
+        if sample_format not in MIX_PATHS:
+            raise ValueError(f"지원하지 않는 샘플 포맷: {sample_format}")
+        if bus not in BUSES:
+            raise ValueError(f"알 수 없는 믹싱 버스: {bus}")
+        self.channels = channels
+        self.max_voices = max_voices
+        self.steal_policy = steal_policy
+        self.sample_format = sample_format
+        self.bus = bus
+        self.master_gain = master_gain
+        # None 이면 리미터 없이 [-1, 1] 로 잘라냅니다 (float32 버스 전용)
+        self.limiter_threshold = limiter_threshold
+        dtype, acc_dtype, self._gain_shift, self._clip_lo, self._clip_hi = MIX_PATHS[sample_format]
+        self.dtype = np.dtype(dtype)
+        if bus == 'float32':
+            # 정수 샘플은 게인에 1/전체 스케일을 곱해 두어 합산과 동시에 [-1, 1) 로 바뀌게 합니다
+            self._acc_dtype = np.dtype(np.float32)
+            self._gain_shift = 0
+            self._gain_one = 1.0 / -self._clip_lo if self.dtype.kind == 'i' else 1.0
+            out_scale = np.float32(self._clip_hi)
+            if out_scale > self._clip_hi:
+                out_scale = np.nextafter(out_scale, np.float32(0))
+            self._out_scale = out_scale if self.dtype.kind == 'i' else None
+        else:
+            self._acc_dtype = np.dtype(acc_dtype)
+            self._gain_one = (1 << self._gain_shift) if self._gain_shift else 1.0
+
+        # 샘플 테이블
+        self.pcm = np.zeros((1, channels), dtype=self.dtype)
+        self.sample_start = np.zeros(0, dtype=np.int64)
+        self.sample_length = np.zeros(0, dtype=np.int64)
+        self.sample_peak = np.zeros(0, dtype=np.float32)
+        # 키 번호별 채널 게인 (set_key_gains). 트리거의 param 이 이 표의 행을 가리킵니다
+        self.key_gains = np.ones((0, channels), dtype=np.float32)
+
+        # 보이스 테이블 (앞쪽 self.active 개가 재생 중인 보이스)
+        self.active = 0
+        self.voice_sample = np.zeros(max_voices, dtype=np.int32)
+        self.voice_start = np.zeros(max_voices, dtype=np.int64)
+        self.voice_pos = np.zeros(max_voices, dtype=np.int64)
+        self.voice_length = np.zeros(max_voices, dtype=np.int64)
+        self.voice_gain = np.zeros((max_voices, channels), dtype=self._acc_dtype)
+        self.voice_serial = np.zeros(max_voices, dtype=np.int64)
+        self.voice_group = np.zeros(max_voices, dtype=np.int32)
+        self._voice_arrays = (self.voice_sample, self.voice_start, self.voice_pos,
+                              self.voice_length, self.voice_gain, self.voice_serial, self.voice_group)
+        # _retire 가 남은 보이스를 모을 때 쓰는 같은 모양의 버퍼
+        self._compact = tuple(np.empty_like(arr) for arr in self._voice_arrays)
+        self._serial = 0
+        self._done = np.zeros(max_voices, dtype=bool)
+        self._pending_keys = np.zeros(0, dtype=np.int32)
+        self._pending_times = np.zeros(0, dtype=np.int64)
+        self._pending_groups = np.zeros(0, dtype=np.int32)
+        self._pending_params = np.zeros(0, dtype=np.int32)
+        self._pending_table = None
+        self.table_generation = 0
+
+        # 통계
+        self.triggered = 0
+        self.stolen = 0
+        self.coalesced = 0
+        self.choked = 0
+
+        self._alloc_scratch(max_frames)
+
+    def _alloc_scratch(self, max_frames):
+        """
+        가장 큰 블록 크기에 맞는 스크래치 버퍼를 할당합니다. 생성할 때만 호출되며, 콜백에서는 할당하지 않으므로
+        mix() 는 max_frames 보다 큰 블록을 거부합니다.
+        """
+        n, c = self.max_voices, self.channels
+        self.max_frames = max_frames
+        self._ramp = np.arange(max_frames, dtype=np.int64)
+        self._index = np.empty(n * max_frames, dtype=np.int64)
+        self._valid = np.empty(n * max_frames, dtype=bool)
+        self._gather = np.empty(n * max_frames * c, dtype=self.dtype)
+        self._scaled = np.empty(n * max_frames * c, dtype=self._acc_dtype)
+        self._acc = np.empty(max_frames * c, dtype=self._acc_dtype)
+        self._mag = np.empty(max_frames * c, dtype=np.float32)
+        self._over = np.empty(max_frames * c, dtype=np.float32)
+        self._out = np.zeros(max_frames * c, dtype=self.dtype)
+
+    def load_samples(self, samples):
+        """믹서 샘플 포맷의 (frames, channels) 배열 목록을 샘플 테이블로 적재하고 슬롯 번호를 반환합니다."""
+        samples = [np.asarray(s, dtype=self.dtype).reshape(-1, self.channels) for s in samples]
+        pcm, starts, lengths = pack_samples(samples, self.channels, self.dtype)
+        peaks = [np.abs(s.astype(np.float64)).max() if len(s) else 0 for s in samples]
+        self.set_table(pcm, starts, lengths, peaks)
+        return list(range(len(samples)))
+
+    def set_table(self, pcm, starts, lengths, peaks):
+        """
+        이미 묶여 있는 PCM 배열(0번 프레임은 무음)을 복사 없이 샘플 테이블로 사용합니다.
+        np.memmap 도 그대로 넘길 수 있습니다.
+        """
+        if pcm.shape[1] != self.channels:
+            raise ValueError(f"채널 수가 맞지 않습니다: {pcm.shape[1]} != {self.channels}")
+        if pcm.dtype != self.dtype:
+            raise ValueError(f"샘플 포맷이 맞지 않습니다: {pcm.dtype} != {self.dtype}")
+        self.active = 0
+        self.pcm = pcm
+        self.sample_start = np.asarray(starts, dtype=np.int64)
+        self.sample_length = np.asarray(lengths, dtype=np.int64)
+        self.sample_peak = np.asarray(peaks, dtype=np.float32)
+
+    def set_key_gains(self, params):
+        """
+        키 번호별 (게인, 팬) 목록(None 은 기본값)으로 키 게인 표를 만들어 교체합니다.
+        다른 스레드에서 호출해도 표 전체를 한 번에 바꾸므로 안전합니다.
+        """
+        gains = np.ones((len(params), self.channels), dtype=np.float32)
+        for i, p in enumerate(params):
+            if p is not None:
+                gains[i] = channel_gains(self.channels, *p)
+        self.key_gains = gains
+
+    def request_table(self, pcm, starts, lengths, peaks, requires_idle=False):
+        """
+        다른 스레드에서 새 샘플 테이블을 예약합니다. 교체는 다음 블록 시작에서 오디오 스레드가 수행하므로
+        스트림은 멈추지 않습니다. 재생 중인 보이스는 기존 프레임 오프셋을 그대로 읽으므로, 새 pcm 은
+        기존 프레임을 같은 위치에 유지해야 합니다. 그럴 수 없는(압축된) 테이블은 requires_idle=True 로
+        예약하며, 재생 중인 보이스가 없는 블록에서만 적용됩니다.
+        """
+        self._pending_table = (pcm, np.asarray(starts, dtype=np.int64), np.asarray(lengths, dtype=np.int64),
+                               np.asarray(peaks, dtype=np.float32), requires_idle)
+
+    def _apply_pending_table(self):
+        pending = self._pending_table
+        if pending is None or (pending[4] and self.active):
+            return
+        self._pending_table = None
+        self.pcm, self.sample_start, self.sample_length, self.sample_peak = pending[:4]
+        self.table_generation += 1
+
+    def trigger(self, sample, gain=1.0, group=0, param=-1):
+        """
+        샘플 슬롯을 재생하는 보이스를 시작합니다. 풀이 가득 차면 정책에 따라 보이스를 뺏습니다.
+        group 이 0 이 아니면 같은 초크 그룹에서 재생 중인 보이스를 먼저 끊습니다.
+        param 이 키 게인 표의 행 번호면 그 키의 게인/팬을 적용합니다.
+        """
+        if not 0 <= sample < len(self.sample_length) or self.sample_length[sample] == 0:
+            return -1
+        if group and self.active:
+            choke = np.equal(self.voice_group[:self.active], group, out=self._done[:self.active])
+            if choke.any():
+                self.choked += int(choke.sum())
+                self._retire(choke)
+        if self.active < self.max_voices:
+            v = self.active
+            self.active += 1
+        else:
+            v = self._pick_victim()
+            self.stolen += 1
+        self._serial += 1
+        self.voice_sample[v] = sample
+        self.voice_start[v] = self.sample_start[sample]
+        self.voice_pos[v] = 0
+        self.voice_length[v] = self.sample_length[sample]
+        key_gains = self.key_gains
+        if 0 <= param < len(key_gains):
+            gain = key_gains[param] * gain
+        if self.bus == 'float32':
+            self.voice_gain[v] = gain * self._gain_one
+        else:
+            # 정수 버스에는 블록 단위 마스터 게인 단계가 없으므로 보이스 게인에 미리 곱합니다
+            self.voice_gain[v] = gain * self.master_gain * self._gain_one
+        self.voice_serial[v] = self._serial
+        self.voice_group[v] = group
+        self.triggered += 1
+        return v
+
+    def trigger_pending(self, ring, on_start=None):
+        """
+        트리거 링에 쌓인 이벤트를 모두 꺼내 보이스를 시작합니다. 오디오 콜백의 블록 시작에서 호출합니다.
+        on_start 가 있으면 시작된 보이스마다 눌린 시각(perf_counter_ns)으로 호출합니다.
+        한 블록에 max_voices 개보다 많이 쌓였다면 앞쪽 이벤트는 어차피 소리 나기 전에 뺏기므로
+        마지막 max_voices 개만 트리거합니다. 남은 이벤트는 _trigger_batch 가 한 번의 벡터 연산으로 시작하므로
+        콜백 작업량은 입력 폭주와 무관하게 제한됩니다. SEQUENTIAL_TRIGGERS 개 이하면 trigger() 를 차례로 부릅니다.
+        """
+        self._apply_pending_table()
+        if len(self._pending_keys) < ring.capacity:
+            self._pending_keys = np.zeros(ring.capacity, dtype=np.int32)
+            self._pending_times = np.zeros(ring.capacity, dtype=np.int64)
+            self._pending_groups = np.zeros(ring.capacity, dtype=np.int32)
+            self._pending_params = np.zeros(ring.capacity, dtype=np.int32)
+        n = ring.drain_into(self._pending_keys, self._pending_times, self._pending_groups, self._pending_params)
+        first = max(0, n - self.max_voices)
+        self.coalesced += first
+        if 0 < n - first <= SEQUENTIAL_TRIGGERS:
+            keys, groups, params = self._pending_keys, self._pending_groups, self._pending_params
+            for i in range(first, n):
+                v = self.trigger(int(keys[i]), group=int(groups[i]), param=int(params[i]))
+                if v >= 0 and on_start is not None:
+                    on_start(int(self._pending_times[i]))
+        elif n > first:
+            started = self._trigger_batch(self._pending_keys[first:n], self._pending_groups[first:n],
+                                          self._pending_params[first:n])
+            if on_start is not None:
+                for t_press in self._pending_times[first:n][started].tolist():
+                    on_start(t_press)
+        return n
+
+    def _trigger_batch(self, samples, groups, params):
+        """
+        max_voices 개 이하의 트리거를 trigger() 를 차례로 부른 것과 같은 결과로 한 번에 시작하고,
+        시작된 이벤트의 불리언 마스크를 반환합니다.
+          - 같은 초크 그룹의 이벤트는 마지막 것만 남고 앞의 것은 초크된 것으로 셉니다
+          - 빈 보이스가 모자라면 정책에 따라 기존 보이스에서 모자란 만큼 한꺼번에 고릅니다
+            (quietest 는 이번 배치에서 시작하는 보이스를 후보에서 뺍니다)
+        """
+        lengths = self.sample_length
+        if len(lengths) == 0:
+            return np.zeros(len(samples), dtype=bool)
+        ok = (samples >= 0) & (samples < len(lengths))
+        ok &= lengths[np.where(ok, samples, 0)] > 0
+        idx = np.flatnonzero(ok)
+        m = len(idx)
+        if m == 0:
+            return ok
+        self.triggered += m
+        g = groups[idx]
+        if g.any():
+            # 뒤에서부터 본 첫 등장 = 그룹의 마지막 이벤트
+            chokers, last = np.unique(g[::-1], return_index=True)
+            survive = g == 0
+            survive[m - 1 - last[chokers != 0]] = True
+            self.choked += m - int(np.count_nonzero(survive))
+            idx, g = idx[survive], g[survive]
+            m = len(idx)
+            chokers = chokers[chokers != 0]
+            a = self.active
+            if a:
+                choke = self._done[:a]
+                choke[:] = np.isin(self.voice_group[:a], chokers)
+                if choke.any():
+                    self.choked += int(np.count_nonzero(choke))
+                    self._retire(choke)
+
+        a = self.active
+        free = self.max_voices - a
+        if m <= free:
+            slots = np.arange(a, a + m)
+            self.active = a + m
+        else:
+            steal = m - free
+            if self.steal_policy == 'oldest':
+                key = self.voice_serial[:a]
+            else:
+                remaining = 1.0 - self.voice_pos[:a] / self.voice_length[:a]
+                key = self.sample_peak[self.voice_sample[:a]] * self.voice_gain[:a].max(axis=1) * remaining
+            victims = np.argpartition(key, steal - 1)[:steal] if steal < a else np.arange(a)
+            slots = np.concatenate((np.arange(a, self.max_voices), victims))
+            self.stolen += steal
+            self.active = self.max_voices
+
+        smp = samples[idx]
+        self.voice_sample[slots] = smp
+        self.voice_start[slots] = self.sample_start[smp]
+        self.voice_pos[slots] = 0
+        self.voice_length[slots] = lengths[smp]
+        scale = self._gain_one if self.bus == 'float32' else self.master_gain * self._gain_one
+        p = params[idx]
+        has_param = (p >= 0) & (p < len(self.key_gains))
+        if has_param.any():
+            gains = np.ones((m, self.channels), dtype=np.float32)
+            gains[has_param] = self.key_gains[p[has_param]]
+            self.voice_gain[slots] = gains * scale
+        else:
+            self.voice_gain[slots] = scale
+        self.voice_serial[slots] = np.arange(self._serial + 1, self._serial + 1 + m)
+        self._serial += m
+        self.voice_group[slots] = g
+        return ok
+
+    def _pick_victim(self):
+        """스틸링 정책에 따라 교체할 보이스 번호를 고릅니다."""
+        n = self.active
+        if self.steal_policy == 'oldest':
+            return int(np.argmin(self.voice_serial[:n]))
+        # 남은 길이 비율로 감쇠를 근사한 현재 레벨이 가장 작은 보이스
+        remaining = 1.0 - self.voice_pos[:n] / self.voice_length[:n]
+        level = self.sample_peak[self.voice_sample[:n]] * self.voice_gain[:n].max(axis=1) * remaining
+        return int(np.argmin(level))
+
+    def mix(self, frame_count):
+        """frame_count 프레임을 믹싱해 인터리브된 출력 배열(재사용 버퍼의 뷰)로 반환합니다."""
+        self._apply_pending_table()
+        if frame_count > self.max_frames:
+            raise ValueError(f"블록 크기 {frame_count} 가 믹서 버퍼({self.max_frames} 프레임)보다 큽니다")
+        f, c, n = frame_count, self.channels, self.active
+        out = self._out[:f * c]
+        if n == 0:
+            out.fill(0)
+            return out
+
+        # 각 보이스가 읽을 PCM 프레임 번호 (n, f)
+        index = self._index[:n * f].reshape(n, f)
+        valid = self._valid[:n * f].reshape(n, f)
+        np.add(self.voice_pos[:n, None], self._ramp[None, :f], out=index)
+        np.less(index, self.voice_length[:n, None], out=valid)
+        np.add(index, self.voice_start[:n, None], out=index)
+        # 샘플 끝을 넘어선 위치는 0번(무음) 프레임을 가리키게 합니다
+        np.multiply(index, valid, out=index)
+
+        gather = self._gather[:n * f * c].reshape(n, f, c)
+        np.take(self.pcm, index, axis=0, out=gather, mode='clip')
+        scaled = self._scaled[:n * f * c].reshape(n, f, c)
+        np.multiply(gather, self.voice_gain[:n, None, :], out=scaled)
+        if self._gain_shift:
+            np.right_shift(scaled, self._gain_shift, out=scaled)
+        acc = self._acc[:f * c].reshape(f, c)
+        np.sum(scaled, axis=0, out=acc)
+        if self.bus == 'float32':
+            self._limit(acc.reshape(-1))
+            if self._out_scale is not None:
+                np.multiply(acc, self._out_scale, out=acc)
+                np.rint(acc, out=acc)
+        else:
+            np.clip(acc, self._clip_lo, self._clip_hi, out=acc)
+        np.copyto(out.reshape(f, c), acc, casting='unsafe')
+
+        self.voice_pos[:n] += f
+        done = np.greater_equal(self.voice_pos[:n], self.voice_length[:n], out=self._done[:n])
+        if done.any():
+            self._retire(done)
+        return out
+
+    def _limit(self, x):
+        """
+        float 버스에 마스터 게인과 소프트 니 리미터를 제자리에서 적용합니다.
+        |x| 가 threshold 를 넘는 부분은 tanh 로 눌러 출력이 1 을 넘지 않게 합니다.
+            y = sign(x) * (min(|x|, t) + (1 - t) * tanh(max(|x| - t, 0) / (1 - t)))
+        threshold 가 1 이상이면 니 구간이 없으므로 잘라내기와 같습니다.
+        """
+        if self.master_gain != 1.0:
+            np.multiply(x, self.master_gain, out=x)
+        t = self.limiter_threshold
+        if t is None or t >= 1.0:
+            np.clip(x, -1.0, 1.0, out=x)
+            return
+        knee = 1.0 - t
+        mag = self._mag[:len(x)]
+        over = self._over[:len(x)]
+        np.abs(x, out=mag)
+        np.subtract(mag, t, out=over)
+        np.maximum(over, 0.0, out=over)
+        np.multiply(over, 1.0 / knee, out=over)
+        np.tanh(over, out=over)
+        np.multiply(over, knee, out=over)
+        np.minimum(mag, t, out=mag)
+        np.add(mag, over, out=mag)
+        np.copysign(mag, x, out=x)
+
+    def _retire(self, done):
+        """끝난 보이스(done 은 덮어씁니다)를 제거하고 남은 보이스를 미리 할당한 버퍼로 테이블 앞쪽에 모읍니다."""
+        n = self.active
+        keep = np.logical_not(done, out=done)
+        k = int(np.count_nonzero(keep))
+        for arr, tmp in zip(self._voice_arrays, self._compact):
+            np.compress(keep, arr[:n], axis=0, out=tmp[:k])
+            arr[:k] = tmp[:k]
+        self.active = k
@@ -0,0 +1,399 @@
+"""
+오디오 출력 백엔드.
+
+SoundEngine 은 블록 하나를 믹싱해 돌려주는 render(frame_count, status, time_info) 만 제공하고,
+그 블록을 언제 어디로 내보낼지는 출력 백엔드가 정합니다.
+
+    callback  : PyAudio 콜백 스트림 (기본값, 가장 짧은 지연)
+    blocking  : PyAudio 블로킹 쓰기 스트림. 전용 스레드가 stream.write() 로 블록을 밀어 넣습니다
+                (콜백 스트림이 불안정한 호스트 API 용)
+    null      : 실시간 속도로 믹싱만 하고 버립니다 (오디오 장치가 없는 서버, 테스트)
+    file      : 실시간 속도로 믹싱해 WAV(.wav) 또는 원시 PCM 파일로 씁니다
+
+장치 목록 보기:
+    python -m keyboard_sound.output
+"""
+
+import logging
+import threading
+import time
+import wave
+
+from keyboard_sound.metrics import PA_OUTPUT_UNDERFLOW
+
+OUTPUTS = ('callback', 'blocking', 'null', 'file')
+
+
+def _pyaudio_formats(pyaudio):
+    return {'int16': pyaudio.paInt16, 'int32': pyaudio.paInt32, 'float32': pyaudio.paFloat32}
+
+
+def find_device(pa, device):
+    """
+    장치 번호(정수 또는 숫자 문자열)나 이름의 일부로 출력 장치 번호를 찾습니다.
+    None 이면 기본 장치(None)를 반환합니다.
+    """
+    if device is None:
+        return None
+    if isinstance(device, int) or str(device).isdigit():
+        return int(device)
+    needle = str(device).lower()
+    for i in range(pa.get_device_count()):
+        info = pa.get_device_info_by_index(i)
+        if info.get('maxOutputChannels', 0) > 0 and needle in info.get('name', '').lower():
+            return i
+    raise ValueError(f"출력 장치를 찾을 수 없음: {device}")
+
+
+def list_devices():
+    """출력 가능한 PyAudio 장치들의 (번호, 이름, 기본 샘플레이트) 목록."""
+    import pyaudio
+
+    pa = pyaudio.PyAudio()
+    try:
+        devices = []
+        for i in range(pa.get_device_count()):
+            info = pa.get_device_info_by_index(i)
+            if info.get('maxOutputChannels', 0) > 0:
+                devices.append((i, info['name'], int(info.get('defaultSampleRate', 0))))
+        return devices
+    finally:
+        pa.terminate()
+
+
+class Output:
+    """출력 백엔드 공통 인터페이스."""
+
+    name = None
+
+    def __init__(self):
+        self.format = None
+        self.block = None
+        self.render = None
+
+    def open(self, fmt, block, render):
+        """스트림 포맷, 블록 크기(프레임), 블록을 만들어 주는 render 함수를 정합니다."""
+        self.format = fmt
+        self.block = block
+        self.render = render
+
+    @property
+    def device_key(self):
+        """블록 크기 자동 조정 결과를 저장할 때 쓰는 장치 식별 문자열."""
+        return f"{self.name}:{getattr(self, 'device', None) or 'default'}"
+
+    @property
+    def spec(self):
+        """다른 프로세스에서 make_output(*spec) 으로 같은 백엔드를 만들 때 쓰는 (name, path, device)."""
+        return self.name, getattr(self, 'path', None), getattr(self, 'device', None)
+
+    def start(self):
+        raise NotImplementedError
+
+    def close(self):
+        raise NotImplementedError
+
+    def restart(self, block):
+        """블록 크기를 바꿔 스트림을 다시 엽니다."""
+        self.close()
+        self.block = block
+        self.start()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.name})"
+
+
+class PyAudioCallbackOutput(Output):
+    """PyAudio 콜백 스트림. 오디오 스레드가 블록마다 render 를 직접 호출합니다."""
+
+    name = 'callback'
+
+    def __init__(self, device=None):
+        super().__init__()
+        self.device = device
+        self._pa = None
+        self._stream = None
+        self._continue = 0
+
+    def _callback(self, in_data, frame_count, time_info, status):
+        return (self.render(frame_count, status, time_info).tobytes(), self._continue)
+
+    def start(self):
+        import pyaudio
+
+        self._continue = pyaudio.paContinue
+        self._pa = pyaudio.PyAudio()
+        self._stream = self._pa.open(
+            format=_pyaudio_formats(pyaudio)[self.format.sample_format],
+            channels=self.format.channels,
+            rate=self.format.rate,
+            output=True,
+            output_device_index=find_device(self._pa, self.device),
+            frames_per_buffer=self.block,
+            stream_callback=self._callback
+        )
+        self._stream.start_stream()
+
+    def close(self):
+        if self._stream is not None:
+            self._stream.stop_stream()
+            self._stream.close()
+            self._stream = None
+        if self._pa is not None:
+            self._pa.terminate()
+            self._pa = None
+
+
+class _ThreadedOutput(Output):
+    """전용 스레드에서 블록을 만들어 내보내는 백엔드의 공통 부분."""
+
+    def __init__(self):
+        super().__init__()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"output-{self.name}", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        raise NotImplementedError
+
+    def close(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+
+class PyAudioBlockingOutput(_ThreadedOutput):
+    """PyAudio 블로킹 쓰기 스트림. 장치 버퍼에 자리가 날 때까지 write() 가 기다립니다."""
+
+    name = 'blocking'
+
+    def __init__(self, device=None):
+        super().__init__()
+        self.device = device
+        self._pa = None
+        self._stream = None
+
+    def start(self):
+        import pyaudio
+
+        self._pa = pyaudio.PyAudio()
+        self._stream = self._pa.open(
+            format=_pyaudio_formats(pyaudio)[self.format.sample_format],
+            channels=self.format.channels,
+            rate=self.format.rate,
+            output=True,
+            output_device_index=find_device(self._pa, self.device),
+            frames_per_buffer=self.block
+        )
+        super().start()
+
+    def _run(self):
+        stream, render, block = self._stream, self.render, self.block
+        while not self._stop.is_set():
+            stream.write(render(block).tobytes(), block)
+
+    def close(self):
+        super().close()
+        if self._stream is not None:
+            self._stream.stop_stream()
+            self._stream.close()
+            self._stream = None
+        if self._pa is not None:
+            self._pa.terminate()
+            self._pa = None
+
+
+class _PacedOutput(_ThreadedOutput):
+    """
+    블록 주기(block / rate)에 맞춰 render 를 호출하는 가상 장치. 블록을 제 시간에 만들지 못하면
+    다음 블록을 언더런 status 로 렌더링해 지연 계측에 잡히게 하고, 밀린 주기는 건너뜁니다.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.blocks = 0
+        self.underruns = 0
+
+    def write(self, chunk):
+        pass
+
+    def _run(self):
+        render, block = self.render, self.block
+        period = block / self.format.rate
+        next_t = time.perf_counter()
+        status = 0
+        while not self._stop.is_set():
+            self.write(render(block, status))
+            self.blocks += 1
+            next_t += period
+            delay = next_t - time.perf_counter()
+            if delay > 0:
+                status = 0
+                self._stop.wait(delay)
+            else:
+                status = PA_OUTPUT_UNDERFLOW
+                self.underruns += 1
+                next_t = time.perf_counter()
+
+    def restart(self, block):
+        # 가상 장치는 스레드만 다시 띄웁니다 (file 출력은 같은 파일에 이어서 씁니다)
+        _ThreadedOutput.close(self)
+        self.block = block
+        _ThreadedOutput.start(self)
+
+    def close(self):
+        super().close()
+        if self.blocks:
+            logging.info(f"{self.name} output: {self.blocks} blocks, {self.underruns} underruns")
+
+
+class NullOutput(_PacedOutput):
+    """실시간 속도로 믹싱한 블록을 버립니다."""
+
+    name = 'null'
+
+
+class FileOutput(_PacedOutput):
+    """
+    실시간 속도로 믹싱한 블록을 파일에 씁니다. 경로가 .wav 로 끝나면 WAV, 아니면 스트림 포맷 그대로의
+    인터리브된 원시 PCM 입니다. wave 모듈은 정수 PCM 만 쓰므로 float32 스트림은 WAV 에 int16 으로 씁니다.
+    """
+
+    name = 'file'
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self._file = None
+        self._wav = None
+        self._file_format = None
+        # 명령줄 파싱만 하는 경우 numpy 를 불러오지 않도록 쓸 때 가져옵니다
+        from keyboard_sound.formats import from_float
+        self._from_float = from_float
+
+    def start(self):
+        from keyboard_sound.formats import SAMPLE_FORMATS
+
+        if self.path.lower().endswith('.wav'):
+            self._file_format = 'int16' if self.format.sample_format == 'float32' else self.format.sample_format
+            self._wav = wave.open(self.path, 'wb')
+            self._wav.setnchannels(self.format.channels)
+            self._wav.setsampwidth(SAMPLE_FORMATS[self._file_format][1])
+            self._wav.setframerate(self.format.rate)
+        else:
+            self._file = open(self.path, 'wb')
+        super().start()
+
+    def write(self, chunk):
+        if self._wav is not None:
+            if self._file_format != self.format.sample_format:
+                chunk = self._from_float(chunk, self._file_format)
+            self._wav.writeframes(chunk.tobytes())
+        else:
+            self._file.write(chunk.tobytes())
+
+    def close(self):
+        super().close()
+        if self._wav is not None:
+            self._wav.close()
+            self._wav = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class SimulatedOutput(_ThreadedOutput):
+    """
+    블록 크기 자동 조정 시험용 가상 장치. 실제 시간의 speed 배 속도로 블록을 렌더링하면서,
+    실제 믹싱 시간에 콜백당 고정 부하(overhead_us)와 확률 spike_rate 로 생기는 부하 스파이크(spike_us)를
+    더한 값이 블록 주기를 넘으면 다음 블록을 언더런 status 로 렌더링합니다. audio_time 은 진행한 오디오 시간(초)입니다.
+    """
+
+    name = 'simulated'
+
+    def __init__(self, overhead_us=0.0, spike_us=0.0, spike_rate=0.0, speed=10.0, seed=0):
+        import numpy as np
+
+        super().__init__()
+        self.speed = speed
+        self.overhead_ns = overhead_us * 1000.0
+        self.spike_ns = spike_us * 1000.0
+        self.spike_rate = spike_rate
+        self._rng = np.random.default_rng(seed)
+        self.blocks = 0
+        self.underruns = 0
+        self.audio_time = 0.0
+
+    def _run(self):
+        render, block = self.render, self.block
+        period_ns = block * 1e9 / self.format.rate
+        spikes = self._rng.random(4096) < self.spike_rate
+        status = 0
+        next_t = time.perf_counter()
+        while not self._stop.is_set():
+            t0 = time.perf_counter_ns()
+            render(block, status)
+            cost = time.perf_counter_ns() - t0 + self.overhead_ns
+            if spikes[self.blocks & 4095]:
+                cost += self.spike_ns
+            self.blocks += 1
+            self.audio_time += block / self.format.rate
+            status = PA_OUTPUT_UNDERFLOW if cost > period_ns else 0
+            if status:
+                self.underruns += 1
+            next_t += period_ns / 1e9 / self.speed
+            delay = next_t - time.perf_counter()
+            if delay > 0:
+                self._stop.wait(delay)
+
+
+def make_output(name='callback', path=None, device=None):
+    """이름으로 출력 백엔드를 만듭니다. 'file' 은 path 가 필요합니다."""
+    if name == 'callback':
+        return PyAudioCallbackOutput(device)
+    if name == 'blocking':
+        return PyAudioBlockingOutput(device)
+    if name == 'null':
+        return NullOutput()
+    if name == 'file':
+        if not path:
+            raise ValueError("file 출력에는 파일 경로가 필요합니다")
+        return FileOutput(path)
+    raise ValueError(f"알 수 없는 출력 백엔드: {name}")
+
+
+def add_output_arguments(parser, rate=44100, block=64):
+    """출력 백엔드, 샘플레이트, 블록 크기, 장치 선택 인자를 argparse 파서에 추가합니다."""
+    group = parser.add_argument_group("오디오 출력")
+    group.add_argument('--output', choices=OUTPUTS, default='callback',
+                       help="출력 백엔드 (기본 callback)")
+    group.add_argument('--output-file', metavar='PATH', help="file 출력의 경로 (.wav 또는 원시 PCM)")
+    group.add_argument('--rate', type=int, default=rate, help=f"샘플레이트 (기본 {rate})")
+    group.add_argument('--block', type=int,
+                       help=f"콜백당 프레임 수 (기본 {block}, --autotune 이면 저장된 크기나 가장 작은 후보에서 시작)")
+    group.add_argument('--device', help="출력 장치 번호나 이름 일부 (python -m keyboard_sound.output 으로 목록 확인)")
+    group.add_argument('--autotune', action='store_true',
+                       help="언더런과 콜백 시간을 보며 블록 크기를 자동으로 고르고 장치별로 저장합니다")
+    group.add_argument('--process', action='store_true',
+                       help="믹서와 출력 스트림을 별도 프로세스에서 실행합니다 (키 입력은 공유 메모리 링으로 전달)")
+    return group
+
+
+def output_from_args(args):
+    """add_output_arguments 로 파싱한 인자로 출력 백엔드를 만듭니다. --output-file 만 주면 file 출력입니다."""
+    name = 'file' if args.output_file and args.output == 'callback' else args.output
+    return make_output(name, args.output_file, args.device)
+
+
+def main():
+    for index, name, rate in list_devices():
+        print(f"{index:>3}  {name}  ({rate} Hz)")
+
+
+if __name__ == '__main__':
+    main()
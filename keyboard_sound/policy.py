@@ -0,0 +1,97 @@
+"""
+키 입력 정책: 오토 리피트와 입력 폭주가 보이스를 쏟아내지 않도록 트리거를 거릅니다.
+
+리스너 스레드에서 키 이벤트마다 정수 키 번호(keyboard_sound.keymap)로 호출되며,
+정수 비교와 리스트/딕셔너리 조회만 합니다. 설정은 키 이름으로 받고 bind() 에서 키 번호로 컴파일합니다.
+
+    repeat       : 뗀 적 없이 다시 들어온 누름(OS 오토 리피트) 처리
+                   'ignore' - 무시, 'sample' - "<키>:repeat" 로 매핑된 샘플 재생, 'allow' - 그대로 재생
+    min_interval : 같은 키를 다시 트리거하기까지의 최소 간격 (ms, 키별로 따로 지정 가능)
+    choke_groups : 같은 그룹의 새 트리거가 그 그룹에서 재생 중인 보이스를 끊습니다
+    max_rate     : 전체 트리거 수 제한 (초당, 토큰 버킷)
+"""
+
+REPEAT_MODES = ('ignore', 'sample', 'allow')
+
+SUPPRESS_REASONS = ('repeat', 'interval', 'rate')
+
+
+class InputPolicy:
+    """키 누름마다 트리거 여부와 초크 그룹을 정합니다."""
+
+    def __init__(self, repeat='ignore', min_interval_ms=0, key_interval_ms=None, choke_groups=(),
+                 max_rate=None, burst=None):
+        if repeat not in REPEAT_MODES:
+            raise ValueError(f"알 수 없는 리피트 정책: {repeat}")
+        self.repeat = repeat
+        self.min_interval_ns = int(min_interval_ms * 1e6)
+        self.key_interval_ns = {k: int(ms * 1e6) for k, ms in (key_interval_ms or {}).items()}
+        # 그룹 번호는 1부터 (0 은 초크 없음)
+        self.group_of = {}
+        for i, keys in enumerate(choke_groups, start=1):
+            for k in keys:
+                self.group_of[k] = i
+        self.max_rate = max_rate
+        self.burst = burst if burst is not None else (max_rate or 0)
+        self._tokens = float(self.burst)
+        self._refilled = None
+
+        # 키 번호로 인덱싱하는 컴파일된 설정
+        self._groups = []
+        self._intervals = []
+        self._held = set()
+        self._last = {}
+        # 마지막으로 허용한 누름이 리피트 샘플을 재생해야 하는지
+        self.repeating = False
+
+        # 통계
+        self.allowed = 0
+        self.repeat_samples = 0
+        self.suppressed = dict.fromkeys(SUPPRESS_REASONS, 0)
+
+    def bind(self, keymap):
+        """키 이름 설정을 keymap 의 키 번호로 컴파일합니다. keymap 이 다시 컴파일될 때마다 호출합니다."""
+        self._groups = [self.group_of.get(name, 0) for name in keymap.names]
+        self._intervals = [self.key_interval_ns.get(name, self.min_interval_ns) for name in keymap.names]
+
+    def press(self, kid, t_ns):
+        """
+        키 번호 kid 의 누름을 판정합니다. 트리거하지 않으면 -1, 트리거하면 초크 그룹(0 은 없음)을 반환합니다.
+        """
+        repeating = False
+        if kid in self._held:
+            if self.repeat == 'ignore':
+                self.suppressed['repeat'] += 1
+                return -1
+            repeating = self.repeat == 'sample'
+        else:
+            self._held.add(kid)
+
+        interval = self._intervals[kid] if kid < len(self._intervals) else self.min_interval_ns
+        last = self._last.get(kid)
+        if interval and last is not None and t_ns - last < interval:
+            self.suppressed['interval'] += 1
+            return -1
+
+        if self.max_rate:
+            if self._refilled is not None:
+                self._tokens = min(self.burst, self._tokens + (t_ns - self._refilled) * self.max_rate / 1e9)
+            self._refilled = t_ns
+            if self._tokens < 1.0:
+                self.suppressed['rate'] += 1
+                return -1
+            self._tokens -= 1.0
+
+        self._last[kid] = t_ns
+        self.allowed += 1
+        self.repeating = repeating
+        return self._groups[kid] if kid < len(self._groups) else 0
+
+    def release(self, kid):
+        self._held.discard(kid)
+
+    def summary(self):
+        """허용/억제 수 요약 문자열."""
+        suppressed = ", ".join(f"{reason} {n}" for reason, n in self.suppressed.items())
+        return (f"input policy: {self.allowed} triggers ({self.repeat_samples} repeat samples), "
+                f"suppressed {sum(self.suppressed.values())} ({suppressed})")
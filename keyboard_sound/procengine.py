@@ -0,0 +1,497 @@
+"""
+별도 프로세스 오디오 엔진.
+
+ProcessEngine 은 SoundEngine 과 같은 인터페이스를 갖지만 믹서와 출력 스트림을 spawn 한 자식 프로세스에서
+돌립니다. 프론트엔드(CLI 의 키 리스너와 로깅, GUI 의 Tk 메인 루프)가 GIL 을 오래 잡거나 GC 로 멈춰도
+오디오 콜백은 자기 인터프리터에서 제때 돌 수 있습니다.
+
+    트리거      : SharedTriggerRing (공유 메모리). 프론트엔드는 키마다 정수 네 개만 씁니다
+    샘플 테이블 : 디코딩과 적재는 프론트엔드가 하고, 묶은 PCM 을 새 공유 메모리 블록에 한 번 복사해 이름만
+                  보냅니다. 사운드 뱅크는 파일 경로만 보내고 자식이 같은 파일을 메모리 매핑합니다
+    상태        : table_generation, 재생 중인 보이스 수, 현재 블록 크기는 공유 메모리 int64 배열로 읽습니다
+    제어        : 샘플 테이블, 키 게인 표, 블록 크기, 시작/종료는 파이프 메시지입니다
+
+블록 크기 자동 조정과 지연/지터 계측은 콜백이 도는 자식 프로세스에서 합니다. 프론트엔드의 BlockTuner,
+LatencyMonitor, JitterMeter 는 refresh_stats() 를 부를 때(주기적/시그널 보고 직전)와 종료할 때 자식의
+값으로 바뀝니다. 메모리 예산(LRU) 모드는 지원하지 않습니다.
+
+단일 프로세스와 콜백 지터 비교 (프론트엔드 스레드에 GIL/GC 부하를 주면서 null 출력으로 실행):
+    python -m keyboard_sound.procengine --duration 10
+"""
+
+import argparse
+import gc
+import logging
+import multiprocessing
+import threading
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from keyboard_sound.engine import SoundEngine
+from keyboard_sound.formats import SAMPLE_FORMATS
+from keyboard_sound.mixer import pack_samples
+from keyboard_sound.output import PyAudioCallbackOutput, make_output
+from keyboard_sound.ring import SharedTriggerRing
+
+# 공유 상태 배열의 칸
+GENERATION, ACTIVE, CHOKED, STOLEN, BLOCK = range(5)
+STATUS_SIZE = 8
+
+START_TIMEOUT = 10.0  # 초, 자식 프로세스가 스트림을 열 때까지 기다리는 최대 시간
+CLOSE_TIMEOUT = 5.0
+STATS_TIMEOUT = 1.0
+
+
+def _unlink(name):
+    shm = shared_memory.SharedMemory(name=name)
+    shm.close()
+    shm.unlink()
+
+
+class MixerProxy:
+    """
+    프론트엔드에서 VoiceMixer 자리를 대신합니다. HotReloader, SoundBank.attach, 키 테이블 컴파일이 쓰는
+    메서드만 제공하고, 실제 믹싱은 자식 프로세스의 VoiceMixer 가 합니다.
+    자식이 연결되기 전의 테이블과 키 게인 표는 마지막 것만 남겨 두었다가 연결할 때 보냅니다.
+    """
+
+    def __init__(self, channels, max_voices=32, max_frames=1024, sample_format='int16', **options):
+        self.channels = channels
+        self.max_voices = max_voices
+        self.max_frames = max_frames
+        self.sample_format = sample_format
+        self.dtype = np.dtype(SAMPLE_FORMATS[sample_format][0])
+        self.pcm = np.zeros((1, channels), dtype=self.dtype)
+        self.sample_start = np.zeros(0, dtype=np.int64)
+        self.sample_length = np.zeros(0, dtype=np.int64)
+        self.sample_peak = np.zeros(0, dtype=np.float32)
+        self._status_shm = shared_memory.SharedMemory(create=True, size=STATUS_SIZE * 8)
+        self.status_name = self._status_shm.name
+        self.status = np.ndarray(STATUS_SIZE, dtype=np.int64, buffer=self._status_shm.buf)
+        self.status[:] = 0
+        self._conn = None
+        self._backlog = {}
+        # 로더 스레드(테이블)와 리스너 스레드(키 게인)가 함께 보냅니다
+        self._lock = threading.Lock()
+
+    @property
+    def table_generation(self):
+        return int(self.status[GENERATION])
+
+    @property
+    def active(self):
+        return int(self.status[ACTIVE])
+
+    @property
+    def choked(self):
+        return int(self.status[CHOKED])
+
+    @property
+    def stolen(self):
+        return int(self.status[STOLEN])
+
+    def load_samples(self, samples):
+        """VoiceMixer.load_samples 와 같습니다."""
+        samples = [np.asarray(s, dtype=self.dtype).reshape(-1, self.channels) for s in samples]
+        pcm, starts, lengths = pack_samples(samples, self.channels, self.dtype)
+        peaks = [np.abs(s.astype(np.float64)).max() if len(s) else 0 for s in samples]
+        self.set_table(pcm, starts, lengths, peaks)
+        return list(range(len(samples)))
+
+    def set_table(self, pcm, starts, lengths, peaks):
+        """
+        샘플 테이블을 정합니다. 스트림이 돌고 있으면 자식 쪽에서는 재생 중인 보이스가 없는 블록에서
+        적용됩니다 (request_table(requires_idle=True) 와 같습니다).
+        """
+        if pcm.shape[1] != self.channels:
+            raise ValueError(f"채널 수가 맞지 않습니다: {pcm.shape[1]} != {self.channels}")
+        if pcm.dtype != self.dtype:
+            raise ValueError(f"샘플 포맷이 맞지 않습니다: {pcm.dtype} != {self.dtype}")
+        self.pcm = pcm
+        self.sample_start = np.asarray(starts, dtype=np.int64)
+        self.sample_length = np.asarray(lengths, dtype=np.int64)
+        self.sample_peak = np.asarray(peaks, dtype=np.float32)
+        self.request_table(pcm, starts, lengths, peaks, requires_idle=True)
+
+    def request_table(self, pcm, starts, lengths, peaks, requires_idle=False):
+        """
+        새 샘플 테이블을 자식 프로세스로 보냅니다. 메모리 매핑된 뱅크는 파일 위치만, 그 밖의 PCM 은
+        새 공유 메모리 블록에 복사해 이름만 보냅니다. 이름은 자식이 붙은 뒤 지웁니다.
+        """
+        if isinstance(pcm, np.memmap) and pcm.filename:
+            ref = ('memmap', pcm.filename, pcm.offset, pcm.dtype.str, pcm.shape)
+        else:
+            shm = shared_memory.SharedMemory(create=True, size=max(pcm.nbytes, 1))
+            view = np.ndarray(pcm.shape, dtype=pcm.dtype, buffer=shm.buf)
+            view[:] = pcm
+            del view
+            shm.close()
+            ref = ('shm', shm.name, pcm.dtype.str, pcm.shape)
+        self._post(('table', ref, np.asarray(starts, dtype=np.int64), np.asarray(lengths, dtype=np.int64),
+                    np.asarray(peaks, dtype=np.float32), requires_idle))
+
+    def set_key_gains(self, params):
+        self._post(('key_gains', list(params)))
+
+    def send(self, msg):
+        self._post(msg)
+
+    def _post(self, msg):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.send(msg)
+                return
+            old = self._backlog.get(msg[0])
+            if old is not None and old[0] == 'table':
+                self._discard(old)
+            self._backlog[msg[0]] = msg
+
+    @staticmethod
+    def _discard(msg):
+        if msg[0] == 'table' and msg[1][0] == 'shm':
+            _unlink(msg[1][1])
+
+    def connect(self, conn):
+        """자식 프로세스와의 파이프를 연결하고 쌓아 둔 테이블과 키 게인 표를 보냅니다."""
+        with self._lock:
+            for kind in ('table', 'key_gains'):
+                msg = self._backlog.pop(kind, None)
+                if msg is not None:
+                    conn.send(msg)
+            self._conn = conn
+
+    def disconnect(self):
+        with self._lock:
+            self._conn = None
+
+    def release(self):
+        """보내지 못한 테이블을 지우고 상태 배열을 마지막 값의 복사본으로 바꾼 뒤 공유 메모리를 놓습니다."""
+        with self._lock:
+            for msg in self._backlog.values():
+                self._discard(msg)
+            self._backlog.clear()
+        if self._status_shm is not None:
+            self.status = self.status.copy()
+            self._status_shm.close()
+            self._status_shm.unlink()
+            self._status_shm = None
+
+
+class ProcessEngine(SoundEngine):
+    """믹서와 출력 스트림을 자식 프로세스에서 돌리는 SoundEngine."""
+
+    def __init__(self, *args, **kwargs):
+        self._process = None
+        self._conn = None
+        self._released = False
+        # 자식에게서 오는 응답(통계)을 받는 쪽은 한 번에 하나만
+        self._recv_lock = threading.Lock()
+        super().__init__(*args, **kwargs)
+
+    def _create_mixer(self, max_frames):
+        return MixerProxy(self.format.channels, max_frames=max_frames, sample_format=self.format.sample_format,
+                          **self.mixer_options)
+
+    def _create_ring(self, capacity):
+        return SharedTriggerRing(capacity)
+
+    @property
+    def block(self):
+        """현재 블록 크기. 실행 중에는 자식 프로세스(자동 조정 포함)의 값을 읽습니다."""
+        if self._process is not None:
+            return int(self.mixer.status[BLOCK]) or self._block
+        return self._block
+
+    @block.setter
+    def block(self, value):
+        self._block = value
+
+    def use_budget(self, mapping, budget_bytes, **kwargs):
+        raise NotImplementedError("메모리 예산(LRU) 모드는 프로세스 엔진에서 지원하지 않습니다")
+
+    def start(self, watch_interval=None, output=None):
+        """
+        자식 프로세스를 띄워 output 과 같은 설정(Output.spec)의 출력 백엔드를 열게 합니다.
+        self.output 에 남는 객체는 이름과 설정만 나타내며 이 프로세스에서 열리지 않습니다.
+        """
+        if output is None:
+            output = PyAudioCallbackOutput()
+        ctx = multiprocessing.get_context('spawn')
+        conn, child_conn = ctx.Pipe()
+        options = dict(self.mixer_options, block=self._block, autotune=self.autotune, latency=self.latency,
+                       jitter=self.jitter)
+        spec = dict(format=self.format, options=options, ring=(self.ring.name, self.ring.capacity),
+                    status=self.mixer.status_name, output=output.spec)
+        process = ctx.Process(target=_engine_main, args=(child_conn, spec), name="sound-engine", daemon=True)
+        process.start()
+        child_conn.close()
+        self.mixer.connect(conn)
+        self.mixer.send(('start',))
+        reply = conn.recv() if conn.poll(START_TIMEOUT) else ('error', "응답 시간 초과")
+        if reply[0] != 'started':
+            self.mixer.disconnect()
+            conn.close()
+            process.join(CLOSE_TIMEOUT)
+            if process.is_alive():
+                process.terminate()
+            raise RuntimeError(f"오디오 엔진 프로세스를 시작하지 못했습니다: {reply[1]}")
+        self._process, self._conn = process, conn
+        self.output = output
+        if watch_interval and self.reloader is not None and self.reloader.mapping_file:
+            self.reloader.interval = watch_interval
+            self.reloader.start()
+
+    def set_block(self, block):
+        if block > self.mixer.max_frames:
+            raise ValueError(f"블록 크기 {block} 가 믹서 버퍼({self.mixer.max_frames} 프레임)보다 큽니다")
+        self._block = block
+        if self._process is not None:
+            self.mixer.send(('block', block))
+
+    def _receive(self, kind, timeout):
+        """kind 응답이 올 때까지 (timeout 초) 받습니다. 앞서 시간 초과로 버려진 응답은 건너뜁니다."""
+        deadline = time.monotonic() + timeout
+        while self._conn.poll(max(0.0, deadline - time.monotonic())):
+            msg = self._conn.recv()
+            if msg[0] == kind:
+                return msg[1]
+        return None
+
+    def _update_stats(self, stats):
+        # 외부에서 들고 있는 참조(예: install_reporting 의 모니터)도 결과를 보도록 제자리에서 바꿉니다
+        for name, result in stats.items():
+            mine = getattr(self, name)
+            if mine is not None and result is not None:
+                vars(mine).update(vars(result))
+
+    def refresh_stats(self):
+        """
+        자식 프로세스의 자동 조정, 지연, 지터 통계를 받아 이 프로세스의 객체에 반영합니다.
+        실행 중이 아니거나 다른 스레드가 받는 중이면(시그널 핸들러에서 불린 경우 포함) 그냥 돌아갑니다.
+        """
+        if not self._recv_lock.acquire(blocking=False):
+            return
+        stats = None
+        try:
+            if self._process is not None:
+                self.mixer.send(('stats',))
+                stats = self._receive('stats', STATS_TIMEOUT)
+        except (OSError, EOFError):
+            pass
+        finally:
+            self._recv_lock.release()
+        if stats:
+            self._update_stats(stats)
+
+    def _stop_process(self):
+        stats = None
+        with self._recv_lock:
+            try:
+                self.mixer.send(('close',))
+                stats = self._receive('closed', CLOSE_TIMEOUT)
+            except (OSError, EOFError):
+                logging.warning("오디오 엔진 프로세스가 이미 종료되었습니다")
+            self._block = self.block
+            self.mixer.disconnect()
+            self._process.join(CLOSE_TIMEOUT)
+            if self._process.is_alive():
+                self._process.terminate()
+            self._conn.close()
+            self._process = self._conn = None
+        if stats:
+            self._update_stats(stats)
+
+    def close(self):
+        if self._process is not None:
+            self._stop_process()
+        self.output = None
+        super().close()
+        if not self._released:
+            self._released = True
+            self.mixer.release()
+            self.ring.close(unlink=True)
+
+
+def _release_tables(tables, mixer):
+    """자식 프로세스의 오디오 스레드가 더 이상 보지 않는 테이블의 공유 메모리를 닫습니다."""
+    # 예약된 테이블을 먼저 읽어야 그 사이에 교체가 일어나도 새 테이블을 닫지 않습니다
+    pending = mixer._pending_table
+    current = mixer.pcm
+    keep = []
+    for entry in tables:
+        if entry[1] is current or (pending is not None and entry[1] is pending[0]):
+            keep.append(entry)
+            continue
+        entry[1] = None
+        if entry[0] is not None:
+            try:
+                entry[0].close()
+            except BufferError:
+                # 믹싱 중인 블록이 아직 참조하고 있으면 다음에 닫습니다
+                keep.append(entry)
+    tables[:] = keep
+
+
+def _apply_table(engine, tables, ref, starts, lengths, peaks, requires_idle):
+    if ref[0] == 'memmap':
+        _, filename, offset, dtype, shape = ref
+        shm = None
+        pcm = np.memmap(filename, dtype=np.dtype(dtype), mode='r', offset=offset, shape=shape)
+    else:
+        _, name, dtype, shape = ref
+        shm = shared_memory.SharedMemory(name=name)
+        # 프론트엔드는 보낸 뒤 자기 쪽 매핑을 닫았으므로 이름은 붙은 쪽에서 지웁니다
+        shm.unlink()
+        pcm = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+    if engine.output is None:
+        engine.mixer.set_table(pcm, starts, lengths, peaks)
+    else:
+        engine.mixer.request_table(pcm, starts, lengths, peaks, requires_idle)
+    tables.append([shm, pcm])
+    _release_tables(tables, engine.mixer)
+
+
+def _engine_main(conn, spec):
+    """자식 프로세스 진입점. 파이프 메시지를 처리하는 동안 출력 백엔드의 스레드가 믹싱합니다."""
+    logging.basicConfig(level=logging.INFO, format="[sound-engine] %(message)s")
+    engine = SoundEngine(spec['format'], **spec['options'])
+    engine.reloader = None
+    ring_name, capacity = spec['ring']
+    engine.ring = SharedTriggerRing(capacity, ring_name)
+    status_shm = shared_memory.SharedMemory(name=spec['status'])
+    status = np.ndarray(STATUS_SIZE, dtype=np.int64, buffer=status_shm.buf)
+    mixer = engine.mixer
+    render = engine.render
+
+    def publish(frame_count, st=0, time_info=None):
+        chunk = render(frame_count, st, time_info)
+        status[GENERATION] = mixer.table_generation
+        status[ACTIVE] = mixer.active
+        status[CHOKED] = mixer.choked
+        status[STOLEN] = mixer.stolen
+        status[BLOCK] = engine.block
+        return chunk
+
+    engine.render = publish
+    tables = []
+
+    def stats():
+        return {'autotune': engine.autotune, 'latency': engine.latency, 'jitter': engine.jitter}
+
+    try:
+        while True:
+            # 메시지가 없을 때 교체가 끝난 옛 테이블을 닫습니다
+            if not conn.poll(1.0):
+                _release_tables(tables, mixer)
+                continue
+            msg = conn.recv()
+            kind = msg[0]
+            if kind == 'table':
+                _apply_table(engine, tables, *msg[1:])
+            elif kind == 'key_gains':
+                mixer.set_key_gains(msg[1])
+            elif kind == 'block':
+                engine.set_block(msg[1])
+            elif kind == 'stats':
+                # 콜백이 도는 중에 찍는 스냅숏이라 단계 사이의 합이 한두 건 어긋날 수 있습니다
+                conn.send(('stats', stats()))
+            elif kind == 'start':
+                try:
+                    engine.start(output=make_output(*spec['output']))
+                except Exception as e:
+                    conn.send(('error', str(e)))
+                    return
+                status[BLOCK] = engine.block
+                conn.send(('started', engine.block))
+            elif kind == 'close':
+                break
+    except EOFError:
+        logging.warning("프론트엔드 프로세스와의 연결이 끊겼습니다")
+    finally:
+        engine.close()
+        try:
+            conn.send(('closed', stats()))
+        except OSError:
+            pass
+        mixer._pending_table = None
+        mixer.pcm = np.zeros((1, mixer.channels), dtype=mixer.dtype)
+        _release_tables(tables, mixer)
+        engine.ring.close()
+        del status
+        status_shm.close()
+
+
+def _front_end_load(stop):
+    """GIL 을 오래 잡는 순수 파이썬 연산과 GC 를 반복합니다 (로그 포맷팅, Tk 갱신 흉내)."""
+    while not stop.is_set():
+        junk = [{'key': i, 'name': f"k{i}"} for i in range(20000)]
+        sum(len(d['name']) for d in junk)
+        gc.collect()
+
+
+def run_jitter(engine_cls, duration=5.0, block=64, key_rate=20.0, load=True, rate=44100):
+    """null 출력으로 엔진을 duration 초 돌리며 키를 누르고 JitterMeter 요약을 반환합니다."""
+    from keyboard_sound.bench import synthetic_samples
+    from keyboard_sound.metrics import JitterMeter
+    from keyboard_sound.output import NullOutput
+
+    jitter = JitterMeter(rate)
+    engine = engine_cls(block=block, jitter=jitter)
+    slots = engine.mixer.load_samples(synthetic_samples(8, rate, length_ms=80))
+    engine.reloader = None
+    engine._key_to_slot = {f"k{i}": s for i, s in enumerate(slots)}
+    stop = threading.Event()
+    loader = threading.Thread(target=_front_end_load, args=(stop,), daemon=True)
+    engine.start(output=NullOutput())
+    try:
+        if load:
+            loader.start()
+        end = time.perf_counter() + duration
+        pressed = 0
+        while time.perf_counter() < end:
+            engine.play(f"k{pressed % len(slots)}")
+            pressed += 1
+            time.sleep(1.0 / key_rate)
+    finally:
+        stop.set()
+        if loader.is_alive():
+            loader.join()
+        engine.close()
+    return jitter.summary()
+
+
+def compare(duration=5.0, block=64, key_rate=20.0, load=True):
+    """단일 프로세스(SoundEngine)와 프로세스 엔진의 콜백 지터를 차례로 재서 결과 목록을 반환합니다."""
+    results = []
+    for mode, engine_cls in (('thread', SoundEngine), ('process', ProcessEngine)):
+        r = run_jitter(engine_cls, duration, block, key_rate, load)
+        r['mode'] = mode
+        results.append(r)
+    return results
+
+
+def print_compare(results, block, rate=44100):
+    print(f"{'mode':>8} {'callbacks':>10} {'p50us':>8} {'p99us':>8} {'maxus':>9} {'late':>6}")
+    for r in results:
+        print(f"{r['mode']:>8} {r['callbacks']:>10} {r['p50_us']:>8.1f} {r['p99_us']:>8.1f} "
+              f"{r['max_us']:>9.1f} {r['late']:>6}")
+    print(f"period = {block * 1e6 / rate:.0f}us per callback; late = started more than half a period late")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m keyboard_sound.procengine",
+                                     description="단일 프로세스 vs 별도 프로세스 엔진의 콜백 지터 비교")
+    parser.add_argument('--duration', type=float, default=5.0, help="모드별 실행 시간 (초)")
+    parser.add_argument('--block', type=int, default=64)
+    parser.add_argument('--key-rate', type=float, default=20.0, help="초당 키 입력 수")
+    parser.add_argument('--no-load', action='store_true', help="프론트엔드 GIL/GC 부하 없이 비교")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format="%(message)s")
+    print_compare(compare(args.duration, args.block, args.key_rate, not args.no_load), args.block)
+
+
+if __name__ == '__main__':
+    main()
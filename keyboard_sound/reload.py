@@ -0,0 +1,217 @@
+"""
+실행 중 키 매핑 핫 리로드.
+
+매핑 JSON 과 그 안에서 참조하는 사운드 파일들의 mtime/크기를 백그라운드 스레드에서 감시합니다.
+바뀐 항목만 다시 디코딩해 기존 PCM 뒤에 덧붙인 새 샘플 테이블을 만들고, 믹서가 블록 사이에서
+그 테이블로 교체하게 합니다. 이미 재생 중인 보이스는 원래 프레임을 끝까지 읽고, 키보드 리스너는
+교체가 끝난 뒤 새 key_to_slot 딕셔너리를 한 번의 대입으로 보게 됩니다.
+"""
+
+import json
+import logging
+import os
+import threading
+
+import numpy as np
+
+from keyboard_sound.cache import DecodeCache
+from keyboard_sound.mapping import mapping_params, mapping_paths
+
+
+def _stat(path):
+    try:
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size
+    except OSError:
+        return None
+
+
+class HotReloader:
+    """매핑 파일을 감시하며 믹서의 샘플 테이블과 key_to_slot 을 점진적으로 갱신합니다."""
+
+    def __init__(self, mixer, mapping_file, fmt, cache=None, interval=1.0, executor='thread',
+                 swap_timeout=1.0):
+        self.mixer = mixer
+        self.mapping_file = mapping_file
+        self.fmt = fmt
+        self.cache = cache or DecodeCache(target=fmt)
+        self.interval = interval
+        self.executor = executor
+        self.swap_timeout = swap_timeout
+
+        self.key_to_slot = {}
+        self.key_params = {}
+        self.reloads = 0
+        self._path_slot = {}
+        self._sources = {}
+        self._mapping_stat = None
+        self._pcm = mixer.pcm
+        self._starts = np.zeros(0, dtype=np.int64)
+        self._lengths = np.zeros(0, dtype=np.int64)
+        self._peaks = np.zeros(0, dtype=np.float32)
+        # 압축된(재생 중인 보이스가 없을 때만 적용되는) 테이블을 예약했을 때의 table_generation
+        self._idle_generation = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _read_mapping(self):
+        with open(self.mapping_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _decode(self, paths, progress=None):
+        loaded = self.cache.load(paths, executor=self.executor, progress=progress)
+        return {p: pcm for p, (pcm, _) in loaded.items()}
+
+    def load(self, mapping=None, progress=None):
+        """처음 한 번 전체 매핑을 적재합니다. 스트림을 열기 전에 호출합니다."""
+        self._mapping_stat = _stat(self.mapping_file) if self.mapping_file else None
+        if mapping is None:
+            mapping = self._read_mapping()
+        paths = list(dict.fromkeys(mapping_paths(mapping).values()))
+        self._sources = {p: _stat(p) for p in paths}
+        decoded = self._decode(paths, progress)
+        paths = [p for p in paths if p in decoded]
+        slots = self.mixer.load_samples([decoded[p] for p in paths])
+        self._path_slot = dict(zip(paths, slots))
+        self._pcm = self.mixer.pcm
+        self._starts = self.mixer.sample_start.copy()
+        self._lengths = self.mixer.sample_length.copy()
+        self._peaks = self.mixer.sample_peak.copy()
+        self._publish_keys(mapping)
+        return self.key_to_slot
+
+    def update(self, mapping, progress=None):
+        """
+        메모리에 있는 매핑으로 교체합니다. 처음 보거나 파일이 바뀐 사운드만 디코딩하며,
+        스트림이 재생 중일 때도 호출할 수 있습니다. 다시 디코딩한 파일 수를 반환합니다.
+        """
+        return self._refresh(mapping, list(dict.fromkeys(mapping_paths(mapping).values())), True, progress)
+
+    def check(self):
+        """
+        한 번 점검하고, 바뀐 것이 있으면 해당 항목만 디코딩해 교체합니다.
+        교체했으면 True 를 반환합니다.
+        """
+        if not self.mapping_file:
+            return False
+        mapping_stat = _stat(self.mapping_file)
+        mapping_changed = mapping_stat != self._mapping_stat
+        if mapping_changed:
+            try:
+                mapping = self._read_mapping()
+            except (OSError, ValueError) as e:
+                # 편집기가 파일을 쓰는 도중일 수 있으므로 다음 점검에서 다시 시도합니다
+                logging.warning(f"매핑 파일을 읽을 수 없어 리로드를 미룹니다: {e}")
+                return False
+            self._mapping_stat = mapping_stat
+        else:
+            mapping = None
+
+        if mapping is not None:
+            watched = list(dict.fromkeys(mapping_paths(mapping).values()))
+        else:
+            watched = list(self._sources)
+        decoded = self._refresh(mapping, watched, mapping_changed)
+        if decoded is None:
+            return False
+        self.reloads += 1
+        logging.info(f"매핑 리로드: {decoded}개 파일 다시 디코딩, {len(self.key_to_slot)}개 키")
+        return True
+
+    def _refresh(self, mapping, watched, force, progress=None):
+        """watched 중 바뀐 파일만 디코딩해 교체합니다. 바뀐 것이 없고 force 도 아니면 None 을 반환합니다."""
+        stats = {p: _stat(p) for p in watched}
+        # 디코딩에 실패했던 파일도 기록해 두므로, 파일이 다시 바뀔 때까지는 재시도하지 않습니다
+        changed = [p for p in watched if p not in self._sources or stats[p] != self._sources[p]]
+        if not force and not changed:
+            return None
+        decoded = self._decode(changed, progress) if changed else {}
+        self._sources.update(stats)
+        self._publish(mapping, decoded)
+        return len(decoded)
+
+    def _publish(self, mapping, decoded):
+        """새 샘플을 PCM 뒤에 덧붙인 테이블을 믹서에 예약하고, 적용된 뒤 key_to_slot 을 바꿉니다."""
+        starts = self._starts.copy()
+        lengths = self._lengths.copy()
+        peaks = self._peaks.copy()
+        new_paths = [p for p in decoded if p not in self._path_slot]
+        if new_paths:
+            grow = len(new_paths)
+            starts = np.concatenate([starts, np.zeros(grow, dtype=np.int64)])
+            lengths = np.concatenate([lengths, np.zeros(grow, dtype=np.int64)])
+            peaks = np.concatenate([peaks, np.zeros(grow, dtype=np.float32)])
+            for p in new_paths:
+                self._path_slot[p] = len(self._path_slot)
+
+        # 기존 프레임은 같은 위치에 두고 바뀐 샘플만 뒤에 붙입니다
+        pos = len(self._pcm)
+        chunks = [self._pcm]
+        for p, pcm in decoded.items():
+            slot = self._path_slot[p]
+            starts[slot] = pos
+            lengths[slot] = len(pcm)
+            peaks[slot] = np.abs(pcm.astype(np.float64)).max() if len(pcm) else 0.0
+            chunks.append(pcm)
+            pos += len(pcm)
+        pcm = np.concatenate(chunks) if len(chunks) > 1 else self._pcm
+
+        # 압축 테이블이 아직 적용되지 않았다면 그 오프셋 위에 만든 이번 테이블도 유휴 상태에서만 적용할 수 있습니다
+        requires_idle = self._idle_generation == self.mixer.table_generation
+        live = int(lengths.sum())
+        if len(pcm) - 1 > 2 * live:
+            # 리로드가 쌓여 버려진 프레임이 많아지면 압축합니다 (재생 중인 보이스가 없을 때 적용)
+            compact = np.zeros((live + 1, pcm.shape[1]), dtype=pcm.dtype)
+            new_starts = np.zeros_like(starts)
+            pos = 1
+            for slot in range(len(starts)):
+                compact[pos:pos + lengths[slot]] = pcm[starts[slot]:starts[slot] + lengths[slot]]
+                new_starts[slot] = pos
+                pos += lengths[slot]
+            pcm, starts = compact, new_starts
+            requires_idle = True
+
+        generation = self.mixer.table_generation
+        self.mixer.request_table(pcm, starts, lengths, peaks, requires_idle)
+        self._idle_generation = generation if requires_idle else None
+        self._pcm, self._starts, self._lengths, self._peaks = pcm, starts, lengths, peaks
+        self._wait_applied(generation)
+
+        if mapping is None:
+            return
+        referenced = self._publish_keys(mapping)
+        for p in list(self._sources):
+            if p not in referenced:
+                del self._sources[p]
+
+    def _publish_keys(self, mapping):
+        """키별 게인/팬을 먼저, key_to_slot 을 나중에 바꿉니다. 매핑이 참조하는 경로 집합을 반환합니다."""
+        paths = mapping_paths(mapping)
+        self.key_params = mapping_params(mapping)
+        self.key_to_slot = {k: self._path_slot[p] for k, p in paths.items() if p in self._path_slot}
+        return set(paths.values())
+
+    def _wait_applied(self, generation):
+        """오디오 스레드가 예약된 테이블을 적용할 때까지 (최대 swap_timeout 초) 기다립니다."""
+        waited = 0.0
+        while self.mixer.table_generation == generation and waited < self.swap_timeout:
+            if self._stop.wait(0.002):
+                return
+            waited += 0.002
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                logging.error(f"매핑 리로드 실패: {e}")
+
+    def start(self):
+        """감시 스레드를 시작합니다."""
+        self._thread = threading.Thread(target=self._run, name="mapping-reload", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
@@ -0,0 +1,196 @@
+"""
+키 입력 트레이스를 실시간 콜백과 같은 믹싱 경로로 오프라인 렌더링합니다.
+사운드 카드나 pynput 리스너 없이도 믹서를 실행하고 측정할 수 있습니다.
+
+트레이스 파일은 한 줄에 하나의 이벤트를 "타임스탬프(초)<TAB>키" 형식으로 적습니다.
+main.py 가 남기는 바이너리 이벤트 로그(.kev)도 그대로 트레이스로 쓸 수 있습니다.
+
+사용법:
+    python -m keyboard_sound.render trace.txt -o out.wav
+    python -m keyboard_sound.render --wpm 300 --duration 10 -o out.wav --mapping keyboard_mapping_t.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import time
+import wave
+
+import numpy as np
+
+from keyboard_sound.bank import DEFAULT_BANK_FILE, SoundBank
+from keyboard_sound.cache import DecodeCache
+from keyboard_sound.eventlog import events_to_trace, is_event_log, read_events
+from keyboard_sound.formats import SAMPLE_FORMATS, StreamFormat, from_float
+from keyboard_sound.mapping import mapping_paths
+from keyboard_sound.mixer import VoiceMixer
+
+DEFAULT_BLOCK = 64
+CHARS_PER_WORD = 5
+
+
+def load_trace(path):
+    """트레이스 파일(또는 바이너리 이벤트 로그)을 [(타임스탬프, 키), ...] 목록으로 읽습니다."""
+    if is_event_log(path):
+        return events_to_trace(read_events(path))
+    trace = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.rstrip('\n')
+            if not line or line.startswith('#'):
+                continue
+            t, key = line.split('\t', 1)
+            trace.append((float(t), key))
+    trace.sort(key=lambda e: e[0])
+    return trace
+
+
+def save_trace(trace, path):
+    """트레이스를 파일로 저장합니다."""
+    with open(path, 'w', encoding='utf-8') as f:
+        for t, key in trace:
+            f.write(f"{t:.6f}\t{key}\n")
+
+
+def synthetic_trace(keys, wpm, duration, seed=0, jitter=0.35):
+    """
+    wpm 속도로 duration 초 동안 타이핑하는 합성 트레이스를 만듭니다.
+    키 간격은 평균 60 / (wpm * 5) 초이며 jitter 비율만큼 흔들립니다.
+    """
+    rng = np.random.default_rng(seed)
+    interval = 60.0 / (wpm * CHARS_PER_WORD)
+    count = int(duration / interval)
+    gaps = interval * (1.0 + jitter * rng.standard_normal(count))
+    times = np.cumsum(np.clip(gaps, interval * 0.05, None))
+    picks = rng.integers(0, len(keys), count)
+    return [(float(t), keys[i]) for t, i in zip(times, picks) if t < duration]
+
+
+class RenderStats:
+    """오프라인 렌더링 중 수집한 콜백별 측정값."""
+
+    def __init__(self, block, rate, callback_ns, voices):
+        self.block = block
+        self.rate = rate
+        self.callback_ns = callback_ns
+        self.voices = voices
+
+    @property
+    def deadline_ns(self):
+        return int(self.block * 1e9 / self.rate)
+
+    @property
+    def deadline_misses(self):
+        return int((self.callback_ns > self.deadline_ns).sum())
+
+    def percentiles(self, qs=(50, 90, 99, 99.9)):
+        """콜백 시간 백분위수(마이크로초)를 반환합니다."""
+        return {q: float(np.percentile(self.callback_ns, q)) / 1000.0 for q in qs}
+
+    @property
+    def voices_per_second(self):
+        """실제 믹싱에 쓴 시간 1초당 처리한 보이스-블록 수."""
+        busy = self.callback_ns.sum() / 1e9
+        return float(self.voices.sum() / busy) if busy > 0 else 0.0
+
+
+def render(mixer, key_to_slot, trace, rate, block=DEFAULT_BLOCK, out_path=None, tail=0.5):
+    """
+    트레이스를 블록 단위로 믹싱합니다. 각 이벤트는 실시간 재생과 마찬가지로
+    자신이 속한 블록의 시작에서 트리거됩니다. out_path 가 있으면 WAV 로 저장합니다.
+    """
+    end_time = (trace[-1][0] if trace else 0.0) + tail
+    n_blocks = int(np.ceil(end_time * rate / block))
+    callback_ns = np.zeros(n_blocks, dtype=np.int64)
+    voices = np.zeros(n_blocks, dtype=np.int32)
+
+    # wave 모듈은 정수 PCM 만 쓰므로 float32 믹스는 파일에 쓸 때만 int16 으로 바꿉니다
+    file_format = 'int16' if mixer.sample_format == 'float32' else mixer.sample_format
+    wav = None
+    if out_path:
+        wav = wave.open(out_path, 'wb')
+        wav.setnchannels(mixer.channels)
+        wav.setsampwidth(SAMPLE_FORMATS[file_format][1])
+        wav.setframerate(rate)
+
+    ev = 0
+    try:
+        for b in range(n_blocks):
+            block_end = (b + 1) * block / rate
+            t0 = time.perf_counter_ns()
+            while ev < len(trace) and trace[ev][0] < block_end:
+                slot = key_to_slot.get(trace[ev][1])
+                if slot is not None:
+                    mixer.trigger(slot)
+                ev += 1
+            voices[b] = mixer.active
+            chunk = mixer.mix(block)
+            callback_ns[b] = time.perf_counter_ns() - t0
+            if wav is not None:
+                if file_format != mixer.sample_format:
+                    chunk = from_float(chunk, file_format)
+                wav.writeframes(chunk.tobytes())
+    finally:
+        if wav is not None:
+            wav.close()
+    return RenderStats(block, rate, callback_ns, voices)
+
+
+def load_sounds(bank_path=None, mapping_path=None, max_voices=32, block=DEFAULT_BLOCK, fmt=None):
+    """
+    뱅크 파일 또는 매핑 JSON에서 믹서를 준비하고 (mixer, key_to_slot, rate) 를 반환합니다.
+    매핑 JSON 의 샘플은 fmt 스트림 포맷(기본 44.1kHz 스테레오 int16)으로 정규화됩니다.
+    둘 다 주지 않았고 기본 뱅크 파일도 없으면 벤치마크와 같은 합성 샘플을 씁니다.
+    """
+    if mapping_path:
+        fmt = fmt or StreamFormat()
+        with open(mapping_path, 'r', encoding='utf-8') as f:
+            mapping = mapping_paths(json.load(f))
+        decoded = DecodeCache(target=fmt).load(mapping.values())
+        audio = {k: decoded[p][0] for k, p in mapping.items() if p in decoded}
+        mixer = VoiceMixer(fmt.channels, max_voices=max_voices, max_frames=block,
+                           sample_format=fmt.sample_format)
+        slots = mixer.load_samples(list(audio.values()))
+        return mixer, dict(zip(audio.keys(), slots)), fmt.rate
+    if not bank_path and not os.path.exists(DEFAULT_BANK_FILE):
+        # bench 가 이 모듈을 가져오므로 여기서 가져옵니다
+        from keyboard_sound.bench import synthetic_sounds
+
+        logging.info(f"{DEFAULT_BANK_FILE} 이 없어 합성 샘플로 렌더링합니다 (--bank 또는 --mapping 으로 지정)")
+        return synthetic_sounds(max_voices=max_voices, block=block)
+    bank = SoundBank(bank_path or DEFAULT_BANK_FILE)
+    mixer = VoiceMixer(bank.channels, max_voices=max_voices, max_frames=block,
+                       sample_format=bank.format.sample_format)
+    bank.attach(mixer)
+    return mixer, dict(bank.keys), bank.rate
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m keyboard_sound.render", description="오프라인 렌더러")
+    parser.add_argument('trace', nargs='?', help="트레이스 파일 (생략하면 --wpm 합성 트레이스)")
+    parser.add_argument('-o', '--output', help="WAV 출력 경로 (생략하면 렌더링만 수행)")
+    parser.add_argument('--bank', help=f"사운드 뱅크 파일 (기본값 {DEFAULT_BANK_FILE}, 없으면 합성 샘플)")
+    parser.add_argument('--mapping', help="뱅크 대신 사용할 키 매핑 JSON")
+    parser.add_argument('--wpm', type=float, default=300)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--block', type=int, default=DEFAULT_BLOCK)
+    parser.add_argument('--max-voices', type=int, default=32)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    mixer, key_to_slot, rate = load_sounds(args.bank, args.mapping, args.max_voices, args.block)
+    if args.trace:
+        trace = load_trace(args.trace)
+    else:
+        trace = synthetic_trace(sorted(key_to_slot), args.wpm, args.duration, args.seed)
+    stats = render(mixer, key_to_slot, trace, rate, args.block, args.output)
+    pct = stats.percentiles()
+    print(f"{len(trace)}개 이벤트, {len(stats.callback_ns)}개 블록, "
+          f"p50 {pct[50]:.1f}us p99 {pct[99]:.1f}us, "
+          f"데드라인({stats.deadline_ns / 1000:.0f}us) 초과 {stats.deadline_misses}회")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+class TriggerRing:
+    """
+    리스너 스레드(생산자 1개)에서 오디오 콜백(소비자 1개)으로 트리거 이벤트를 넘기는 링 버퍼.
+    (정수 키 슬롯, perf_counter_ns 타임스탬프, 초크 그룹, 키 게인 번호) 를 미리 할당된 배열에 저장하며 락을 쓰지 않습니다.
+
+    head 는 생산자만, tail 은 소비자만 갱신합니다. 생산자는 데이터를 먼저 쓰고 head 를
+    올리므로, 소비자는 head 까지의 항목을 언제나 완전한 상태로 읽습니다.
+    """
+
+    def __init__(self, capacity=1024):
+        if capacity & (capacity - 1):
+            raise ValueError(f"용량은 2의 거듭제곱이어야 합니다: {capacity}")
+        self.capacity = capacity
+        self._mask = capacity - 1
+        self.keys = np.zeros(capacity, dtype=np.int32)
+        self.times = np.zeros(capacity, dtype=np.int64)
+        self.groups = np.zeros(capacity, dtype=np.int32)
+        self.params = np.zeros(capacity, dtype=np.int32)
+        self.head = 0
+        self.tail = 0
+        self.dropped = 0
+
+    def push(self, key, t_ns, group=0, param=-1):
+        """이벤트를 넣습니다. 링이 가득 차 있으면 버리고 False 를 반환합니다 (생산자 전용)."""
+        head = self.head
+        if head - self.tail >= self.capacity:
+            self.dropped += 1
+            return False
+        i = head & self._mask
+        self.keys[i] = key
+        self.times[i] = t_ns
+        self.groups[i] = group
+        self.params[i] = param
+        self.head = head + 1
+        return True
+
+    def __len__(self):
+        return self.head - self.tail
+
+    def drain_into(self, keys_out, times_out, groups_out=None, params_out=None):
+        """
+        쌓인 이벤트를 최대 len(keys_out) 개까지 미리 할당된 배열로 옮기고 개수를 반환합니다 (소비자 전용).
+        랩어라운드가 있어도 슬라이스 복사 두 번이면 끝납니다.
+        """
+        tail = self.tail
+        n = min(self.head - tail, len(keys_out))
+        if n <= 0:
+            return 0
+        start = tail & self._mask
+        first = min(n, self.capacity - start)
+        keys_out[:first] = self.keys[start:start + first]
+        times_out[:first] = self.times[start:start + first]
+        if groups_out is not None:
+            groups_out[:first] = self.groups[start:start + first]
+        if params_out is not None:
+            params_out[:first] = self.params[start:start + first]
+        if first < n:
+            keys_out[first:n] = self.keys[:n - first]
+            times_out[first:n] = self.times[:n - first]
+            if groups_out is not None:
+                groups_out[first:n] = self.groups[:n - first]
+            if params_out is not None:
+                params_out[first:n] = self.params[:n - first]
+        self.tail = tail + n
+        return n
+
+
+class SharedTriggerRing(TriggerRing):
+    """
+    multiprocessing.shared_memory 위에 놓인 TriggerRing. 프론트엔드 프로세스가 넣고 엔진 프로세스가 꺼냅니다.
+    name 없이 만들면 새 공유 메모리를 만들고, name 을 주면 다른 프로세스가 만든 링에 붙습니다.
+
+    head/tail 은 공유 메모리의 정렬된 int64 두 칸이며, 각각 한 프로세스만 씁니다. 생산자가 항목을 먼저 쓰고
+    head 를 올리는 순서는 프로세스 안의 스레드 사이와 같습니다.
+
+    메모리 순서에 대한 가정: 파이썬에서는 펜스를 넣을 수 없으므로, 다른 코어에서 도는 소비자가 저장 순서대로
+    본다고 가정합니다. x86(TSO)에서는 하드웨어가 보장하지만, ARM(Apple Silicon 등)에서는 드물게 올라간 head 를
+    항목보다 먼저 볼 수 있습니다. 그때 읽히는 항목은 한 바퀴 전 값이 섞인 이벤트일 뿐이고, 소비자(VoiceMixer)가
+    키 슬롯과 게인 번호의 범위를 검사하므로 결과는 잘못된 소리나 지연 기록 하나이며 메모리를 잘못 읽지는 않습니다.
+    """
+
+    def __init__(self, capacity=1024, name=None):
+        if capacity & (capacity - 1):
+            raise ValueError(f"용량은 2의 거듭제곱이어야 합니다: {capacity}")
+        size = 16 + capacity * (8 + 4 + 4 + 4)
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.name = self.shm.name
+        self.capacity = capacity
+        self._mask = capacity - 1
+        buf = self.shm.buf
+        self._counters = np.ndarray(2, dtype=np.int64, buffer=buf)
+        self.times = np.ndarray(capacity, dtype=np.int64, buffer=buf, offset=16)
+        offset = 16 + 8 * capacity
+        self.keys = np.ndarray(capacity, dtype=np.int32, buffer=buf, offset=offset)
+        self.groups = np.ndarray(capacity, dtype=np.int32, buffer=buf, offset=offset + 4 * capacity)
+        self.params = np.ndarray(capacity, dtype=np.int32, buffer=buf, offset=offset + 8 * capacity)
+        if name is None:
+            self._counters[:] = 0
+        self.dropped = 0
+
+    @property
+    def head(self):
+        return int(self._counters[0])
+
+    @head.setter
+    def head(self, value):
+        self._counters[0] = value
+
+    @property
+    def tail(self):
+        return int(self._counters[1])
+
+    @tail.setter
+    def tail(self, value):
+        self._counters[1] = value
+
+    def close(self, unlink=False):
+        """공유 메모리를 놓습니다. 만든 쪽은 unlink=True 로 이름도 지웁니다."""
+        del self._counters, self.times, self.keys, self.groups, self.params
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
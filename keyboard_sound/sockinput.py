@@ -0,0 +1,480 @@
+"""
+로컬 소켓 입력.
+
+엔진을 가진 프로세스 하나가 Unix 도메인 데이터그램 소켓으로 트리거 이벤트를 받아, 여러 프론트엔드
+(CLI 키 리스너, GUI, 트레이스 재생기)가 엔진과 오디오 장치 하나를 함께 쓸 수 있게 합니다 (Unix 계열 전용).
+
+프로토콜 (리틀 엔디언, 데이터그램 하나가 메시지 하나):
+
+    헤더   : magic 'KSSK', 버전 (u8), 종류 (u8), 개수 (u16)
+    EVENTS : 헤더 뒤에 (키 번호 i32, perf_counter_ns i64) 쌍이 개수만큼 붙습니다. 키 번호가 음수면
+             ~키 번호의 뗌이고, 시각이 0 이면 서버가 받은 시각을 씁니다
+    KEYS   : 키 이름 표 요청. 서버는 보낸 주소로 이름 표를 MAX_DATAGRAM 바이트 이하의 조각 여러 개로 나눠
+             돌려줍니다. 조각마다 헤더의 개수는 전체 이름 수이고, 본문은 UTF-8 JSON [첫 키 번호, [이름, ...]] 입니다
+
+키 번호는 엔진 KeyTable 의 번호입니다. 이름마다 한 번 정해지면 바뀌지 않으므로 클라이언트는 연결할 때
+이름 표를 받아 두고, 모르는 이름이 나올 때만 다시 받습니다. 시각은 perf_counter_ns (Linux, macOS 에서는
+시스템 전체에 공통인 단조 시계) 이므로 엔진의 지연 계측은 클라이언트에서 눌린 시각부터 잽니다.
+macOS 의 기본 데이터그램 크기 제한(MAX_DATAGRAM, 2048 바이트) 안에 들도록 데이터그램 하나에 최대 MAX_BATCH 개를
+담습니다.
+
+키 입력이 오가므로 소켓은 사용자 전용 디렉터리 SOCKET_DIR ($XDG_RUNTIME_DIR, 없으면 임시 디렉터리 아래
+0700 디렉터리)에 두고 0600 으로 엽니다. 클라이언트는 다른 사용자가 만든 소켓에는 연결하지 않습니다.
+
+사용법:
+    keyboard-sound --listen-socket                       # 엔진 + 로컬 키 리스너 + 소켓 입력
+    keyboard-sound --connect                             # 키 입력을 소켓으로만 보내는 클라이언트
+    python app/keyboard_gui.py --connect
+    python -m keyboard_sound.sockinput replay trace.txt  # 트레이스(.txt, .kev)를 실시간으로 재생
+    python -m keyboard_sound.sockinput stress --clients 4 --rate 20000 --batch 32
+"""
+
+import argparse
+import itertools
+import json
+import logging
+import os
+import socket
+import stat
+import struct
+import tempfile
+import threading
+import time
+
+SOCKET_MAGIC = b'KSSK'
+SOCKET_VERSION = 2
+PACKET_HEADER = struct.Struct('<4sBBH')
+EVENT = struct.Struct('<iq')  # 키 번호 (음수면 뗌), perf_counter_ns
+MSG_EVENTS = 0
+MSG_KEYS = 1
+MAX_BATCH = 128
+MAX_DATAGRAM = 2048
+
+
+def _socket_dir():
+    """소켓을 둘 사용자 전용 디렉터리 경로."""
+    runtime = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime:
+        return runtime
+    # Windows 에는 getuid 가 없지만 이 모듈은 Unix 계열에서만 씁니다 (GUI 는 import 만 합니다)
+    uid = os.getuid() if hasattr(os, 'getuid') else 0
+    return os.path.join(tempfile.gettempdir(), f"keyboard-sound-{uid}")
+
+
+SOCKET_DIR = _socket_dir()
+DEFAULT_SOCKET_PATH = os.path.join(SOCKET_DIR, "keyboard-sound.sock")
+
+_client_ids = itertools.count()
+
+
+def _private_dir():
+    """SOCKET_DIR 을 0700 으로 만들고, 현재 사용자 소유의 닫힌 디렉터리가 아니면 OSError 를 냅니다."""
+    try:
+        os.mkdir(SOCKET_DIR, 0o700)
+    except FileExistsError:
+        pass
+    st = os.lstat(SOCKET_DIR)
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o077:
+        raise OSError(f"소켓 디렉터리가 현재 사용자 전용(0700)이 아닙니다: {SOCKET_DIR}")
+    return SOCKET_DIR
+
+
+class SocketInput:
+    """
+    엔진 프로세스에서 소켓으로 받은 이벤트를 engine.press()/release() 로 넘기는 스레드.
+    transit 에 LatencyHistogram 을 주면 클라이언트 시각 -> 받은 시각(ns)을 기록합니다.
+    """
+
+    def __init__(self, engine, path=DEFAULT_SOCKET_PATH, recv_buffer=1 << 20, transit=None):
+        self.engine = engine
+        self.path = path
+        self.recv_buffer = recv_buffer
+        self.transit = transit
+        self.packets = 0
+        self.events = 0
+        self.triggered = 0
+        self.rejected = 0
+        self._sock = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def _claim_path(self):
+        """
+        이전 실행이 남긴 소켓 파일은 지우고, 다른 엔진이 쓰고 있거나 소켓이 아닌 파일이 있으면 OSError 를 냅니다.
+        """
+        try:
+            mode = os.stat(self.path).st_mode
+        except FileNotFoundError:
+            return
+        if not stat.S_ISSOCK(mode):
+            raise OSError(f"소켓이 아닌 파일이 이미 있습니다: {self.path}")
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        try:
+            probe.connect(self.path)
+        except OSError:
+            os.unlink(self.path)
+            return
+        finally:
+            probe.close()
+        raise OSError(f"다른 엔진이 이미 소켓을 쓰고 있습니다: {self.path}")
+
+    def start(self):
+        if os.path.dirname(os.path.abspath(self.path)) == os.path.abspath(SOCKET_DIR):
+            _private_dir()
+        self._claim_path()
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.recv_buffer)
+        sock.bind(self.path)
+        # 다른 사용자가 키 이벤트를 끼워 넣지 못하게 합니다
+        os.chmod(self.path, 0o600)
+        # 종료 요청을 확인할 수 있도록 주기적으로 깨어납니다
+        sock.settimeout(0.2)
+        self._sock = sock
+        self._thread = threading.Thread(target=self._run, name="socket-input", daemon=True)
+        self._thread.start()
+        logging.info(f"소켓 입력 대기: {self.path}")
+
+    def _run(self):
+        sock = self._sock
+        buf = bytearray(PACKET_HEADER.size + MAX_BATCH * EVENT.size)
+        view = memoryview(buf)
+        while not self._stop.is_set():
+            try:
+                n, addr = sock.recvfrom_into(buf)
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            t_recv = time.perf_counter_ns()
+            if n < PACKET_HEADER.size:
+                self.rejected += 1
+                continue
+            magic, version, kind, count = PACKET_HEADER.unpack_from(buf)
+            if magic != SOCKET_MAGIC or version != SOCKET_VERSION:
+                self.rejected += 1
+            elif kind == MSG_EVENTS and n == PACKET_HEADER.size + count * EVENT.size:
+                self._dispatch(view[PACKET_HEADER.size:n], count, t_recv)
+            elif kind == MSG_KEYS and addr:
+                self._send_keys(addr)
+            else:
+                self.rejected += 1
+
+    def _dispatch(self, data, count, t_recv):
+        engine = self.engine
+        n_keys = len(engine.refresh_keymap().slots)
+        transit = self.transit
+        triggered = 0
+        for kid, t_ns in EVENT.iter_unpack(data):
+            if kid >= 0:
+                if kid < n_keys and engine.press(kid, t_ns or t_recv):
+                    triggered += 1
+            elif ~kid < n_keys:
+                engine.release(~kid)
+            if transit is not None and t_ns:
+                transit.record(t_recv - t_ns)
+        self.packets += 1
+        self.events += count
+        self.triggered += triggered
+
+    def _send_keys(self, addr):
+        names = self.engine.refresh_keymap().names
+        header = PACKET_HEADER.pack(SOCKET_MAGIC, SOCKET_VERSION, MSG_KEYS, len(names))
+        try:
+            for first, chunk in _key_chunks(names):
+                payload = json.dumps([first, chunk], ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+                self._sock.sendto(header + payload, addr)
+        except OSError as e:
+            logging.warning(f"키 이름 표를 보내지 못했습니다 ({addr}): {e}")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+
+    def summary(self):
+        return (f"socket input: {self.packets} packets, {self.events} events, {self.triggered} triggered, "
+                f"{self.rejected} rejected")
+
+
+def _key_chunks(names):
+    """이름 표를 데이터그램 하나가 MAX_DATAGRAM 바이트를 넘지 않는 (첫 키 번호, 이름 목록) 조각으로 나눕니다."""
+    # 본문 '[첫 번호,[...]]' 의 괄호, 쉼표, 번호 자리를 넉넉히 뺀 나머지를 이름들에 씁니다
+    budget = MAX_DATAGRAM - PACKET_HEADER.size - 32
+    first, chunk, size = 0, [], 0
+    for kid, name in enumerate(names):
+        n = len(json.dumps(name, ensure_ascii=False).encode('utf-8')) + 1
+        if chunk and size + n > budget:
+            yield first, chunk
+            first, chunk, size = kid, [], 0
+        chunk.append(name)
+        size += n
+    # 이름이 없어도 전체 수(0)를 알리는 조각 하나는 보냅니다
+    yield first, chunk
+
+
+class SocketClient:
+    """
+    소켓 입력으로 키 이벤트를 보내는 클라이언트. press()/release() 는 이벤트를 모아 두고, batch 개가
+    차거나 flush() 를 부르면 데이터그램 하나로 보냅니다. 대화형 입력은 이벤트마다 flush() 합니다.
+    """
+
+    def __init__(self, path=DEFAULT_SOCKET_PATH, batch=MAX_BATCH, timeout=1.0):
+        self.path = path
+        self.batch = max(1, min(batch, MAX_BATCH))
+        # 다른 사용자가 먼저 만든 소켓이면 키 입력이 그쪽으로 새므로 연결하지 않습니다
+        st = os.stat(path)
+        if not stat.S_ISSOCK(st.st_mode) or st.st_uid != os.getuid():
+            raise OSError(f"현재 사용자의 엔진 소켓이 아닙니다: {path}")
+        # 키 이름 표 응답을 받을 주소. 사용자 전용 디렉터리 안이라 남은 파일을 지워도 안전합니다
+        # (AF_UNIX 경로 길이 제한 때문에 짧게 짓습니다)
+        self.local_path = os.path.join(_private_dir(), f"ks-{os.getpid()}-{next(_client_ids)}.sock")
+        if os.path.exists(self.local_path):
+            os.unlink(self.local_path)
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.sock.bind(self.local_path)
+        self.sock.settimeout(timeout)
+        self.sock.connect(path)
+        self.index = {}
+        self.sent = 0
+        self.packets = 0
+        self._buf = bytearray(PACKET_HEADER.size + self.batch * EVENT.size)
+        self._view = memoryview(self._buf)
+        self._count = 0
+        self._unknown = set()
+        try:
+            self.refresh()
+        except socket.timeout:
+            self.close()
+            raise OSError(f"엔진이 키 이름 표 요청에 응답하지 않습니다: {path}") from None
+
+    def refresh(self):
+        """
+        엔진의 키 이름 표를 다시 받습니다. timeout 안에 조각이 모두 오지 않으면 socket.timeout 을 냅니다.
+        키 번호는 바뀌지 않으므로 이전 요청의 늦은 조각이 섞여도 결과는 같습니다.
+        """
+        self.sock.send(PACKET_HEADER.pack(SOCKET_MAGIC, SOCKET_VERSION, MSG_KEYS, 0))
+        names = {}
+        total = None
+        while total is None or len(names) < total:
+            reply = self.sock.recv(MAX_DATAGRAM)
+            if len(reply) < PACKET_HEADER.size:
+                continue
+            magic, version, kind, count = PACKET_HEADER.unpack_from(reply)
+            if magic != SOCKET_MAGIC or version != SOCKET_VERSION or kind != MSG_KEYS:
+                continue
+            first, chunk = json.loads(reply[PACKET_HEADER.size:].decode('utf-8'))
+            names.update(enumerate(chunk, first))
+            total = count
+        self.index = {name: kid for kid, name in names.items()}
+        self._unknown.clear()
+        return self.index
+
+    def _kid(self, name):
+        kid = self.index.get(name)
+        if kid is None and name not in self._unknown:
+            # 엔진에 새로 등록된 이름일 수 있으므로 이름마다 한 번만 다시 받아 봅니다
+            self._unknown.add(name)
+            try:
+                kid = self.refresh().get(name)
+            except socket.timeout:
+                logging.warning(f"엔진이 키 이름 표 요청에 응답하지 않아 '{name}' 을(를) 건너뜁니다")
+        return kid
+
+    def event(self, kid, t_ns=0):
+        """키 번호 이벤트 하나를 담습니다 (음수면 ~kid 의 뗌)."""
+        EVENT.pack_into(self._buf, PACKET_HEADER.size + self._count * EVENT.size, kid, t_ns)
+        self._count += 1
+        if self._count == self.batch:
+            self.flush()
+
+    def press(self, name, t_ns=None):
+        """키 이름의 누름을 담습니다. 엔진이 모르는 이름이면 False 를 반환합니다."""
+        kid = self._kid(name)
+        if kid is None:
+            return False
+        self.event(kid, t_ns if t_ns is not None else time.perf_counter_ns())
+        return True
+
+    def release(self, name):
+        kid = self._kid(name)
+        if kid is None:
+            return False
+        self.event(~kid)
+        return True
+
+    def flush(self):
+        count = self._count
+        if not count:
+            return
+        PACKET_HEADER.pack_into(self._buf, 0, SOCKET_MAGIC, SOCKET_VERSION, MSG_EVENTS, count)
+        self.sock.send(self._view[:PACKET_HEADER.size + count * EVENT.size])
+        self.packets += 1
+        self.sent += count
+        self._count = 0
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self.sock.close()
+            if os.path.exists(self.local_path):
+                os.unlink(self.local_path)
+
+
+def replay(trace_path, path=DEFAULT_SOCKET_PATH, speed=1.0):
+    """트레이스의 키 입력을 원래 간격(speed 배속)으로 보냅니다. 같은 시각에 몰린 이벤트는 한 데이터그램에 담깁니다."""
+    from keyboard_sound.render import load_trace
+
+    trace = load_trace(trace_path)
+    client = SocketClient(path)
+    start = time.perf_counter()
+    missing = 0
+    try:
+        i = 0
+        while i < len(trace):
+            delay = trace[i][0] / speed - (time.perf_counter() - start)
+            if delay > 0:
+                time.sleep(delay)
+            now = time.perf_counter() - start
+            while i < len(trace) and trace[i][0] / speed <= now:
+                key = trace[i][1]
+                # 트레이스에는 누름만 있으므로 입력 정책이 오토 리피트로 보지 않도록 바로 뗍니다
+                if client.press(key):
+                    client.release(key)
+                else:
+                    missing += 1
+                i += 1
+            client.flush()
+    finally:
+        client.close()
+    print(f"replayed {len(trace)} events in {time.perf_counter() - start:.1f}s "
+          f"({client.packets} datagrams, {missing} unknown keys)")
+
+
+def _stress_client(path, keys, rate, batch, duration):
+    """
+    stress() 의 클라이언트 프로세스. batch 개씩 rate 이벤트/초로 보내고
+    (보낸 수, 데이터그램 수, 보내기 시작한 시각, 끝낸 시각) 을 반환합니다.
+    """
+    client = SocketClient(path, batch)
+    interval = batch / rate
+    start = next_t = time.perf_counter()
+    end = next_t + duration
+    i = 0
+    try:
+        while next_t < end:
+            t_ns = time.perf_counter_ns()
+            for _ in range(batch):
+                client.event(client.index[keys[i % len(keys)]], t_ns)
+                i += 1
+            next_t += interval
+            delay = next_t - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+    finally:
+        client.close()
+    return client.sent, client.packets, start, time.perf_counter()
+
+
+def stress(clients=4, rate=20000, batch=32, duration=5.0, block=64):
+    """
+    null 출력 엔진과 소켓 입력을 이 프로세스에 띄우고, 클라이언트 프로세스 clients 개가 합쳐서 초당 rate 개의
+    이벤트를 batch 개씩 보냅니다. 보낸/받은 이벤트 수와 처리량, 클라이언트 시각에서 소켓 수신까지(transit)와
+    그 이벤트를 보이스로 시작하는 콜백 시작까지(ring) 지연을 담은 딕셔너리를 반환합니다.
+    배치 안의 이벤트는 보낼 때의 시각을 씁니다.
+    """
+    import multiprocessing
+
+    from keyboard_sound.bench import synthetic_samples
+    from keyboard_sound.engine import SoundEngine
+    from keyboard_sound.metrics import LatencyHistogram, LatencyMonitor
+    from keyboard_sound.output import NullOutput
+
+    latency = LatencyMonitor(capacity=4096)
+    engine = SoundEngine(block=block, latency=latency)
+    slots = engine.mixer.load_samples(synthetic_samples(8, length_ms=40))
+    engine.reloader = None
+    keys = [f"k{i}" for i in range(len(slots))]
+    engine._key_to_slot = dict(zip(keys, slots))
+    path = os.path.join(_private_dir(), f"ks-stress-{os.getpid()}.sock")
+    server = SocketInput(engine, path, transit=LatencyHistogram())
+    engine.start(output=NullOutput())
+    server.start()
+    try:
+        ctx = multiprocessing.get_context('spawn')
+        with ctx.Pool(clients) as pool:
+            results = pool.starmap(_stress_client, [(path, keys, rate / clients, batch, duration)] * clients)
+        # 프로세스 생성과 연결 시간은 빼고, 클라이언트들이 실제로 보낸 구간만 잽니다
+        # (perf_counter 는 시스템 전체에 공통인 단조 시계입니다)
+        elapsed = max(r[3] for r in results) - min(r[2] for r in results)
+        # 소켓 버퍼에 남은 데이터그램을 처리할 시간을 줍니다
+        waited = 0.0
+        sent = sum(r[0] for r in results)
+        while server.events < sent and waited < 2.0:
+            time.sleep(0.01)
+            waited += 0.01
+    finally:
+        server.stop()
+        engine.close()
+
+    def stage(h):
+        return {'p50_us': h.percentile(50) / 1000.0, 'p99_us': h.percentile(99) / 1000.0, 'max_us': h.max / 1000.0}
+
+    return {
+        'clients': clients,
+        'batch': batch,
+        'sent': sent,
+        'datagrams': sum(r[1] for r in results),
+        'received': server.events,
+        'rejected': server.rejected,
+        'events_per_sec': server.events / elapsed,
+        'transit': stage(server.transit),
+        'ring': stage(latency.stages['ring']),
+        'coalesced': engine.mixer.coalesced,
+    }
+
+
+def print_stress(r):
+    print(f"{r['clients']} clients, batch {r['batch']}: sent {r['sent']} events in {r['datagrams']} datagrams, "
+          f"received {r['received']} ({r['events_per_sec']:.0f} events/s), {r['rejected']} rejected")
+    print(f"{'stage':>9} {'p50us':>9} {'p99us':>9} {'maxus':>9}")
+    for name in ('transit', 'ring'):
+        s = r[name]
+        print(f"{name:>9} {s['p50_us']:>9.1f} {s['p99_us']:>9.1f} {s['max_us']:>9.1f}")
+    print("transit = client stamp -> socket receive, ring = client stamp -> callback that starts the voice")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m keyboard_sound.sockinput", description="소켓 입력 클라이언트 도구")
+    sub = parser.add_subparsers(dest='command', required=True)
+    p = sub.add_parser('replay', help="트레이스를 실행 중인 엔진의 소켓으로 재생")
+    p.add_argument('trace', help="트레이스 파일 (.txt 또는 바이너리 이벤트 로그 .kev)")
+    p.add_argument('--socket', default=DEFAULT_SOCKET_PATH)
+    p.add_argument('--speed', type=float, default=1.0)
+    p = sub.add_parser('stress', help="null 출력 엔진에 여러 클라이언트로 이벤트를 몰아 넣고 처리량과 지연 측정")
+    p.add_argument('--clients', type=int, default=4)
+    p.add_argument('--rate', type=float, default=20000, help="전체 초당 이벤트 수")
+    p.add_argument('--batch', type=int, default=32, help=f"데이터그램당 이벤트 수 (최대 {MAX_BATCH})")
+    p.add_argument('--duration', type=float, default=5.0)
+    p.add_argument('--json', help="결과를 JSON 파일로도 저장")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format="%(message)s")
+    if args.command == 'replay':
+        replay(args.trace, args.socket, args.speed)
+        return
+    result = stress(args.clients, args.rate, min(args.batch, MAX_BATCH), args.duration)
+    print_stress(result)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+"""
+샘플 앞뒤 잘라내기.
+
+키보드 MP3 는 보통 앞에 인코더 패딩과 무음이 붙어 있고, 뒤에는 거의 들리지 않는 긴 꼬리가 있습니다.
+앞부분은 키를 누른 뒤 소리가 늦게 들리게 만들고, 꼬리는 들리지 않는 보이스를 계속 믹싱하게 만듭니다.
+
+window_ms 구간마다 채널 평균 RMS 를 한 번에(NumPy 벡터 연산) 구해서
+
+    onset : RMS 가 가장 큰 구간보다 onset_db 아래인 레벨을 처음 넘는 구간. pre_ms 만큼 앞을 남기고 자릅니다
+    tail  : RMS 가 tail_db (dBFS) 이상인 마지막 구간. 그 뒤를 자르고 끝 fade_ms 는 페이드 아웃합니다
+
+로드할 때(DecodeCache(trim=...)) 또는 사운드 뱅크를 만들 때(bank build --trim) 적용됩니다.
+
+키별로 줄어든 지연(ms)과 메모리(바이트) 보기:
+    python -m keyboard_sound.trim keyboard_mapping_t.json
+"""
+
+import argparse
+import json
+
+import numpy as np
+
+from keyboard_sound.formats import SAMPLE_FORMATS, from_float, to_float
+
+
+def _sample_format(dtype):
+    for name, (fmt_dtype, _, _) in SAMPLE_FORMATS.items():
+        if np.dtype(fmt_dtype) == dtype:
+            return name
+    return None
+
+
+class TrimResult:
+    """샘플 하나에서 잘라낸 양."""
+
+    def __init__(self, rate, frames, lead, tail, frame_bytes):
+        self.rate = rate
+        self.frames = frames
+        self.lead = lead
+        self.tail = tail
+        self.frame_bytes = frame_bytes
+
+    @property
+    def lead_ms(self):
+        """앞에서 잘라낸 길이 = 줄어든 키 입력 -> 소리 지연."""
+        return self.lead * 1000.0 / self.rate
+
+    @property
+    def tail_ms(self):
+        return self.tail * 1000.0 / self.rate
+
+    @property
+    def bytes_saved(self):
+        return (self.lead + self.tail) * self.frame_bytes
+
+
+class Trimmer:
+    """onset 앞과 tail_db 아래의 꼬리를 잘라내는 전처리. 잘라낸 양은 경로별로 results 에 남깁니다."""
+
+    def __init__(self, onset_db=-30.0, tail_db=-60.0, pre_ms=1.0, fade_ms=5.0, window_ms=1.0):
+        self.onset_db = onset_db
+        self.tail_db = tail_db
+        self.pre_ms = pre_ms
+        self.fade_ms = fade_ms
+        self.window_ms = window_ms
+        self.results = {}
+
+    def envelope(self, x, rate):
+        """(frames, channels) float 배열의 window_ms 구간별 RMS 와 구간 길이(프레임)."""
+        win = max(1, int(rate * self.window_ms / 1000))
+        n = -(-len(x) // win)
+        power = np.zeros(n * win, dtype=np.float32)
+        np.mean(np.square(x), axis=1, out=power[:len(x)])
+        return np.sqrt(power.reshape(n, win).mean(axis=1)), win
+
+    def bounds(self, x, rate):
+        """남길 구간 [start, end) 프레임 번호."""
+        if len(x) == 0:
+            return 0, 0
+        rms, win = self.envelope(x, rate)
+        peak = rms.max()
+        if peak <= 0.0:
+            return 0, len(x)
+        onset = int(np.argmax(rms >= peak * 10.0 ** (self.onset_db / 20.0)))
+        audible = np.flatnonzero(rms >= 10.0 ** (self.tail_db / 20.0))
+        last = int(audible[-1]) if len(audible) else onset
+        start = max(0, onset * win - int(rate * self.pre_ms / 1000))
+        end = min(len(x), (max(last, onset) + 1) * win)
+        return start, end
+
+    def __call__(self, pcm, rate, path=None):
+        """잘라낸 PCM (원래 dtype) 을 반환합니다. path 가 있으면 잘라낸 양을 results[path] 에 남깁니다."""
+        x = to_float(pcm)
+        start, end = self.bounds(x, rate)
+        fade = min(int(rate * self.fade_ms / 1000), end - start)
+        if start == 0 and end == len(pcm) and fade == 0:
+            out = pcm
+        else:
+            out = pcm[start:end]
+            if fade > 0 and end < len(pcm):
+                # 잘린 꼬리에서 딱 소리가 나지 않도록 끝을 코사인 페이드 아웃합니다
+                ramp = (0.5 + 0.5 * np.cos(np.linspace(0.0, np.pi, fade, dtype=np.float32)))[:, None]
+                faded = x[end - fade:end] * ramp
+                sample_format = _sample_format(pcm.dtype)
+                out = out.copy()
+                out[-fade:] = from_float(faded, sample_format) if sample_format else faded
+            out = np.ascontiguousarray(out)
+        if path is not None:
+            frame_bytes = pcm.dtype.itemsize * (pcm.shape[1] if pcm.ndim > 1 else 1)
+            self.results[path] = TrimResult(rate, len(pcm), start, len(pcm) - end, frame_bytes)
+        return out
+
+    def summary(self):
+        """전체 합계 한 줄."""
+        results = list(self.results.values())
+        if not results:
+            return "trim: no samples"
+        lead = [r.lead_ms for r in results]
+        saved = sum(r.bytes_saved for r in results)
+        total = sum(r.frames * r.frame_bytes for r in results)
+        return (f"trim: {len(results)} samples, onset latency saved mean {np.mean(lead):.1f} ms "
+                f"(max {max(lead):.1f} ms), {saved / 1024:.0f} KiB of {total / 1024:.0f} KiB saved")
+
+    def report(self, mapping):
+        """{키: 경로} 매핑의 키별 (키, 줄어든 지연 ms, 잘라낸 꼬리 ms, 줄어든 바이트) 목록."""
+        rows = []
+        for key, path in mapping.items():
+            r = self.results.get(path)
+            if r is not None:
+                rows.append((key, r.lead_ms, r.tail_ms, r.bytes_saved))
+        return rows
+
+    def table(self, mapping):
+        """report() 를 머리글이 있는 표의 줄 목록으로 만듭니다."""
+        lines = [f"{'key':>12} {'onset_ms':>9} {'tail_ms':>9} {'saved_KiB':>10}"]
+        for key, lead_ms, tail_ms, saved in self.report(mapping):
+            lines.append(f"{key:>12} {lead_ms:>9.1f} {tail_ms:>9.1f} {saved / 1024:>10.1f}")
+        return lines
+
+
+def main(argv=None):
+    from keyboard_sound.cache import DEFAULT_CACHE_DIR, DecodeCache
+    from keyboard_sound.formats import StreamFormat
+    from keyboard_sound.mapping import mapping_paths
+
+    parser = argparse.ArgumentParser(prog="python -m keyboard_sound.trim",
+                                     description="매핑의 샘플들을 잘라냈을 때 키별로 줄어드는 지연과 메모리")
+    parser.add_argument('mapping', help="키 매핑 JSON 파일")
+    parser.add_argument('--onset-db', type=float, default=-30.0, help="가장 큰 구간 대비 onset 레벨 (dB)")
+    parser.add_argument('--tail-db', type=float, default=-60.0, help="이 레벨(dBFS) 아래의 꼬리를 자릅니다")
+    parser.add_argument('--fade-ms', type=float, default=5.0)
+    parser.add_argument('--rate', type=int, default=44100)
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR)
+    args = parser.parse_args(argv)
+
+    with open(args.mapping, 'r', encoding='utf-8') as f:
+        mapping = mapping_paths(json.load(f))
+    trimmer = Trimmer(args.onset_db, args.tail_db, fade_ms=args.fade_ms)
+    DecodeCache(args.cache_dir, target=StreamFormat(args.rate), trim=trimmer).load(mapping.values())
+    print('\n'.join(trimmer.table(mapping)))
+    print(trimmer.summary())
+
+
+if __name__ == '__main__':
+    main()
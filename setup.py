@@ -1,17 +1,20 @@
 """
-This is a setup.py script generated by py2applet
+설치:
+    pip install .          # keyboard-sound 명령이 생깁니다
 
-Usage:
+macOS 앱 번들 (py2applet 으로 만든 설정):
     python setup.py py2app
 """
 
+import sys
+
 from setuptools import setup
 
 APP = ['main.py']
 DATA_FILES = [    ('sounds', ['sounds/a.mp3']),  # sounds 디렉토리의 모든 mp3 파일
     ('', ['keyboard_mapping_t.json'])]  # 키 매핑 파일
 OPTIONS = {
-	'packages': ['pyaudio', 'logging', 'json', 'os', 'threading', 'time', 'numpy', 'pynput', 'pydub'],
+	'packages': ['keyboard_sound', 'pyaudio', 'logging', 'json', 'os', 'threading', 'time', 'numpy', 'pynput', 'pydub'],
     'plist': {
         'CFBundleName': '키보드 사운드 커스터마이저',
         'CFBundleDisplayName': '키보드 사운드 커스터마이저',
@@ -24,9 +27,18 @@ OPTIONS = {
     }
 }
 
+# py2app 은 앱 번들을 만들 때만 필요합니다
+py2app_options = {}
+if 'py2app' in sys.argv:
+    py2app_options = dict(app=APP, data_files=DATA_FILES, options={'py2app': OPTIONS}, setup_requires=['py2app'])
+
 setup(
-    app=APP,
-    data_files=DATA_FILES,
-    options={'py2app': OPTIONS},
-    setup_requires=['py2app'],
+    name='keyboard-sound',
+    version='1.0.0',
+    description='키 입력마다 사운드를 재생합니다',
+    packages=['keyboard_sound'],
+    python_requires='>=3.8',
+    install_requires=['numpy', 'pydub', 'pyaudio', 'pynput'],
+    entry_points={'console_scripts': ['keyboard-sound = keyboard_sound.cli:main']},
+    **py2app_options
 )
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 설치하지 않고 저장소 루트에서 pytest 를 실행해도 keyboard_sound 패키지를 찾을 수 있게 합니다
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
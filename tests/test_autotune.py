@@ -0,0 +1,84 @@
+import time
+
+from keyboard_sound.autotune import BlockTuner, TuningThread, save_tuning
+from keyboard_sound.metrics import PA_OUTPUT_UNDERFLOW
+
+
+def _run_window(tuner, miss_every=0):
+    """판정 구간 하나를 채울 만큼 콜백을 기록하고 poll() 결과를 반환합니다."""
+    for _ in range(tuner.warmup):
+        tuner.record(0, 0)
+    assert tuner.poll() is None
+    for i in range(int(tuner._min_callbacks) + 1):
+        tuner.record(0, PA_OUTPUT_UNDERFLOW if miss_every and i % miss_every == 0 else 0)
+    return tuner.poll()
+
+
+def test_starts_from_smallest_candidate_without_saved_block():
+    tuner = BlockTuner((64, 32, 128), tuning_file=None)
+    assert tuner.begin('dev', 44100) == 32
+
+
+def test_saved_block_wins(tmp_path):
+    path = str(tmp_path / 'tuning.json')
+    save_tuning(path, 'dev', 128)
+    tuner = BlockTuner((32, 64, 128), tuning_file=path)
+    assert tuner.begin('dev', 44100, 32) == 128
+
+
+def test_steps_up_on_misses_and_saves_when_settled(tmp_path):
+    path = str(tmp_path / 'tuning.json')
+    tuner = BlockTuner((32, 64), target_miss=0.01, window=0.0, tuning_file=path)
+    tuner.begin('dev', 44100)
+    assert _run_window(tuner, miss_every=10) == 64
+    tuner.switched()
+    assert _run_window(tuner) is None
+    assert tuner.settled
+    assert BlockTuner(tuning_file=path).begin('dev', 44100) == 64
+
+
+class FakeMixer:
+    active = 1
+
+
+class FakeEngine:
+    def __init__(self):
+        self.mixer = FakeMixer()
+        self.blocks = []
+
+    def set_block(self, block):
+        self.blocks.append(block)
+
+
+class StepTuner:
+    """첫 poll() 에서 한 번만 64 로 올리라고 답합니다."""
+
+    def __init__(self):
+        self.polls = 0
+        self.switches = 0
+
+    def poll(self):
+        self.polls += 1
+        return 64 if self.polls == 1 else None
+
+    def switched(self):
+        self.switches += 1
+
+
+def test_block_switch_waits_for_a_quiet_moment():
+    engine, tuner = FakeEngine(), StepTuner()
+    thread = TuningThread(engine, tuner, interval=0.001, quiet_timeout=0.01)
+    thread.start()
+    try:
+        deadline = time.monotonic() + 5.0
+        while thread.deferred < 2 and time.monotonic() < deadline:
+            time.sleep(0.005)
+        assert engine.blocks == []
+        engine.mixer.active = 0
+        while not engine.blocks and time.monotonic() < deadline:
+            time.sleep(0.005)
+    finally:
+        thread.stop()
+    assert engine.blocks == [64]
+    assert tuner.switches == 1
+    assert tuner.polls >= 1
@@ -0,0 +1,54 @@
+import numpy as np
+
+from keyboard_sound.cache import DecodeCache, file_digest
+from keyboard_sound.formats import StreamFormat
+from keyboard_sound.trim import Trimmer
+
+
+def _seed(cache, path, pcm, rate=44100):
+    """디코더 없이 캐시 항목을 미리 만들어 둡니다."""
+    cache._store(file_digest(path), pcm, rate)
+    cache._write_index()
+
+
+def test_hit_is_keyed_on_content_and_format(tmp_path):
+    a, b = tmp_path / 'a.mp3', tmp_path / 'b.mp3'
+    a.write_bytes(b'same')
+    b.write_bytes(b'same')
+    fmt = StreamFormat(48000)
+    pcm = np.arange(20, dtype=np.int16).reshape(10, 2)
+    _seed(DecodeCache(str(tmp_path / 'c'), target=fmt), str(a), pcm, 48000)
+
+    cache = DecodeCache(str(tmp_path / 'c'), target=fmt)
+    result = cache.load([str(a), str(b), str(a)], executor='thread')
+    assert cache.hits == 2 and cache.misses == 0
+    for path in (a, b):
+        loaded, rate = result[str(path)]
+        assert rate == 48000
+        assert np.array_equal(loaded, pcm)
+    # 다른 포맷은 같은 파일이라도 다른 항목입니다
+    assert DecodeCache(str(tmp_path / 'c'), target=StreamFormat(44100))._lookup(file_digest(str(a))) is None
+
+
+def test_failed_decode_is_left_out(tmp_path):
+    bad = tmp_path / 'bad.mp3'
+    bad.write_bytes(b'not audio')
+    cache = DecodeCache(str(tmp_path / 'c'))
+    result = cache.load([str(bad), str(tmp_path / 'missing.mp3')], executor='thread')
+    assert result == {}
+    assert cache.misses == 1
+
+
+def test_trim_applies_to_hits_but_cache_keeps_full_pcm(tmp_path):
+    a = tmp_path / 'a.mp3'
+    a.write_bytes(b'click')
+    pcm = np.zeros((4410, 2), dtype=np.int16)
+    pcm[441:882] = 8000
+    _seed(DecodeCache(str(tmp_path / 'c')), str(a), pcm)
+
+    trim = Trimmer()
+    loaded, _ = DecodeCache(str(tmp_path / 'c'), trim=trim).load([str(a)], executor='thread')[str(a)]
+    assert len(loaded) < len(pcm)
+    assert str(a) in trim.results
+    full, _ = DecodeCache(str(tmp_path / 'c')).load([str(a)], executor='thread')[str(a)]
+    assert np.array_equal(full, pcm)
@@ -0,0 +1,21 @@
+from keyboard_sound.eventlog import EVENT_HEADER, EVENT_MAGIC, EVENT_RECORD, EVENT_VERSION, KIND_PRESS, \
+    BinaryEventLog, read_events
+
+
+def test_long_multibyte_key_is_cut_on_a_character_boundary(tmp_path):
+    path = str(tmp_path / "keys.kev")
+    key = "a" + "가" * 100  # 301 바이트, 255 번째 바이트는 문자 중간입니다
+    log = BinaryEventLog(path)
+    log.record(KIND_PRESS, key, 1)
+    log.record(KIND_PRESS, "a", 2)
+    log.close()
+    events = read_events(path)
+    assert events == [(1, KIND_PRESS, "a" + "가" * 84), (2, KIND_PRESS, "a")]
+
+
+def test_read_events_tolerates_a_split_character(tmp_path):
+    path = tmp_path / "old.kev"
+    raw = ("a" + "가" * 100).encode('utf-8')[:255]
+    path.write_bytes(EVENT_HEADER.pack(EVENT_MAGIC, EVENT_VERSION) + EVENT_RECORD.pack(1, KIND_PRESS, len(raw)) + raw)
+    (t_ns, kind, key), = read_events(str(path))
+    assert key.startswith("a" + "가" * 84) and key.endswith("\ufffd")
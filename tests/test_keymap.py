@@ -0,0 +1,87 @@
+import enum
+import threading
+import time
+
+from keyboard_sound.engine import SoundEngine
+from keyboard_sound.keymap import KeyTable
+
+
+class KeyCode:
+    def __init__(self, vk=None, char=None):
+        self.vk = vk
+        self.char = char
+
+
+class Key(enum.Enum):
+    space = KeyCode(vk=32)
+    shift = KeyCode(vk=16)
+    shift_r = KeyCode(vk=161)
+    esc = KeyCode(vk=27)
+
+
+def _table(key_to_slot, params=None):
+    return KeyTable(key_enum=Key).compile(key_to_slot, params)
+
+
+def test_lookup_by_member_vk_and_char():
+    table = _table({'space': 0, 'a': 1, 'vk:65': 2})
+    assert table.slots[table.index(Key.space)] == 0
+    assert table.slots[table.index(KeyCode(char='a'))] == 1
+    # vk 로 지정한 키가 문자보다 먼저 찾아집니다
+    assert table.slots[table.index(KeyCode(vk=65, char='A'))] == 2
+    # 특수 키의 vk 로 들어온 KeyCode 도 같은 키 번호입니다
+    assert table.index(KeyCode(vk=32)) == table.index(Key.space)
+
+
+def test_aliases_and_params_follow_the_resolved_name():
+    table = _table({'shift': 3}, {'shift': (0.5, -1.0)})
+    kid = table.index(Key.shift_r)
+    assert table.name(kid) == 'shift_r'
+    assert table.slots[kid] == 3
+    assert table.params[kid] == (0.5, -1.0)
+
+
+def test_unknown_keys_return_minus_one():
+    table = _table({'a': 0})
+    assert table.index(None) == -1
+    assert table.index(object()) == -1
+    assert table.index(KeyCode()) == -1
+    assert table.index(KeyCode(vk=1 << 20)) == -1
+    assert table.index(Key.esc) == -1
+
+
+def test_key_ids_survive_recompile():
+    table = _table({'a': 0, 'b': 1})
+    kid = table.index(KeyCode(char='b'))
+    table.compile({'b': 5})
+    assert table.index(KeyCode(char='b')) == kid
+    assert table.slots[kid] == 5
+    assert table.slots[table.id_of('a')] == -1
+
+
+def test_engine_compiles_once_when_input_threads_race():
+    engine = SoundEngine()
+    engine.reloader = None
+    engine._key_to_slot = {'a': 0}
+    compiled = []
+    compile_keymap = engine._compile_keymap
+
+    def slow_compile():
+        compiled.append(threading.current_thread().name)
+        time.sleep(0.05)
+        compile_keymap()
+
+    engine._compile_keymap = slow_compile
+    barrier = threading.Barrier(2)
+
+    def lookup():
+        barrier.wait()
+        engine.refresh_keymap()
+
+    threads = [threading.Thread(target=lookup) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(compiled) == 1
+    assert len(set(engine.keymap.names)) == len(engine.keymap.names)
@@ -0,0 +1,80 @@
+import threading
+import time
+
+import numpy as np
+
+from keyboard_sound.formats import StreamFormat
+from keyboard_sound.lrubank import BudgetedSoundBank, _Arena
+from keyboard_sound.mixer import VoiceMixer
+
+FRAMES = 100
+
+
+class FakeCache:
+    """경로 이름의 숫자로 채운 PCM 을 돌려주는 디코드 캐시."""
+
+    def load(self, paths, executor=None, progress=None):
+        return {p: (np.full((FRAMES, 2), int(p), dtype=np.int16), 44100) for p in paths}
+
+
+class AudioThread:
+    """믹싱은 하지 않고 예약된 테이블만 적용하는 오디오 콜백 흉내 (보이스가 계속 재생 중으로 남습니다)."""
+
+    def __init__(self, mixer):
+        self.mixer = mixer
+        self.stop = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self.stop.wait(0.001):
+            self.mixer._apply_pending_table()
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop.set()
+        self.thread.join()
+
+
+def _bank(slots=3, resident=2):
+    fmt = StreamFormat()
+    mixer = VoiceMixer(2, max_voices=4, max_frames=64)
+    budget = (resident * FRAMES + 1) * fmt.channels * fmt.sample_width
+    paths = {f"k{i}": str(i + 1) for i in range(slots)}
+    bank = BudgetedSoundBank(mixer, paths, fmt, budget, cache=FakeCache(), evict_timeout=0.02)
+    return mixer, bank
+
+
+def test_arena_merges_released_ranges():
+    arena = _Arena(11)
+    a, b = arena.alloc(5), arena.alloc(5)
+    assert (a, b) == (1, 6)
+    assert arena.alloc(1) is None
+    arena.release(b, 5)
+    arena.release(a, 5)
+    assert arena.free == [(1, 10)]
+
+
+def test_eviction_never_frees_a_range_that_is_playing():
+    mixer, bank = _bank()
+    with AudioThread(mixer):
+        assert bank._load(0) and bank._load(1)
+        while mixer._pending_table is not None:
+            time.sleep(0.001)
+        start0 = int(bank._starts[0])
+        assert mixer.trigger(0) >= 0
+        # 가장 오래된 0번은 재생 중이므로 구간은 남고, 1번 자리에 2번이 올라갑니다
+        assert bank._load(2)
+    assert 0 not in bank._lru and 1 not in bank._lru
+    assert bank.evictions == 2
+    assert len(bank._draining) == 1
+    assert (bank.arena[start0:start0 + FRAMES] == 1).all()
+    start2 = int(bank._starts[2])
+    assert abs(start2 - start0) >= FRAMES
+
+    while mixer.active:
+        mixer.mix(64)
+    assert bank._reclaim()
+    assert bank._draining == []
@@ -0,0 +1,34 @@
+from keyboard_sound.metrics import PA_OUTPUT_UNDERFLOW, LatencyHistogram, LatencyMonitor
+
+
+def test_ring_wait_is_measured_to_callback_start():
+    monitor = LatencyMonitor()
+    monitor.voice_started(1000)
+    monitor.voice_started(4000)
+    monitor.callback(5000, 5300, 0, {'current_time': 1.0, 'output_buffer_dac_time': 1.000002})
+    ring = monitor.stages['ring']
+    assert ring.total == 2
+    assert ring.max == 4000
+    assert monitor.stages['callback'].max == 300
+    assert monitor.stages['total'].max == 4000 + monitor.stages['output'].max
+    assert all(h.percentile(0) >= 0 for h in monitor.stages.values())
+
+
+def test_pending_voices_are_counted_once():
+    monitor = LatencyMonitor(capacity=1)
+    monitor.voice_started(0)
+    monitor.voice_started(0)
+    assert monitor.dropped == 1
+    monitor.callback(10, 20, PA_OUTPUT_UNDERFLOW)
+    monitor.callback(30, 40, 0)
+    assert monitor.stages['ring'].total == 1
+    assert monitor.underruns == 1
+
+
+def test_histogram_percentile_within_bucket_error():
+    h = LatencyHistogram()
+    for v in range(1, 1001):
+        h.record(v * 1000)
+    assert abs(h.percentile(50) - 500000) < 500000 * 0.07
+    assert h.max == 1000000
+    assert 1000000 * 0.94 < h.percentile(100) <= h.max
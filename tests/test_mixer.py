@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from keyboard_sound.mixer import VoiceMixer
+
+
+def _mixer(**kwargs):
+    kwargs.setdefault('max_frames', 64)
+    return VoiceMixer(2, **kwargs)
+
+
+def _const(value, frames):
+    return np.full((frames, 2), value, dtype=np.int16)
+
+
+def test_mix_sums_voices_and_retires_finished():
+    mixer = _mixer(bus='int')
+    short, long_ = mixer.load_samples([_const(100, 16), _const(1000, 128)])
+    mixer.trigger(short)
+    mixer.trigger(long_)
+    out = mixer.mix(64).reshape(-1, 2)
+    assert (out[:16] == 1100).all()
+    assert (out[16:] == 1000).all()
+    assert mixer.active == 1
+    assert mixer.voice_sample[0] == long_
+
+
+def test_retire_keeps_remaining_voices_in_order():
+    mixer = _mixer(bus='int', max_voices=8)
+    slots = mixer.load_samples([_const(1, n) for n in (8, 200, 8, 300, 8)])
+    for s in slots:
+        mixer.trigger(s)
+    mixer.mix(32)
+    assert mixer.active == 2
+    assert list(mixer.voice_sample[:2]) == [slots[1], slots[3]]
+    assert list(mixer.voice_pos[:2]) == [32, 32]
+    assert list(mixer.voice_length[:2]) == [200, 300]
+
+
+def test_mix_rejects_block_larger_than_scratch():
+    mixer = _mixer(max_frames=64)
+    with pytest.raises(ValueError):
+        mixer.mix(65)
+    assert mixer.max_frames == 64
+
+
+def test_limiter_threshold_one_clips_without_nan():
+    mixer = _mixer(limiter_threshold=1.0)
+    slot = mixer.load_samples([_const(30000, 64)])[0]
+    for _ in range(4):
+        mixer.trigger(slot)
+    out = mixer.mix(64)
+    assert (out == 32767).all()
+
+
+def test_soft_knee_stays_below_full_scale():
+    mixer = _mixer(limiter_threshold=0.8)
+    slot = mixer.load_samples([_const(30000, 64)])[0]
+    for _ in range(4):
+        mixer.trigger(slot)
+    out = mixer.mix(64)
+    assert out.max() <= 32767
+    assert out.min() > 0.8 * 32767
@@ -0,0 +1,62 @@
+import pytest
+
+from keyboard_sound.keymap import KeyTable
+from keyboard_sound.policy import InputPolicy
+
+MS = 1000000
+
+
+def _bind(policy, names=('a', 'b', 'c')):
+    table = KeyTable(key_enum=()).compile({n: i for i, n in enumerate(names)})
+    policy.bind(table)
+    return [table.id_of(n) for n in names]
+
+
+def test_auto_repeat_modes():
+    ignore = InputPolicy(repeat='ignore')
+    a, _, _ = _bind(ignore)
+    assert ignore.press(a, 0) == 0
+    assert ignore.press(a, 50 * MS) == -1
+    ignore.release(a)
+    assert ignore.press(a, 100 * MS) == 0
+    assert ignore.suppressed['repeat'] == 1
+
+    sample = InputPolicy(repeat='sample')
+    a, _, _ = _bind(sample)
+    sample.press(a, 0)
+    assert not sample.repeating
+    assert sample.press(a, 50 * MS) == 0
+    assert sample.repeating
+
+
+def test_min_interval_per_key():
+    policy = InputPolicy(repeat='allow', min_interval_ms=30, key_interval_ms={'b': 0})
+    a, b, _ = _bind(policy)
+    assert policy.press(a, 0) == 0
+    assert policy.press(a, 10 * MS) == -1
+    assert policy.press(a, 40 * MS) == 0
+    assert policy.press(b, 0) == 0
+    assert policy.press(b, 1) == 0
+    assert policy.suppressed['interval'] == 1
+
+
+def test_token_bucket_limits_bursts():
+    policy = InputPolicy(repeat='allow', max_rate=10, burst=2)
+    a, b, c = _bind(policy)
+    assert [policy.press(k, 0) for k in (a, b, c)] == [0, 0, -1]
+    # 100 ms 에 토큰 하나가 다시 찹니다
+    assert policy.press(c, 100 * MS) == 0
+    assert policy.suppressed['rate'] == 1
+
+
+def test_choke_groups_are_numbered_from_one():
+    policy = InputPolicy(choke_groups=[('a', 'b')])
+    a, b, c = _bind(policy)
+    assert policy.press(a, 0) == 1
+    assert policy.press(b, 0) == 1
+    assert policy.press(c, 0) == 0
+
+
+def test_unknown_repeat_mode_is_rejected():
+    with pytest.raises(ValueError):
+        InputPolicy(repeat='loop')
@@ -0,0 +1,31 @@
+import time
+
+from keyboard_sound.bench import synthetic_samples
+from keyboard_sound.metrics import JitterMeter, LatencyMonitor
+from keyboard_sound.output import NullOutput
+from keyboard_sound.procengine import ProcessEngine
+
+
+def test_stats_are_visible_while_running_and_after_close():
+    latency, jitter = LatencyMonitor(), JitterMeter(44100)
+    engine = ProcessEngine(block=64, latency=latency, jitter=jitter)
+    slots = engine.mixer.load_samples(synthetic_samples(2, length_ms=20))
+    engine.reloader = None
+    engine._key_to_slot = {f"k{i}": s for i, s in enumerate(slots)}
+    engine.start(output=NullOutput())
+    try:
+        for i in range(5):
+            engine.play(f"k{i % 2}")
+            time.sleep(0.01)
+        deadline = time.monotonic() + 5.0
+        while latency.stages['ring'].total < 5 and time.monotonic() < deadline:
+            time.sleep(0.02)
+            engine.refresh_stats()
+        assert latency.stages['ring'].total == 5
+        assert latency.callbacks > 0
+        assert jitter.summary()['callbacks'] > 0
+    finally:
+        engine.close()
+    assert latency.stages['ring'].total == 5
+    # 종료한 뒤에는 아무 일도 하지 않습니다
+    engine.refresh_stats()
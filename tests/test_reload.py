@@ -0,0 +1,80 @@
+import os
+
+import numpy as np
+
+from keyboard_sound.mixer import VoiceMixer
+from keyboard_sound.reload import HotReloader
+
+
+class FakeDecodeReloader(HotReloader):
+    """디코더 대신 파일 크기와 내용으로 만든 PCM 을 돌려줍니다."""
+
+    def _decode(self, paths, progress=None):
+        out = {}
+        for p in paths:
+            with open(p, 'rb') as f:
+                value = int(f.read() or b'0')
+            out[p] = np.full((1000, 2), value, dtype=np.int16)
+        return out
+
+
+def _setup(tmp_path):
+    a, b = tmp_path / 'a.raw', tmp_path / 'b.raw'
+    a.write_text('1')
+    b.write_text('2')
+    mixer = VoiceMixer(2, max_voices=4, max_frames=64)
+    reloader = FakeDecodeReloader(mixer, None, fmt=None, cache=object(), swap_timeout=0.005)
+    reloader.load({'a': str(a), 'b': str(b)})
+    return mixer, reloader, a, b
+
+
+def _edit(path, value):
+    path.write_text(str(value))
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1000000 * value))
+
+
+def test_reload_appends_and_keeps_playing_offsets(tmp_path):
+    mixer, reloader, a, b = _setup(tmp_path)
+    slot = reloader.key_to_slot['a']
+    old_start = int(mixer.sample_start[slot])
+    _edit(a, 7)
+    reloader.update({'a': str(a), 'b': str(b)})
+    pending = mixer._pending_table
+    assert pending is not None and not pending[4]
+    mixer._apply_pending_table()
+    start = int(mixer.sample_start[slot])
+    assert start != old_start
+    assert (mixer.pcm[start:start + 1000] == 7).all()
+    assert (mixer.pcm[old_start:old_start + 1000] == 1).all()
+
+
+def test_compacted_table_stays_idle_only_until_applied(tmp_path):
+    mixer, reloader, a, b = _setup(tmp_path)
+    mixer.trigger(reloader.key_to_slot['b'])
+    value = 3
+    # 재생 중인 보이스 때문에 압축 테이블이 적용되지 못할 때까지 리로드를 쌓습니다
+    while mixer._pending_table is None or not mixer._pending_table[4]:
+        mixer._apply_pending_table()
+        _edit(a, value)
+        reloader.update({'a': str(a), 'b': str(b)})
+        value += 1
+    generation = mixer.table_generation
+    _edit(a, 50)
+    reloader.update({'a': str(a), 'b': str(b)})
+    assert mixer._pending_table[4], "압축 오프셋 위의 테이블은 유휴 상태에서만 적용되어야 합니다"
+    mixer._apply_pending_table()
+    assert mixer.table_generation == generation
+
+    while mixer.active:
+        mixer.mix(64)
+    mixer._apply_pending_table()
+    assert mixer.table_generation == generation + 1
+    for key, expected in (('a', 50), ('b', 2)):
+        slot = reloader.key_to_slot[key]
+        start, length = int(mixer.sample_start[slot]), int(mixer.sample_length[slot])
+        assert (mixer.pcm[start:start + length] == expected).all()
+
+    _edit(a, 60)
+    reloader.update({'a': str(a), 'b': str(b)})
+    assert not mixer._pending_table[4]
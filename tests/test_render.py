@@ -0,0 +1,11 @@
+from keyboard_sound.render import load_sounds, render, synthetic_trace
+
+
+def test_load_sounds_falls_back_to_synthetic_samples_without_a_bank(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    mixer, key_to_slot, rate = load_sounds(block=64)
+    assert key_to_slot and rate == 44100
+    trace = synthetic_trace(sorted(key_to_slot), 300, 1.0, 0)
+    stats = render(mixer, key_to_slot, trace, rate, 64)
+    assert mixer.triggered == len(trace)
+    assert len(stats.callback_ns) > 0
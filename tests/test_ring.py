@@ -0,0 +1,110 @@
+import numpy as np
+import pytest
+
+from keyboard_sound import mixer as mixer_module
+from keyboard_sound.mixer import VoiceMixer
+from keyboard_sound.ring import SharedTriggerRing, TriggerRing
+
+
+def _drain(ring, size=16):
+    keys = np.zeros(size, dtype=np.int32)
+    times = np.zeros(size, dtype=np.int64)
+    groups = np.zeros(size, dtype=np.int32)
+    params = np.zeros(size, dtype=np.int32)
+    n = ring.drain_into(keys, times, groups, params)
+    return keys[:n].tolist(), times[:n].tolist(), groups[:n].tolist(), params[:n].tolist()
+
+
+def test_ring_preserves_order_across_wraparound():
+    ring = TriggerRing(4)
+    for i in range(3):
+        ring.push(i, 100 + i)
+    assert _drain(ring)[0] == [0, 1, 2]
+    for i in range(3, 7):
+        ring.push(i, 100 + i, group=i, param=-i)
+    keys, times, groups, params = _drain(ring)
+    assert keys == [3, 4, 5, 6]
+    assert times == [103, 104, 105, 106]
+    assert groups == [3, 4, 5, 6]
+    assert params == [-3, -4, -5, -6]
+    assert len(ring) == 0
+
+
+def test_ring_drops_when_full():
+    ring = TriggerRing(4)
+    results = [ring.push(i, 0) for i in range(6)]
+    assert results == [True] * 4 + [False] * 2
+    assert ring.dropped == 2
+    assert _drain(ring)[0] == [0, 1, 2, 3]
+
+
+def test_shared_ring_is_visible_through_second_mapping():
+    producer = SharedTriggerRing(8)
+    consumer = SharedTriggerRing(8, producer.name)
+    try:
+        for i in range(5):
+            producer.push(i, i)
+        assert _drain(consumer)[0] == [0, 1, 2, 3, 4]
+        assert producer.tail == 5
+    finally:
+        consumer.close()
+        producer.close(unlink=True)
+
+
+def _voices(mixer):
+    n = mixer.active
+    return sorted(zip(mixer.voice_sample[:n].tolist(), mixer.voice_group[:n].tolist(),
+                      mixer.voice_length[:n].tolist()))
+
+
+def _loaded(max_voices):
+    mixer = VoiceMixer(2, max_voices=max_voices, max_frames=64, bus='int')
+    mixer.load_samples([np.full((50 + 10 * i, 2), 100, dtype=np.int16) for i in range(6)])
+    return mixer
+
+
+@pytest.mark.parametrize('sequential', [0, mixer_module.SEQUENTIAL_TRIGGERS])
+def test_trigger_pending_matches_sequential_triggers(monkeypatch, sequential):
+    # 0 이면 벡터 배치 경로, 기본값이면 4 개짜리 배치가 trigger() 반복 경로로 갑니다
+    monkeypatch.setattr(mixer_module, 'SEQUENTIAL_TRIGGERS', sequential)
+    events = [(1, 7), (2, 0), (3, 7), (4, 0)]
+    batch, seq = _loaded(4), _loaded(4)
+    # 미리 재생 중인 보이스: 그룹 7 은 초크되고, 빈 자리가 모자라 가장 오래된 4 번이 뺏깁니다
+    for mixer in (batch, seq):
+        mixer.trigger(5, group=7)
+        mixer.trigger(4)
+        mixer.trigger(0)
+    ring = TriggerRing(16)
+    for sample, group in events:
+        ring.push(sample, 0, group)
+    started = []
+    assert batch.trigger_pending(ring, started.append) == len(events)
+    for sample, group in events:
+        seq.trigger(sample, group=group)
+    assert _voices(batch) == _voices(seq)
+    assert (batch.triggered, batch.choked, batch.stolen) == (seq.triggered, seq.choked, seq.stolen)
+    assert (batch.choked, batch.stolen) == (2, 1)
+    assert len(started) == len(events)
+
+
+def test_trigger_pending_coalesces_to_max_voices():
+    mixer = _loaded(4)
+    ring = TriggerRing(16)
+    for i in range(10):
+        ring.push(i % 6, i)
+    started = []
+    mixer.trigger_pending(ring, started.append)
+    assert mixer.coalesced == 6
+    assert started == [6, 7, 8, 9]
+    assert mixer.active == 4
+
+
+def test_trigger_pending_skips_unknown_slots_and_applies_key_gains():
+    mixer = _loaded(4)
+    mixer.set_key_gains([(0.5, 0.0)])
+    ring = TriggerRing(8)
+    ring.push(99, 0)
+    ring.push(1, 0, 0, 0)
+    mixer.trigger_pending(ring)
+    assert mixer.active == 1
+    assert mixer.voice_gain[0].tolist() == [mixer._gain_one // 2] * 2
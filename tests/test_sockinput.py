@@ -0,0 +1,113 @@
+import json
+import os
+import stat
+import time
+
+import pytest
+
+from keyboard_sound import sockinput
+from keyboard_sound.sockinput import MAX_DATAGRAM, PACKET_HEADER, SocketClient, SocketInput, _key_chunks
+
+
+class FakeKeymap:
+    def __init__(self, names):
+        self.names = names
+        self.slots = list(range(len(names)))
+
+
+class FakeEngine:
+    """눌린 키 번호만 기록하는 엔진."""
+
+    def __init__(self, names):
+        self.keymap = FakeKeymap(names)
+        self.pressed = []
+
+    def refresh_keymap(self):
+        return self.keymap
+
+    def press(self, kid, t_ns):
+        self.pressed.append(kid)
+        return True
+
+    def release(self, kid):
+        pass
+
+
+def test_claim_path_refuses_regular_file(tmp_path):
+    path = tmp_path / "not-a-socket"
+    path.write_text("keep me")
+    with pytest.raises(OSError):
+        SocketInput(FakeEngine([]), str(path)).start()
+    assert path.read_text() == "keep me"
+
+
+def test_key_chunks_fit_in_one_datagram():
+    names = [f"긴키이름-{i:04d}-" + "x" * 40 for i in range(300)]
+    chunks = list(_key_chunks(names))
+    assert len(chunks) > 1
+    assert [name for _, chunk in chunks for name in chunk] == names
+    for first, chunk in chunks:
+        assert names[first] == chunk[0]
+        payload = json.dumps([first, chunk], ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        assert PACKET_HEADER.size + len(payload) <= MAX_DATAGRAM
+    assert list(_key_chunks([])) == [(0, [])]
+
+
+def test_chunked_key_table_round_trip(tmp_path, socket_dir):
+    names = [f"긴키이름-{i:04d}-" + "x" * 40 for i in range(300)]
+    engine = FakeEngine(names)
+    server = SocketInput(engine, os.path.join(str(tmp_path), "s.sock"))
+    server.start()
+    try:
+        client = SocketClient(server.path, timeout=2.0)
+        try:
+            assert client.index == {name: kid for kid, name in enumerate(names)}
+            assert client.press(names[-1])
+            client.flush()
+            deadline = time.monotonic() + 2.0
+            while not engine.pressed and time.monotonic() < deadline:
+                time.sleep(0.005)
+        finally:
+            client.close()
+    finally:
+        server.stop()
+    assert engine.pressed == [len(names) - 1]
+
+
+@pytest.fixture
+def socket_dir(tmp_path, monkeypatch):
+    path = str(tmp_path / "run")
+    monkeypatch.setattr(sockinput, 'SOCKET_DIR', path)
+    return path
+
+
+def test_server_socket_is_private(socket_dir):
+    server = SocketInput(FakeEngine(["a"]), os.path.join(socket_dir, "s.sock"))
+    server.start()
+    try:
+        assert stat.S_IMODE(os.stat(socket_dir).st_mode) == 0o700
+        assert stat.S_IMODE(os.stat(server.path).st_mode) == 0o600
+        client = SocketClient(server.path)
+        assert os.path.dirname(client.local_path) == socket_dir
+        client.close()
+    finally:
+        server.stop()
+
+
+def test_open_socket_dir_is_refused(socket_dir):
+    os.mkdir(socket_dir, 0o755)
+    os.chmod(socket_dir, 0o755)
+    with pytest.raises(OSError):
+        SocketInput(FakeEngine([]), os.path.join(socket_dir, "s.sock")).start()
+
+
+@pytest.mark.skipif(not hasattr(os, 'geteuid') or os.geteuid() != 0, reason="소켓 소유자를 바꾸려면 root 가 필요합니다")
+def test_client_refuses_a_socket_owned_by_another_user(tmp_path, socket_dir):
+    server = SocketInput(FakeEngine(["a"]), str(tmp_path / "s.sock"))
+    server.start()
+    try:
+        os.chown(server.path, os.getuid() + 1, -1)
+        with pytest.raises(OSError):
+            SocketClient(server.path)
+    finally:
+        server.stop()
@@ -0,0 +1,44 @@
+import numpy as np
+
+from keyboard_sound.trim import Trimmer
+
+RATE = 44100
+
+
+def _click(lead=441, body=2205, tail=4410):
+    """lead 프레임 무음, body 프레임 클릭, tail 프레임 -80 dBFS 꼬리."""
+    rng = np.random.default_rng(0)
+    quiet = (rng.standard_normal((tail, 2)) * 32767 * 1e-4).astype(np.int16)
+    loud = (rng.standard_normal((body, 2)) * 8000).clip(-32768, 32767).astype(np.int16)
+    return np.concatenate([np.zeros((lead, 2), dtype=np.int16), loud, quiet])
+
+
+def test_cuts_leading_silence_and_inaudible_tail():
+    pcm = _click()
+    trim = Trimmer()
+    out = trim(pcm, RATE, 'k.mp3')
+    r = trim.results['k.mp3']
+    # 앞은 1 ms 프리롤만 남습니다
+    assert abs(r.lead_ms - (10.0 - 1.0)) < 1.1
+    assert r.tail_ms > 90.0
+    assert len(out) == len(pcm) - r.lead - r.tail
+    assert r.bytes_saved == (r.lead + r.tail) * 4
+    assert out.dtype == pcm.dtype and out.flags['C_CONTIGUOUS']
+    # 끝은 페이드 아웃되어 0 에 가깝습니다
+    assert np.abs(out[-1]).max() <= 1
+
+
+def test_silent_and_empty_samples_are_kept():
+    trim = Trimmer()
+    silent = np.zeros((100, 2), dtype=np.int16)
+    assert np.array_equal(trim(silent, RATE), silent)
+    assert len(trim(np.zeros((0, 2), dtype=np.int16), RATE)) == 0
+
+
+def test_report_table_lists_each_key():
+    trim = Trimmer()
+    trim(_click(), RATE, 'a.mp3')
+    lines = trim.table({'a': 'a.mp3', 'b': 'missing.mp3'})
+    assert len(lines) == 2
+    assert lines[1].split()[0] == 'a'
+    assert trim.summary().startswith("trim: 1 samples")